@@ -0,0 +1,235 @@
+import gzip
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from collections import Counter
+from typing import Callable, Optional, Tuple
+
+import androguard
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+AnalysisResults = Tuple
+
+
+class _DirectoryLock:
+
+    """
+    An exclusive lock over a directory, shared by all of the processes on the host.
+    """
+
+    def __init__(self, lock_file_path: str):
+        self._lock_file_path = lock_file_path
+        self._lock_file = None
+
+    def __enter__(self):
+        self._lock_file = open(self._lock_file_path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._lock_file.close()
+        self._lock_file = None
+
+
+class _RecursionLimit:
+
+    """
+    Raises the recursion limit while pickling.
+
+    The recursion limit is process wide, so it is raised for the other threads of the process meanwhile as well.
+    Threads pickling at once share the raised limit, and the previous limit is restored when the last one is done,
+    so one thread does not restore the limit while another one still needs it raised.
+    """
+
+    _lock = threading.Lock()
+    _users_count = 0
+    _previous_recursion_limit: Optional[int] = None
+
+    def __init__(self, recursion_limit: int):
+        self._recursion_limit = recursion_limit
+
+    def __enter__(self):
+        with _RecursionLimit._lock:
+            if _RecursionLimit._users_count == 0:
+                _RecursionLimit._previous_recursion_limit = sys.getrecursionlimit()
+            _RecursionLimit._users_count += 1
+            sys.setrecursionlimit(max(self._recursion_limit, sys.getrecursionlimit()))
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with _RecursionLimit._lock:
+            _RecursionLimit._users_count -= 1
+            if _RecursionLimit._users_count == 0:
+                sys.setrecursionlimit(_RecursionLimit._previous_recursion_limit)
+
+
+class AnalysisCache:
+
+    """
+    A directory of compressed androguard analysis results, keyed by the SHA-256 of the apk's content
+    and the analysis mode, so a moved apk still hits the cache and a different apk at the same path never does.
+
+    Entries are written to a temporary file and renamed into place, and evictions are done under a lock file,
+    so several processes can share the directory.
+    When the entries take more than `maximum_size` bytes, the least recently used ones are evicted.
+    """
+
+    # Bump whenever the content of the analysis results changes, to invalidate the cached entries
+    VERSION = 1
+    MAXIMUM_SIZE = 10 * 2 ** 30
+    ENTRY_SUFFIX = '.pickle.gz'
+    LOCK_FILE_NAME = '.lock'
+    COMPRESS_LEVEL = 6
+    # androguard's analysis objects are deeply nested, androguard sessions raise the limit the same way
+    PICKLE_RECURSION_LIMIT = 50000
+
+    def __init__(self, directory: str, maximum_size: int = MAXIMUM_SIZE):
+        if maximum_size < 0:
+            raise ValueError(f"Maximum size must not be negative, got {maximum_size}")
+        self._directory = directory
+        self._maximum_size = maximum_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = _DirectoryLock(os.path.join(directory, self.LOCK_FILE_NAME))
+        self.statistics = Counter()
+
+    def get_analysis(
+            self,
+            apk_path: str,
+            analysis_mode: str,
+            analyze: Callable[[], AnalysisResults],
+    ) -> AnalysisResults:
+        """
+        Load the analysis results of the apk from the cache, or analyze it and cache the results on a miss.
+
+        :param analysis_mode: identifies how the apk is analyzed, results of different modes are cached separately
+        """
+        key = self.calculate_key(apk_path, analysis_mode)
+        results = self._load(key)
+        if results is not None:
+            self.statistics['analysis_cache_hits'] += 1
+            return results
+        self.statistics['analysis_cache_misses'] += 1
+        results = analyze()
+        self._store(key, results)
+        return results
+
+    @classmethod
+    def calculate_key(cls, apk_path: str, analysis_mode: str) -> str:
+        apk_hash = hashlib.sha256()
+        with open(apk_path, 'rb') as apk_file:
+            for chunk in iter(lambda: apk_file.read(2 ** 20), b''):
+                apk_hash.update(chunk)
+        key_hash = hashlib.sha256(f'{cls.VERSION}:{androguard.__version__}:{analysis_mode}:'.encode('utf-8'))
+        key_hash.update(apk_hash.digest())
+        return key_hash.hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self._directory, key + self.ENTRY_SUFFIX)
+
+    def _load(self, key: str) -> Optional[AnalysisResults]:
+        entry_path = self._get_entry_path(key)
+        try:
+            raw_entry_file = open(entry_path, 'rb')
+        except FileNotFoundError:
+            return None
+        is_corrupted = False
+        with raw_entry_file:
+            entry_stat = os.fstat(raw_entry_file.fileno())
+            try:
+                with gzip.GzipFile(fileobj=raw_entry_file, mode='rb') as entry_file, \
+                        _RecursionLimit(self.PICKLE_RECURSION_LIMIT):
+                    results = pickle.load(entry_file)
+            except (
+                OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError, TypeError,
+                IndexError,
+            ):
+                is_corrupted = True
+        if is_corrupted:
+            # A truncated entry, or one pickled from classes that changed since, is treated as a miss.
+            # It is removed so it is not loaded again if storing the new results fails.
+            self.statistics['analysis_cache_corrupted_entries'] += 1
+            self._remove_entry(entry_path, entry_stat)
+            return None
+        try:
+            # Mark the entry as recently used
+            os.utime(entry_path)
+        except FileNotFoundError:
+            # Evicted by another process meanwhile
+            pass
+        return results
+
+    def _remove_entry(self, entry_path: str, entry_stat: os.stat_result):
+        """
+        Remove the entry, unless another process has replaced it since it was read.
+        """
+        with self._lock:
+            try:
+                current_entry_stat = os.stat(entry_path)
+            except FileNotFoundError:
+                return
+            # Entries are replaced by renaming a new file into place, so a replaced entry is a different file
+            if (current_entry_stat.st_dev, current_entry_stat.st_ino) != (entry_stat.st_dev, entry_stat.st_ino):
+                return
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # Still open by another process on platforms that do not allow removing open files
+                pass
+
+    def _store(self, key: str, results: AnalysisResults):
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                with gzip.GzipFile(fileobj=temporary_file, mode='wb', compresslevel=self.COMPRESS_LEVEL) as entry_file, \
+                        _RecursionLimit(self.PICKLE_RECURSION_LIMIT):
+                    pickle.dump(results, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                os.replace(temporary_path, self._get_entry_path(key))
+                self._evict()
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def _evict(self):
+        """
+        Remove the least recently used entries until the entries fit in the maximum size.
+        Must be called under the lock.
+        """
+        entries = []
+        for file_name in os.listdir(self._directory):
+            if not file_name.endswith(self.ENTRY_SUFFIX):
+                continue
+            entry_path = os.path.join(self._directory, file_name)
+            try:
+                entry_stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+        total_size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_path in sorted(entries):
+            if total_size <= self._maximum_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # Still open by another process on platforms that do not allow removing open files
+                continue
+            total_size -= entry_size
+            self.statistics['analysis_cache_evictions'] += 1
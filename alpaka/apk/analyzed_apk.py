@@ -1,12 +1,17 @@
 import os
-from typing import List
+import re
+import time
+import zipfile
+from typing import Iterator, List, Optional
 
-from androguard.core.analysis.analysis import Analysis
+from androguard.core.analysis.analysis import Analysis, ClassAnalysis, ExternalClass, MethodClassAnalysis
 from androguard.core.bytecodes.apk import APK
 from androguard.core.bytecodes.dvm import DalvikVMFormat
 from androguard.misc import AnalyzeAPK, get_default_session
 from androguard import session
 
+from alpaka.apk.analysis_cache import AnalysisCache
+
 
 class AnalyzedApkNotFoundError(Exception):
     def __init__(self, analyzed_files: List, file_not_found: str):
@@ -21,16 +26,56 @@ class SessionNotFoundError(Exception):
 
 
 class AnalyzedApk:
-    def __init__(self, apk_path: str, session_path: str = None):
+    DEX_FILE_NAME_REGEX = re.compile(r'^classes(\d*)\.dex$')
+
+    def __init__(
+            self,
+            apk_path: str,
+            session_path: str = None,
+            dex_only: bool = False,
+            analysis_cache: Optional[AnalysisCache] = None,
+    ):
+        """
+        :param analysis_cache: a cache of analysis results keyed by the content of the apk,
+        an alternative to sessions which are keyed by the path of the apk
+        :param dex_only: parse only the DEX files of the apk, skipping the manifest, the resources
+        and androguard's cross-references. The analysis then holds only what alpaka reads:
+        the methods of each ClassAnalysis are all of the methods defined in the class
+        (rather than the ones found while creating the cross-references),
+        and the external classes are the types referred to by the DEX files.
+        In this mode apk is None and sessions are not supported.
+        """
+        if dex_only and session_path:
+            raise ValueError("Sessions are not supported in DEX only mode")
+        if analysis_cache is not None and session_path:
+            raise ValueError("Use either a session or an analysis cache")
         self._path = os.path.abspath(apk_path)
         self._filename = os.path.basename(self._path)
         self._session_path = session_path
 
-        results = self._analyze_apk()
-        self.apk: APK = results[0]
+        start_time = time.perf_counter()
+        analyze = self._analyze_dex_only if dex_only else self._analyze_apk
+        if analysis_cache is None:
+            results = analyze()
+        else:
+            results = analysis_cache.get_analysis(self._path, 'dex-only' if dex_only else 'full', analyze)
+        # Seconds it took to analyze the apk or to load it from the cache
+        self.load_time: float = time.perf_counter() - start_time
+        self.apk: Optional[APK] = results[0]
         self.dalvik_vm_format: DalvikVMFormat = results[1]
         self.analysis: Analysis = results[2]
 
+    def get_type_descriptors(self) -> List[str]:
+        """
+        :return: every type descriptor referred to by the DEX files, including primitives and arrays,
+        in the order of the DEX files without repetitions
+        """
+        return list(dict.fromkeys(
+            type_descriptor
+            for dalvik_vm_format in self.analysis.vms
+            for type_descriptor in self._iterate_type_descriptors(dalvik_vm_format)
+        ))
+
     def _get_analysis_from_session(self):
         if os.path.isfile(self._session_path):
             # Session exists
@@ -56,3 +101,51 @@ class AnalyzedApk:
         if sess:
             session.Save(sess, self._session_path)
         return apk_analysis
+
+    def _analyze_dex_only(self):
+        with zipfile.ZipFile(self._path) as apk_file:
+            dex_file_names = sorted(
+                (
+                    file_name for file_name in apk_file.namelist()
+                    if self.DEX_FILE_NAME_REGEX.match(file_name)
+                ),
+                # classes.dex, classes2.dex, classes3.dex...
+                key=lambda file_name: int(self.DEX_FILE_NAME_REGEX.match(file_name).group(1) or 1),
+            )
+            dalvik_vm_formats = [DalvikVMFormat(apk_file.read(file_name)) for file_name in dex_file_names]
+
+        analysis = Analysis()
+        for dalvik_vm_format in dalvik_vm_formats:
+            self._add_dex_classes(analysis, dalvik_vm_format)
+        for dalvik_vm_format in dalvik_vm_formats:
+            self._add_external_classes(analysis, dalvik_vm_format)
+        return None, dalvik_vm_formats, analysis
+
+    @staticmethod
+    def _add_dex_classes(analysis: Analysis, dalvik_vm_format: DalvikVMFormat):
+        """
+        Like Analysis.add, without analyzing the basic blocks of every method.
+        ClassAnalysis has no public way to add a method, so its private _methods are filled the way
+        Analysis.create_xref fills them, and androguard is pinned to a version that keeps them.
+        """
+        analysis.vms.append(dalvik_vm_format)
+        for class_def in dalvik_vm_format.get_classes():
+            class_analysis = ClassAnalysis(class_def)
+            for method in class_def.get_methods():
+                class_analysis._methods[method] = MethodClassAnalysis(method)
+            analysis.classes[class_def.get_name()] = class_analysis
+
+    @classmethod
+    def _add_external_classes(cls, analysis: Analysis, dalvik_vm_format: DalvikVMFormat):
+        for type_descriptor in cls._iterate_type_descriptors(dalvik_vm_format):
+            # Primitives are not classes
+            if len(type_descriptor) > 1 and type_descriptor not in analysis.classes:
+                analysis.classes[type_descriptor] = ClassAnalysis(ExternalClass(type_descriptor))
+
+    @staticmethod
+    def _iterate_type_descriptors(dalvik_vm_format: DalvikVMFormat) -> Iterator[str]:
+        type_ids = dalvik_vm_format.map_list.get_item_type('TYPE_TYPE_ID_ITEM')
+        if type_ids is None:
+            return
+        for type_index in range(len(type_ids.get_type())):
+            yield dalvik_vm_format.get_cm_type(type_index)
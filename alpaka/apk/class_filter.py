@@ -0,0 +1,168 @@
+import json
+import re
+from dataclasses import dataclass, field, fields
+from typing import Any, List, Optional, Pattern
+
+from androguard.core.analysis.analysis import ClassAnalysis
+
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.utils import PrefixTrie
+
+
+@dataclass
+class ClassFilterSpec:
+
+    """
+    A declarative class filter.
+
+    A class is accepted when it matches any of the include prefixes and regexes (or there are none of them),
+    it matches none of the exclude prefixes and regexes, it is not excluded for being external or primitive,
+    and its instructions count is within the bounds.
+    Regexes are searched anywhere in the class name, anchor them with ^ and $ to match the whole name.
+    """
+
+    include_prefixes: List[str] = field(default_factory=list)
+    exclude_prefixes: List[str] = field(default_factory=list)
+    include_regexes: List[str] = field(default_factory=list)
+    exclude_regexes: List[str] = field(default_factory=list)
+    exclude_external: bool = False
+    exclude_primitives: bool = False
+    minimum_instructions: Optional[int] = None
+    maximum_instructions: Optional[int] = None
+
+    # Type descriptors of primitives and arrays of primitives, like 'I' and '[[B'
+    PRIMITIVE_REGEX = r'^\[*[VZBSCIJFD]$'
+    # The flags of a regex without inline global flags like (?i)
+    DEFAULT_REGEX_FLAGS = re.compile('').flags
+
+    @classmethod
+    def from_dict(cls, spec_dict: dict) -> 'ClassFilterSpec':
+        field_types = {spec_field.name: spec_field.type for spec_field in fields(cls)}
+        unknown_keys = set(spec_dict) - set(field_types)
+        if unknown_keys:
+            raise ValueError(f"Unknown class filter spec keys: {', '.join(sorted(unknown_keys))}")
+        for key, value in spec_dict.items():
+            cls._check_value_type(key, field_types[key], value)
+        return cls(**spec_dict)
+
+    @staticmethod
+    def _check_value_type(key: str, field_type: Any, value: Any):
+        if field_type == List[str]:
+            is_valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+            expected = 'a list of strings'
+        elif field_type == bool:
+            is_valid = isinstance(value, bool)
+            expected = 'a boolean'
+        else:
+            # bool is a subclass of int, but true is not an instructions count
+            is_valid = value is None or (isinstance(value, int) and not isinstance(value, bool))
+            expected = 'an integer or null'
+        if not is_valid:
+            raise ValueError(f"Class filter spec key {key} must be {expected}, got {value!r}")
+
+    @classmethod
+    def load(cls, spec_file_path: str) -> 'ClassFilterSpec':
+        """
+        Load a spec from a json file, an object with the fields of the spec as keys.
+        """
+        with open(spec_file_path, 'r') as spec_file:
+            return cls.from_dict(json.load(spec_file))
+
+    def compile(self) -> 'CompiledClassFilter':
+        include_regexes = list(self.include_regexes)
+        if self.include_prefixes:
+            include_regexes.insert(0, self._compile_prefixes(self.include_prefixes))
+        exclude_regexes = list(self.exclude_regexes)
+        if self.exclude_prefixes:
+            exclude_regexes.insert(0, self._compile_prefixes(self.exclude_prefixes))
+        if self.exclude_primitives:
+            exclude_regexes.append(self.PRIMITIVE_REGEX)
+        return CompiledClassFilter(
+            self._compile_regexes(include_regexes),
+            self._compile_regexes(exclude_regexes),
+            self.exclude_external,
+            self.minimum_instructions,
+            self.maximum_instructions,
+        )
+
+    @staticmethod
+    def _compile_prefixes(prefixes: List[str]) -> str:
+        """
+        :return: a regex of the prefix trie of the prefixes, anchored to the start of the class name
+        """
+        return f'^{PrefixTrie(prefixes).to_regex()}'
+
+    @classmethod
+    def _compile_regexes(cls, regexes: List[str]) -> List[Pattern]:
+        """
+        Compile each regex on its own, and combine the ones without capturing groups and inline global flags
+        to a single regex. Combining the others would renumber their groups, breaking their backreferences,
+        or fail on their inline global flags, so they are searched separately.
+
+        :return: the regexes to search, any of them matches wherever any of the given regexes matches
+        """
+        combined_regexes = []
+        separate_patterns = []
+        for regex in regexes:
+            try:
+                pattern = re.compile(regex)
+            except re.error as e:
+                raise ValueError(f"Invalid class filter regex {regex!r}: {e}") from e
+            if pattern.groups == 0 and pattern.flags == cls.DEFAULT_REGEX_FLAGS:
+                combined_regexes.append(regex)
+            else:
+                separate_patterns.append(pattern)
+        if len(combined_regexes) > 1:
+            return [re.compile('|'.join(f'(?:{regex})' for regex in combined_regexes))] + separate_patterns
+        return [re.compile(regex) for regex in combined_regexes] + separate_patterns
+
+
+class CompiledClassFilter:
+
+    """
+    A class filter compiled from a ClassFilterSpec.
+    The prefixes are compiled into prefix tries, which are matched as regexes along with the regexes of the spec,
+    so including and excluding a class by its name takes a single regex search each,
+    unless the spec has regexes that can not be combined with the others.
+    The instructions are only counted for the classes that pass all of the other checks.
+    """
+
+    def __init__(
+            self,
+            include_regexes: List[Pattern],
+            exclude_regexes: List[Pattern],
+            exclude_external: bool,
+            minimum_instructions: Optional[int],
+            maximum_instructions: Optional[int],
+    ):
+        """
+        :param include_regexes: any of them matches the included classes, all of the classes are included if empty
+        :param exclude_regexes: any of them matches the excluded classes
+        """
+        self._include_regexes = include_regexes
+        self._exclude_regexes = exclude_regexes
+        self._exclude_external = exclude_external
+        self._minimum_instructions = minimum_instructions
+        self._maximum_instructions = maximum_instructions
+
+    def __call__(self, class_name: str, class_analysis: ClassAnalysis) -> bool:
+        if self._include_regexes:
+            for include_regex in self._include_regexes:
+                if include_regex.search(class_name) is not None:
+                    break
+            else:
+                return False
+        for exclude_regex in self._exclude_regexes:
+            if exclude_regex.search(class_name) is not None:
+                return False
+        if self._exclude_external and class_analysis.is_external():
+            return False
+        if self._minimum_instructions is not None or self._maximum_instructions is not None:
+            # External classes have no instructions, the signatures count the instructions of internal classes only
+            instructions_count = 0 if class_analysis.is_external() \
+                else ClassSignatureCalculator.get_instructions_count(class_analysis)
+            if self._minimum_instructions is not None and instructions_count < self._minimum_instructions:
+                return False
+            if self._maximum_instructions is not None and instructions_count > self._maximum_instructions:
+                return False
+        return True
@@ -4,20 +4,43 @@ from androguard.core.analysis.analysis import ClassAnalysis
 
 from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
 from alpaka.class_signature.signature import ClassSignature
+from alpaka.class_signature.signature_cache import SignatureCache
+from alpaka.class_signature.signature_table import SignatureTable
 from alpaka.utils import get_domain_name
 
 
 class ClassInfo:
+    __slots__ = (
+        'analysis', 'is_obfuscated_name', '_signature', '_signature_calculator', '_signature_cache',
+        '_signature_table', '_signature_row',
+    )
+
     analysis: ClassAnalysis
     is_obfuscated_name: bool
     _signature: Optional[ClassSignature]
     _signature_calculator: ClassSignatureCalculator
+    _signature_cache: Optional[SignatureCache]
+    _signature_table: Optional[SignatureTable]
+    _signature_row: Optional[int]
 
-    def __init__(self, class_analysis: ClassAnalysis, is_name_obfuscated: bool, signature_calculator: ClassSignatureCalculator):
+    def __init__(
+            self,
+            class_analysis: ClassAnalysis,
+            is_name_obfuscated: bool,
+            signature_calculator: ClassSignatureCalculator,
+            signature_cache: Optional[SignatureCache] = None,
+            signature_table: Optional[SignatureTable] = None,
+    ):
+        """
+        :param signature_table: when given, the signature is stored in a row of the table instead of in the instance
+        """
         self.analysis = class_analysis
         self.is_obfuscated_name = is_name_obfuscated
         self._signature = None
         self._signature_calculator = signature_calculator
+        self._signature_cache = signature_cache
+        self._signature_table = signature_table
+        self._signature_row = None if signature_table is None else signature_table.add_row()
 
     @staticmethod
     def get_class_name(class_name_prefix) -> str:
@@ -33,5 +56,21 @@ class ClassInfo:
     @property
     def signature(self):
         if not self._signature:
-            self._signature = self._signature_calculator.calculate_class_signature(self.analysis)
+            if self._signature_cache is None:
+                signature = self._signature_calculator.calculate_class_signature(self.analysis)
+            else:
+                signature = self._signature_cache.get_signature(self.analysis, self._signature_calculator)
+            self.set_signature(signature)
         return self._signature
+
+    @property
+    def has_signature(self) -> bool:
+        return bool(self._signature)
+
+    def set_signature(self, signature: ClassSignature):
+        """
+        Set a signature calculated along with the signatures of other classes, instead of on the first access.
+        """
+        if self._signature_table is not None:
+            signature = self._signature_table.fill(self._signature_row, signature)
+        self._signature = signature
@@ -1,5 +1,6 @@
+import sys
 from collections import defaultdict
-from typing import Dict
+from typing import Callable, Dict, Iterable, Optional, Set
 
 from androguard.core.analysis.analysis import ClassAnalysis
 
@@ -8,50 +9,110 @@ from alpaka.apk.class_info import ClassInfo
 from alpaka.apk.package_info import PackageInfo, PackagePool
 from alpaka.apk.class_pool import ClassPool
 from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.signature_cache import SignatureCache
+from alpaka.class_signature.signature_table import SignatureTable
+from alpaka.exceptions import ClassFilterError
 from alpaka.obfuscation_detection.base import ObfuscationDetector
 from alpaka.utils import DictFilterMixin
 
+# Accepts a class by its name and androguard's analysis of it
+ClassFilter = Callable[[str, ClassAnalysis], bool]
+
 
 class GlobalClassPool(DictFilterMixin, Dict[str, ClassInfo], ClassPool):
     """
     A class pool containing all of the classes relevant to the comparison from a single apk
+
+    With compact_signatures, the signatures of the classes are stored in the pool's signature_table
+    rather than in a ClassSignature per class, which saves memory on large apks
+    at the cost of slower access to the signature fields.
+    The class names are interned so both pools of a diff share them.
     """
 
+    # Bounds the memory of the instructions held while calculating a batch of signatures
+    SIGNATURE_BATCH_CLASSES = 4096
+
     def __init__(
             self,
             analyzed_apk: AnalyzedApk,
             obfuscation_detector: ObfuscationDetector,
-            signature_calculator: ClassSignatureCalculator
+            signature_calculator: ClassSignatureCalculator,
+            signature_cache: Optional[SignatureCache] = None,
+            compact_signatures: bool = False,
+            filters: Iterable[ClassFilter] = (),
     ):
+        """
+        :param filters: the pool only contains the classes that all of the filters accept.
+        The filters are called before the ClassInfos are created, so the excluded classes never get a ClassInfo
+        or an obfuscation check.
+        """
         self._obfuscation_detector: ObfuscationDetector = obfuscation_detector
         self._signature_calculator = signature_calculator
+        self._signature_cache = signature_cache
+        self.signature_table: Optional[SignatureTable] = SignatureTable() if compact_signatures else None
+        filters = list(filters)
+        class_analyses = []
+        self.excluded_class_names: Set[str] = set()
+        for class_analysis in analyzed_apk.analysis.classes.values():
+            if class_analysis.is_external():
+                continue
+            class_name = class_analysis.name
+            try:
+                is_accepted = all(filter_func(class_name, class_analysis) for filter_func in filters)
+            except AttributeError as e:
+                # Filters used to receive the ClassInfo of the class
+                raise ClassFilterError(
+                    f"A class filter failed on {class_name}, class filters are called with the class name and "
+                    f"androguard's ClassAnalysis of the class, not with its ClassInfo"
+                ) from e
+            if is_accepted:
+                class_analyses.append(class_analysis)
+            else:
+                self.excluded_class_names.add(class_name)
+        # The names of all of the classes are classified at once
+        is_obfuscated_names = obfuscation_detector.classify_classes(
+            class_analysis.name for class_analysis in class_analyses
+        )
         super(GlobalClassPool, self).__init__({
-            class_name: self._create_class_info(class_analysis)
-            for class_name, class_analysis in analyzed_apk.analysis.classes.items()
-            if not class_analysis.is_external()
+            sys.intern(class_analysis.name): self._create_class_info(class_analysis, bool(is_obfuscated_name))
+            for class_analysis, is_obfuscated_name in zip(class_analyses, is_obfuscated_names)
         })
 
+    def calculate_signatures(self):
+        """
+        Calculate the signatures of the classes that were not calculated yet, a batch of classes at a time,
+        which is faster than calculating each signature on its first access.
+        """
+        class_infos = [class_info for class_info in self.values() if not class_info.has_signature]
+        for batch_start in range(0, len(class_infos), self.SIGNATURE_BATCH_CLASSES):
+            batch_class_infos = class_infos[batch_start:batch_start + self.SIGNATURE_BATCH_CLASSES]
+            class_analyses = [class_info.analysis for class_info in batch_class_infos]
+            if self._signature_cache is None:
+                signatures = self._signature_calculator.calculate_class_signatures(class_analyses)
+            else:
+                signatures = self._signature_cache.get_signatures(class_analyses, self._signature_calculator)
+            for class_info, signature in zip(batch_class_infos, signatures):
+                class_info.set_signature(signature)
+
     def split_by_package(self) -> PackagePool:
-        packages_dict = dict()
+        classes_per_package = defaultdict(list)
         for class_name, class_info in self.items():
-            package_name_prefix = PackageInfo.get_parent_package_name_prefix(class_name)
-            if package_name_prefix not in packages_dict:
-                packages_dict[package_name_prefix] = self._create_package_info(package_name_prefix)
-            packages_dict[package_name_prefix].add_class(class_info)
+            classes_per_package[PackageInfo.get_parent_package_name_prefix(class_name)].append(class_info)
+        # The names of all of the packages are classified at once
+        is_obfuscated_names = self._obfuscation_detector.classify_packages(classes_per_package)
+        packages_dict = dict()
+        for package_name_prefix, is_obfuscated_name in zip(classes_per_package, is_obfuscated_names):
+            package_info = self._create_package_info(package_name_prefix, bool(is_obfuscated_name))
+            for class_info in classes_per_package[package_name_prefix]:
+                package_info.add_class(class_info)
+            packages_dict[package_name_prefix] = package_info
         return packages_dict
 
-    def _create_package_info(self, package_name_prefix) -> PackageInfo:
-        """
-        Initializes a PackageInfo instance,
-        Using the instance's package name obfuscation detector to determine if the name is obfuscated
-        """
-        is_obfuscated_name = self._obfuscation_detector.is_package_name_obfuscated(package_name_prefix)
+    @staticmethod
+    def _create_package_info(package_name_prefix: str, is_obfuscated_name: bool) -> PackageInfo:
         return PackageInfo(package_name_prefix, is_obfuscated_name)
 
-    def _create_class_info(self, class_analysis: ClassAnalysis) -> ClassInfo:
-        """
-        Initializes a ClassInfo instance,
-        Using the instance's class name obfuscation detector to determine if the name is obfuscated
-        """
-        is_obfuscated_name = self._obfuscation_detector.is_class_name_obfuscated(class_analysis.name)
-        return ClassInfo(class_analysis, is_obfuscated_name, self._signature_calculator)
+    def _create_class_info(self, class_analysis: ClassAnalysis, is_obfuscated_name: bool) -> ClassInfo:
+        return ClassInfo(
+            class_analysis, is_obfuscated_name, self._signature_calculator, self._signature_cache, self.signature_table
+        )
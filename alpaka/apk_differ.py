@@ -1,13 +1,20 @@
-from typing import Callable, Iterable, Optional, ChainMap, Mapping
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, ChainMap, Mapping, Tuple, Type
 
 from alpaka.apk.analyzed_apk import AnalyzedApk
-from alpaka.apk.global_class_pool import GlobalClassPool
+from alpaka.apk.class_info import ClassInfo
+from alpaka.apk.global_class_pool import ClassFilter, GlobalClassPool
 from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
 from alpaka.class_signature.distance import WeightedSignatureDistanceCalculator
+from alpaka.class_signature.signature_cache import SignatureCache
 from alpaka.config import DEFAULT_WEIGHTS
+from alpaka.matching.base import Match
 from alpaka.matching.class_matcher import ClassMatcher
+from alpaka.matching.parallel import ParallelClassMatcher
+from alpaka.matching.rare_string_matcher import RareStringLiteralMatcher
 from alpaka.matching.package_matcher import NameBasedPackageMatcher
 from alpaka.obfuscation_detection.base import ObfuscationDetector
+from alpaka.obfuscation_detection.verdict_table import ObfuscationVerdictTable
 
 
 class ApkDiffer:
@@ -18,43 +25,155 @@ class ApkDiffer:
     def __init__(
             self,
             obfuscation_detector: ObfuscationDetector,
-            filters: Optional[Iterable[Callable]] = None,
-            distance_calculation_weights: Optional[Mapping[str, float]] = None
+            filters: Optional[Iterable[ClassFilter]] = None,
+            distance_calculation_weights: Optional[Mapping[str, float]] = None,
+            class_matcher_type: Type[ClassMatcher] = ClassMatcher,
+            jobs: int = 1,
+            signature_cache: Optional[SignatureCache] = None,
+            compact_signatures: bool = False,
+            match_identical_signatures: bool = False,
+            match_rare_string_literals: bool = False,
+            compatible_simhashes: bool = True,
     ):
+        """
+        :param filters: the classes matched are the ones all of the filters accept, see GlobalClassPool
+        :param jobs: number of worker processes used for matching the classes. 1 matches in the current process.
+        :param signature_cache: a persistent cache of class signatures, flushed at the end of every diff
+        :param compact_signatures: store the signatures of each class pool in a SignatureTable, to save memory
+        :param match_identical_signatures: match the classes with a unique identical signature in the other apk
+        before searching for the closest signatures
+        :param match_rare_string_literals: before matching the packages, match the classes of both apks sharing rare
+        string literals, see RareStringLiteralMatcher
+        :param compatible_simhashes: calculate the instruction shingles simhashes identically to the ones that the
+        default weights and the signatures cached before were made with. Otherwise they are calculated faster.
+        """
+        if jobs < 1:
+            raise ValueError(f"Jobs count must be positive, got {jobs}")
         if distance_calculation_weights is None:
             distance_calculation_weights = DEFAULT_WEIGHTS
         self._signature_distance_calculator = WeightedSignatureDistanceCalculator.from_weights_json(
             distance_calculation_weights
         )
-        self._signature_calculator = ClassSignatureCalculator(obfuscation_detector)
-        self._obfuscation_detector = obfuscation_detector
+        # The type descriptors of the apks are classified up front, and the verdicts are read from the table
+        self._obfuscation_verdicts = ObfuscationVerdictTable(obfuscation_detector)
+        self._signature_calculator = ClassSignatureCalculator(self._obfuscation_verdicts, compatible_simhashes)
+        self._class_matcher_type = class_matcher_type
+        self._jobs = jobs
+        self._signature_cache = signature_cache
+        self._compact_signatures = compact_signatures
+        self._match_identical_signatures = match_identical_signatures
+        self._match_rare_string_literals = match_rare_string_literals
+        self.statistics = Counter()
         self._filters = filters
         if filters is None:
             self._filters = []
 
     def diff(self, apk1: AnalyzedApk, apk2: AnalyzedApk, match_packages: bool = True, match_by_name: bool = True):
-        class_pool1 = GlobalClassPool(apk1, self._obfuscation_detector, self._signature_calculator)
-        class_pool2 = GlobalClassPool(apk2, self._obfuscation_detector, self._signature_calculator)
-        for filter_func in self._filters:
-            class_pool1.filter(filter_func)
-            class_pool2.filter(filter_func)
-        class_matcher = ClassMatcher(signature_distance_calculator=self._signature_distance_calculator)
+        return dict(self.iter_matches(apk1, apk2, match_packages, match_by_name))
+
+    def iter_matches(
+            self,
+            apk1: AnalyzedApk,
+            apk2: AnalyzedApk,
+            match_packages: bool = True,
+            match_by_name: bool = True,
+    ) -> Iterator[Tuple[str, List[Match[ClassInfo]]]]:
+        """
+        Like diff, but yields the (class name, matches) pairs as soon as the classes of each package pair are matched,
+        instead of holding all of the matches in memory.
+        The statistics are updated once all of the matches are yielded.
+        """
+        try:
+            yield from self._iter_matches(apk1, apk2, match_packages, match_by_name)
+        finally:
+            # The index holds the analyses of the apks, it is only kept for the current diff
+            self._signature_calculator.string_literal_index.clear()
+
+    def _iter_matches(
+            self,
+            apk1: AnalyzedApk,
+            apk2: AnalyzedApk,
+            match_packages: bool,
+            match_by_name: bool,
+    ) -> Iterator[Tuple[str, List[Match[ClassInfo]]]]:
+        class_pool1 = GlobalClassPool(
+            apk1, self._obfuscation_verdicts, self._signature_calculator, self._signature_cache,
+            self._compact_signatures, self._filters,
+        )
+        class_pool2 = GlobalClassPool(
+            apk2, self._obfuscation_verdicts, self._signature_calculator, self._signature_cache,
+            self._compact_signatures, self._filters,
+        )
+        # The classes excluded by the filters are only classified if the remaining classes refer to them
+        excluded_class_names = class_pool1.excluded_class_names | class_pool2.excluded_class_names
+        for apk in (apk1, apk2):
+            self._obfuscation_verdicts.add_class_names(
+                type_descriptor for type_descriptor in apk.get_type_descriptors()
+                if type_descriptor not in excluded_class_names
+            )
+        class_pool1.calculate_signatures()
+        class_pool2.calculate_signatures()
+        if self._match_rare_string_literals:
+            yield from self._match_by_rare_string_literals(
+                class_pool1, class_pool2, match_by_name or not match_packages
+            ).items()
+        class_matcher = self._class_matcher_type(
+            signature_distance_calculator=self._signature_distance_calculator,
+            match_identical_signatures=self._match_identical_signatures,
+        )
         if not match_packages:
-            return class_matcher.match(class_pool1, class_pool2).matches
-        package_match_results = self._get_package_match_results(class_pool1, class_pool2)
-        return self._get_class_matches_from_package_matches(class_matcher, match_by_name, package_match_results)
+            pool_pairs = [(class_pool1, class_pool2, True)]
+        else:
+            package_match_results = self._get_package_match_results(class_pool1, class_pool2)
+            pool_pairs = self._get_pool_pairs_from_package_matches(match_by_name, package_match_results)
+        yield from self._iter_pool_pairs_matches(class_matcher, pool_pairs)
+        self.statistics.update(class_matcher.statistics)
+        if self._signature_cache is not None:
+            self._signature_cache.flush()
+            self.statistics.update(self._signature_cache.statistics)
+            self._signature_cache.statistics.clear()
+
+    def _match_by_rare_string_literals(
+            self,
+            class_pool1: GlobalClassPool,
+            class_pool2: GlobalClassPool,
+            match_by_name: bool,
+    ) -> Dict[str, List[Match[ClassInfo]]]:
+        """
+        Match the classes sharing rare string literals, and remove the matched classes from the pools.
+        """
+        rare_string_matcher = RareStringLiteralMatcher(
+            self._signature_distance_calculator, self._signature_calculator.string_literal_index
+        )
+        matching_result = rare_string_matcher.match(class_pool1, class_pool2, match_by_name)
+        for class_name, (class_match,) in matching_result.matches.items():
+            del class_pool1[class_name]
+            del class_pool2[class_match.item2.analysis.name]
+        self.statistics.update(rare_string_matcher.statistics)
+        return matching_result.matches
+
+    def _iter_pool_pairs_matches(self, class_matcher, pool_pairs):
+        if self._jobs > 1:
+            yield from ParallelClassMatcher(class_matcher, self._jobs).iter_matches(pool_pairs)
+            return
+        for pool1, pool2, match_by_name in pool_pairs:
+            class_match_results = class_matcher.match(pool1, pool2, match_by_name)
+            yield from class_match_results.matches.items()
 
     @classmethod
-    def _get_class_matches_from_package_matches(cls, class_matcher, match_by_name, package_match_results):
-        class_matches = dict()
-        for package_match in package_match_results.best_matches():
-            class_match_results = class_matcher.match(package_match.item1, package_match.item2, match_by_name)
-            class_matches.update(class_match_results.matches)
+    def _get_pool_pairs_from_package_matches(cls, match_by_name, package_match_results):
+        """
+        :return: a (pool1, pool2, match_by_name) tuple for each of the matched packages,
+        followed by one for the remaining classes of the unmatched packages
+        """
+        pool_pairs = [
+            (package_match.item1, package_match.item2, match_by_name)
+            for package_match in package_match_results.best_matches()
+        ]
         remaining_classes1 = ChainMap(*package_match_results.unmatched[0].values())
         remaining_classes2 = ChainMap(*package_match_results.unmatched[1].values())
-        class_match_results = class_matcher.match(remaining_classes1, remaining_classes2, False)
-        class_matches.update(class_match_results.matches)
-        return class_matches
+        pool_pairs.append((remaining_classes1, remaining_classes2, False))
+        return pool_pairs
 
     @classmethod
     def _get_package_match_results(cls, class_pool1, class_pool2):
@@ -1,17 +1,50 @@
+import hashlib
 import re
-from typing import Generator, List
+from typing import Generator, Iterable, List, Optional, Tuple
 
+import numpy as np
 from androguard.core.analysis.analysis import ClassAnalysis
 from androguard.core.bytecodes.dvm import Instruction
 
+from alpaka.class_signature.opcode_simhash import OpcodeSimhashCalculator, calculate_simhashes_of_hashes
 from alpaka.class_signature.signature import ClassSignature
-from alpaka.class_signature.simhash_utils import calculate_simhash, calculate_shingle_simhash
+from alpaka.class_signature.simhash_utils import calculate_simhash, calculate_shingle_simhash, \
+    calculate_simhash_of_hashes, hash_token
 from alpaka.class_signature.string_extractor import StringLiteralsExtractor
+from alpaka.class_signature.string_literal_index import StringLiteralIndex
 from alpaka.obfuscation_detection.base import ObfuscationDetector
 
 
+class _CodeFeaturesAccumulator:
+    """
+    Accumulates the instruction based signature fields of a class while its instructions are visited once.
+    """
+
+    def __init__(self, opcode_simhash_calculator: OpcodeSimhashCalculator):
+        self._opcode_simhash_calculator = opcode_simhash_calculator
+        self.opcode_ids = []
+        self.string_ids = []
+
+    def add_instruction(self, instruction: Instruction):
+        self.opcode_ids.append(self._opcode_simhash_calculator.get_opcode_id(instruction))
+        string_id = StringLiteralsExtractor.get_string_id(instruction)
+        if string_id is not None:
+            self.string_ids.append(string_id)
+
+    @property
+    def instructions_count(self) -> int:
+        return len(self.opcode_ids)
+
+    @property
+    def string_literals_count(self) -> int:
+        return len(self.string_ids)
+
+
 class ClassSignatureCalculator:
 
+    # Bump whenever the calculation of the signature changes, to invalidate persisted signatures
+    VERSION = 1
+
     TYPE_DESCRIPTOR_REGEX = re.compile(
         r'\[*'  # '[' char(s) before type indicate array
         r'(?:'
@@ -21,14 +54,98 @@ class ClassSignatureCalculator:
         r')'
     )
 
-    def __init__(self, obfuscation_detector: ObfuscationDetector):
+    def __init__(
+            self,
+            obfuscation_detector: ObfuscationDetector,
+            compatible_simhashes: bool = True,
+            string_literal_index: Optional[StringLiteralIndex] = None,
+    ):
+        """
+        :param compatible_simhashes: hash the instruction shingles as the strings of their instruction names,
+        so the signatures are identical to the ones that the existing weight files and persisted signatures
+        were made with. Otherwise the shingles are hashed without strings, which is faster.
+        :param string_literal_index: the index to read the string literals of the classes from,
+        and to add the classes whose instructions the calculator scans to. A new index by default.
+        """
         self._obfuscation_detector = obfuscation_detector
+        self._opcode_simhash_calculator = OpcodeSimhashCalculator(compatible_simhashes)
+        self.string_literal_index = StringLiteralIndex() if string_literal_index is None else string_literal_index
 
     def calculate_class_signature(self, class_analysis: ClassAnalysis) -> ClassSignature:
+        """
+        Calculate the signature visiting each method and each instruction of the class once.
+        With compatible simhashes, the result is identical to calculate_class_signature_per_field.
+        """
+        code_features = self._extract_code_features(class_analysis)
+        instructions_simhash, instruction_shingles_simhash = self._opcode_simhash_calculator.calculate_simhashes(
+            code_features.opcode_ids
+        )
+        return self._create_class_signature(
+            class_analysis,
+            code_features,
+            instructions_simhash,
+            instruction_shingles_simhash,
+            calculate_simhash_of_hashes(self.string_literal_index.get_string_literal_hashes(class_analysis)),
+        )
+
+    def calculate_class_signatures(self, class_analyses: Iterable[ClassAnalysis]) -> List[ClassSignature]:
+        """
+        Like calculate_class_signature for many classes, calculating the simhashes of the instructions
+        and the string literals of all of the classes at once.
+        """
+        class_analyses = list(class_analyses)
+        classes_code_features = [self._extract_code_features(class_analysis) for class_analysis in class_analyses]
+        code_simhashes = self._opcode_simhash_calculator.calculate_many_simhashes([
+            np.array(code_features.opcode_ids, dtype=np.int64) for code_features in classes_code_features
+        ])
+        string_literals_simhashes = calculate_simhashes_of_hashes([
+            np.array(self.string_literal_index.get_string_literal_hashes(class_analysis), dtype=np.uint64)
+            for class_analysis in class_analyses
+        ])
+        return [
+            self._create_class_signature(
+                class_analysis, code_features, instructions_simhash, instruction_shingles_simhash,
+                string_literals_simhash,
+            )
+            for class_analysis, code_features, (instructions_simhash, instruction_shingles_simhash),
+            string_literals_simhash in zip(
+                class_analyses, classes_code_features, code_simhashes, string_literals_simhashes
+            )
+        ]
+
+    def _create_class_signature(
+            self,
+            class_analysis: ClassAnalysis,
+            code_features: _CodeFeaturesAccumulator,
+            instructions_simhash: int,
+            instruction_shingles_simhash: int,
+            string_literals_simhash: int,
+    ) -> ClassSignature:
+        methods_params_simhash, methods_returns_simhash = self._calc_methods_descriptors_simhashes(class_analysis)
+        return ClassSignature(
+            member_count=self._get_member_count(class_analysis),
+            method_count=self._get_method_count(class_analysis),
+            instructions_count=code_features.instructions_count,
+            members_simhash=self._calc_members_simhash(class_analysis),
+            methods_params_simhash=methods_params_simhash,
+            methods_returns_simhash=methods_returns_simhash,
+            instructions_simhash=instructions_simhash,
+            instruction_shingles_simhash=instruction_shingles_simhash,
+            implemented_interfaces_count=self._get_implemented_interfaces_count(class_analysis),
+            implemented_interfaces_simhash=self._calc_implemented_interfaces_simhash(class_analysis),
+            superclass_hash=self._calc_superclass_hash(class_analysis),
+            string_literals_count=code_features.string_literals_count,
+            string_literals_simhash=string_literals_simhash,
+        )
+
+    def calculate_class_signature_per_field(self, class_analysis: ClassAnalysis) -> ClassSignature:
+        """
+        Calculate the signature computing every field on its own, iterating the instructions once for each field.
+        """
         return ClassSignature(
             member_count=self._get_member_count(class_analysis),
             method_count=self._get_method_count(class_analysis),
-            instructions_count=self._get_instructions_count(class_analysis),
+            instructions_count=self.get_instructions_count(class_analysis),
             members_simhash=self._calc_members_simhash(class_analysis),
             methods_params_simhash=self._calc_methods_params_simhash(class_analysis),
             methods_returns_simhash=self._calc_methods_returns_simhash(class_analysis),
@@ -41,6 +158,75 @@ class ClassSignatureCalculator:
             string_literals_simhash=self._get_string_literals_simhash(class_analysis),
         )
 
+    def calculate_content_key(self, class_analysis: ClassAnalysis) -> str:
+        """
+        Calculate a stable hash of everything the signature of the class is calculated from:
+        the calculator version, the obfuscation detector, the type descriptors and their obfuscation verdicts,
+        the raw bytecode of the methods and the string literals they load.
+        Classes with equal keys have equal signatures, in any process.
+        """
+        try:
+            members = class_analysis.orig_class.class_data_item.get_fields()
+        except AttributeError:
+            members = []
+        method_descriptors = [method.descriptor for method in class_analysis.get_methods()]
+        content = (
+            # Compatible simhashes keep the keys of the signatures persisted before they could be turned off
+            self.VERSION if self._opcode_simhash_calculator.compatible else (self.VERSION, 'opcode-shingles'),
+            self._obfuscation_detector.identity,
+            self._get_member_count(class_analysis),
+            self._get_method_count(class_analysis),
+            self._get_obfuscation_verdicts(member.get_class_name() for member in members),
+            method_descriptors,
+            [
+                (
+                    self._get_obfuscation_verdicts(self._get_param_types_from_method_descriptor(method_descriptor)),
+                    self._get_obfuscation_verdicts((self._get_return_type_from_method_descriptor(method_descriptor),)),
+                )
+                for method_descriptor in method_descriptors
+            ],
+            [
+                None if method.get_code() is None else method.get_code().get_bc().get_insn()
+                for method in class_analysis.get_vm_class().get_methods()
+            ],
+            self.string_literal_index.get_string_literals(class_analysis),
+            self._get_obfuscation_verdicts(class_analysis.implements),
+            self._get_obfuscation_verdicts((class_analysis.extends,)),
+        )
+        return hashlib.sha256(repr(content).encode('utf-8')).hexdigest()
+
+    def _get_obfuscation_verdicts(self, class_names: Iterable[str]) -> List[Tuple[str, bool]]:
+        return [
+            (class_name, self._obfuscation_detector.is_class_name_obfuscated(class_name))
+            for class_name in class_names
+        ]
+
+    def _extract_code_features(self, class_analysis: ClassAnalysis) -> _CodeFeaturesAccumulator:
+        code_features = _CodeFeaturesAccumulator(self._opcode_simhash_calculator)
+        for instruction in self.iterate_class_instruction(class_analysis):
+            code_features.add_instruction(instruction)
+        # Indexed from this scan, so the bytecode of the class is not scanned again for its string literals
+        self.string_literal_index.add_class(class_analysis, code_features.string_ids)
+        return code_features
+
+    def _calc_methods_descriptors_simhashes(self, class_analysis: ClassAnalysis) -> Tuple[int, int]:
+        """
+        :return: the methods params simhash and the methods returns simhash
+        """
+        param_types = []
+        return_types = []
+        for method in class_analysis.get_methods():
+            method_descriptor = method.descriptor
+            param_types.extend(
+                param_type
+                for param_type in self._get_param_types_from_method_descriptor(method_descriptor)
+                if not self._obfuscation_detector.is_class_name_obfuscated(param_type)
+            )
+            return_type = self._get_return_type_from_method_descriptor(method_descriptor)
+            if not self._obfuscation_detector.is_class_name_obfuscated(return_type):
+                return_types.append(return_type)
+        return calculate_simhash(param_types), calculate_simhash(return_types)
+
     @classmethod
     def _get_member_count(cls, class_analysis: ClassAnalysis) -> int:
         try:
@@ -59,7 +245,10 @@ class ClassSignatureCalculator:
         return class_analysis.get_nb_methods()
 
     @classmethod
-    def _get_instructions_count(cls, class_analysis: ClassAnalysis):
+    def get_instructions_count(cls, class_analysis: ClassAnalysis) -> int:
+        """
+        The instructions count of the signature of an internal class.
+        """
         return sum((1 for _instruction in cls.iterate_class_instruction(class_analysis)))
 
     def _calc_members_simhash(self, class_analysis: ClassAnalysis) -> int:
@@ -70,7 +259,7 @@ class ClassSignatureCalculator:
         return calculate_simhash((
             type_descriptor for member in members
             if not self._obfuscation_detector.is_class_name_obfuscated(
-                type_descriptor := member.class_name
+                type_descriptor := member.get_class_name()
             )
         ))
 
@@ -129,14 +318,11 @@ class ClassSignatureCalculator:
     def _calc_superclass_hash(self, class_analysis) -> int:
         if self._obfuscation_detector.is_class_name_obfuscated(class_analysis.extends):
             return 0
-        return hash(class_analysis.extends)
+        # Unlike hash(), stable across processes, so the signatures can be persisted
+        return hash_token(class_analysis.extends)
 
-    @classmethod
-    def _get_string_literals_count(cls, class_analysis):
-        return len(list(StringLiteralsExtractor.extract_strings(class_analysis)))
+    def _get_string_literals_count(self, class_analysis):
+        return len(self.string_literal_index.get_string_ids(class_analysis))
 
-    @classmethod
-    def _get_string_literals_simhash(cls, class_analysis):
-        return calculate_simhash(
-            StringLiteralsExtractor.extract_strings(class_analysis)
-        )
+    def _get_string_literals_simhash(self, class_analysis):
+        return calculate_simhash_of_hashes(self.string_literal_index.get_string_literal_hashes(class_analysis))
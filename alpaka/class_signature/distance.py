@@ -1,3 +1,4 @@
+import math
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
 
@@ -7,6 +8,18 @@ from alpaka.class_signature.signature import ClassSignature
 from alpaka.class_signature.simhash_utils import calculate_distance
 
 
+# Slack for floating point rounding errors, since bounds are summed in a different order than distance's
+RELATIVE_TOLERANCE = 1e-9
+
+
+def widen_bound(bound: float) -> float:
+    """
+    :return: the bound with slack for floating point rounding errors, so a distance summed in a different order
+    than the bound is never beyond it when the two are equal
+    """
+    return bound + RELATIVE_TOLERANCE * (1.0 + bound)
+
+
 class SignatureDistanceCalculator(metaclass=ABCMeta):
 
     @abstractmethod
@@ -18,6 +31,16 @@ class SignatureDistanceCalculator(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    def bounded_distance(self, sig1: ClassSignature, sig2: ClassSignature, bound: float) -> float:
+        """
+        Like distance, but may stop early once the distance is known to be greater than bound.
+
+        :return: the distance between the signatures, or math.inf if it is greater than bound
+        """
+        distance = self.distance(sig1, sig2)
+        # Stopping partway through the terms of WeightedSignatureDistanceCalculator is slower than summing them all
+        return math.inf if distance > widen_bound(bound) else distance
+
 
 @dataclass(eq=False, order=False, frozen=True)
 class WeightedSignatureDistanceCalculator(SignatureDistanceCalculator):
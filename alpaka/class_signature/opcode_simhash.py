@@ -0,0 +1,242 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import simhash
+from androguard.core.bytecodes.dvm import DALVIK_OPCODES_FORMAT, Instruction
+
+from alpaka.class_signature.simhash_utils import hash_token
+
+HASH_BITS = 64
+HASH_BYTES = HASH_BITS // 8
+HASH_MASK = 2 ** HASH_BITS - 1
+BYTE_VALUES = 256
+# The bits of every byte value, the least significant bit first
+_BYTE_VALUES_BITS = np.unpackbits(
+    np.arange(BYTE_VALUES, dtype=np.uint8)[:, np.newaxis], axis=1, bitorder='little'
+).astype(np.float64)
+# Bounds the memory of the byte histograms, of 16 KiB per item
+SIMHASH_BATCH_ITEMS = 4096
+# Opcodes below it always decode to the instruction named in androguard's opcodes table.
+# From it on, the same opcode may decode to different instructions (odex opcodes, invalid instructions),
+# and the payloads and extended opcodes are above 0xff, so their IDs are assigned by instruction name.
+NAMED_OPCODES_START = 0xe3
+OPCODE_ID_BITS = 16
+MAXIMUM_OPCODE_IDS = 2 ** OPCODE_ID_BITS
+# The multiplier of the rolling shingle hashes, an odd 64 bit constant
+SHINGLE_HASH_MULTIPLIER = 0x9e3779b97f4a7c15
+
+
+def _mix_hashes(hashes: np.ndarray) -> np.ndarray:
+    """
+    The splitmix64 finalizer, spreading the bits of the rolling shingle hashes.
+    """
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes = hashes * np.uint64(0xbf58476d1ce4e5b9)
+    hashes = hashes ^ (hashes >> np.uint64(27))
+    hashes = hashes * np.uint64(0x94d049bb133111eb)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+def _mix_hash(hash_value: int) -> int:
+    """
+    _mix_hashes of a single hash.
+    """
+    hash_value ^= hash_value >> 30
+    hash_value = (hash_value * 0xbf58476d1ce4e5b9) & HASH_MASK
+    hash_value ^= hash_value >> 27
+    hash_value = (hash_value * 0x94d049bb133111eb) & HASH_MASK
+    return hash_value ^ (hash_value >> 31)
+
+
+def calculate_simhashes_of_hashes(hashes_per_item: Sequence[np.ndarray]) -> List[int]:
+    """
+    Calculate the simhash of each array of token hashes at once, identical to simhash.compute of each of them:
+    a bit of the simhash is set when it is set in more than half of the hashes.
+    """
+    simhashes = []
+    for batch_start in range(0, len(hashes_per_item), SIMHASH_BATCH_ITEMS):
+        simhashes.extend(_calculate_batch_simhashes(hashes_per_item[batch_start:batch_start + SIMHASH_BATCH_ITEMS]))
+    return simhashes
+
+
+def _calculate_batch_simhashes(hashes_per_item: Sequence[np.ndarray]) -> List[int]:
+    """
+    The votes for the bits of the simhashes are counted a byte of the hashes at a time:
+    a histogram of the values of the byte in the hashes of each item,
+    multiplied by the bits of each byte value, counts the hashes setting each of the byte's bits.
+    """
+    items_count = len(hashes_per_item)
+    lengths = np.fromiter((len(hashes) for hashes in hashes_per_item), dtype=np.int64, count=items_count)
+    all_hashes = np.concatenate([np.zeros(0, dtype=np.uint64), *hashes_per_item]).astype('<u8', copy=False)
+    hash_bytes = all_hashes.view(np.uint8).reshape(-1, HASH_BYTES)
+    histogram_offsets = np.repeat(np.arange(items_count, dtype=np.int64) * BYTE_VALUES, lengths)
+    byte_values_counts = np.empty((HASH_BYTES, items_count, BYTE_VALUES))
+    for byte_position in range(HASH_BYTES):
+        byte_values_counts[byte_position] = np.bincount(
+            histogram_offsets + hash_bytes[:, byte_position], minlength=items_count * BYTE_VALUES
+        ).reshape(items_count, BYTE_VALUES)
+    # The counts are exact in floating point, which is multiplied much faster than integers
+    set_bit_votes = (byte_values_counts @ _BYTE_VALUES_BITS).transpose(1, 0, 2).reshape(items_count, HASH_BITS)
+    simhash_bits = 2 * set_bit_votes > lengths[:, np.newaxis]
+    return np.packbits(simhash_bits, axis=1, bitorder='little').view('<u8').ravel().tolist()
+
+
+class OpcodeSimhashCalculator:
+
+    """
+    Calculates the instructions simhash and the instruction shingles simhash of classes
+    from the integer opcode IDs of their instructions.
+
+    The hash of every opcode is precomputed in a table indexed by the opcode ID.
+    The shingles are hashed by rolling over the opcode IDs:
+    in compatible mode the hash of a shingle is the hash of the string of its instruction names,
+    as calculate_shingle_simhash hashes it, so the simhashes are identical to the ones of the instruction names;
+    otherwise it is a rolling polynomial hash of the hashes of its opcodes, which is calculated without strings.
+    """
+
+    SHINGLE_WINDOW = 4
+
+    def __init__(self, compatible: bool = True):
+        self.compatible = compatible
+        self._opcode_names: List[str] = [
+            DALVIK_OPCODES_FORMAT[opcode][1][0] if opcode in DALVIK_OPCODES_FORMAT else ''
+            for opcode in range(NAMED_OPCODES_START)
+        ]
+        self._opcode_hashes: List[int] = [hash_token(opcode_name) for opcode_name in self._opcode_names]
+        self._opcode_hashes_array = np.array(self._opcode_hashes, dtype=np.uint64)
+        self._named_opcode_ids: Dict[str, int] = dict()
+        # The hashes of the shingles seen so far in compatible mode, by their packed opcode IDs
+        self._shingle_hashes: Dict[int, int] = dict()
+        self._shingle_multipliers = [
+            pow(SHINGLE_HASH_MULTIPLIER, self.SHINGLE_WINDOW - 1 - position, 2 ** HASH_BITS)
+            for position in range(self.SHINGLE_WINDOW)
+        ]
+
+    def get_opcode_id(self, instruction: Instruction) -> int:
+        opcode = instruction.get_op_value()
+        if 0 <= opcode < NAMED_OPCODES_START:
+            return opcode
+        return self._get_named_opcode_id(instruction.get_name())
+
+    def _get_named_opcode_id(self, instruction_name: str) -> int:
+        opcode_id = self._named_opcode_ids.get(instruction_name)
+        if opcode_id is None:
+            opcode_id = len(self._opcode_names)
+            if opcode_id >= MAXIMUM_OPCODE_IDS:
+                raise ValueError(f'Too many distinct instruction names, failed adding {instruction_name}')
+            self._opcode_names.append(instruction_name)
+            self._opcode_hashes.append(hash_token(instruction_name))
+            self._opcode_hashes_array = np.array(self._opcode_hashes, dtype=np.uint64)
+            self._named_opcode_ids[instruction_name] = opcode_id
+        return opcode_id
+
+    def calculate_simhashes(self, opcode_ids: Sequence[int]) -> Tuple[int, int]:
+        """
+        :return: the instructions simhash and the instruction shingles simhash of a single class
+        """
+        opcode_hashes = self._opcode_hashes
+        return (
+            simhash.compute([opcode_hashes[opcode_id] for opcode_id in opcode_ids]),
+            simhash.compute(self._get_shingle_hashes(opcode_ids)),
+        )
+
+    def _get_shingle_hashes(self, opcode_ids: Sequence[int]) -> List[int]:
+        window = self.SHINGLE_WINDOW
+        if len(opcode_ids) < window:
+            return []
+        if self.compatible:
+            key_mask = (1 << (OPCODE_ID_BITS * window)) - 1
+            key = 0
+            shingle_keys = []
+            for position, opcode_id in enumerate(opcode_ids):
+                key = ((key << OPCODE_ID_BITS) | opcode_id) & key_mask
+                if position >= window - 1:
+                    shingle_keys.append(key)
+            return self._get_compatible_shingle_hashes(shingle_keys)
+        opcode_hashes = [self._opcode_hashes[opcode_id] for opcode_id in opcode_ids]
+        # Rolls the polynomial hash of the window, adding the incoming opcode and removing the outgoing one
+        leading_multiplier = self._shingle_multipliers[0]
+        rolling_hash = 0
+        for opcode_hash in opcode_hashes[:window]:
+            rolling_hash = (rolling_hash * SHINGLE_HASH_MULTIPLIER + opcode_hash) & HASH_MASK
+        shingle_hashes = [_mix_hash(rolling_hash)]
+        for outgoing_hash, incoming_hash in zip(opcode_hashes, opcode_hashes[window:]):
+            rolling_hash = (
+                (rolling_hash - outgoing_hash * leading_multiplier) * SHINGLE_HASH_MULTIPLIER + incoming_hash
+            ) & HASH_MASK
+            shingle_hashes.append(_mix_hash(rolling_hash))
+        return shingle_hashes
+
+    def _get_compatible_shingle_hashes(self, shingle_keys: Sequence[int]) -> List[int]:
+        shingle_hashes = self._shingle_hashes
+        hashes = []
+        for shingle_key in shingle_keys:
+            shingle_hash = shingle_hashes.get(shingle_key)
+            if shingle_hash is None:
+                shingle_hash = shingle_hashes[shingle_key] = hash_token(str(self._unpack_shingle(shingle_key)))
+            hashes.append(shingle_hash)
+        return hashes
+
+    def _unpack_shingle(self, shingle_key: int) -> List[str]:
+        """
+        :return: the instruction names of the shingle, as calculate_shingle_simhash lists them
+        """
+        opcode_id_mask = MAXIMUM_OPCODE_IDS - 1
+        return [
+            self._opcode_names[(shingle_key >> (OPCODE_ID_BITS * (self.SHINGLE_WINDOW - 1 - position))) & opcode_id_mask]
+            for position in range(self.SHINGLE_WINDOW)
+        ]
+
+    def calculate_many_simhashes(self, opcode_ids_per_class: Sequence[np.ndarray]) -> List[Tuple[int, int]]:
+        """
+        Like calculate_simhashes for many classes at once, hashing the opcodes and the shingles of all of the classes
+        and voting on the bits of their simhashes with vectorized operations.
+
+        :param opcode_ids_per_class: the opcode IDs of each class, in an integer array
+        """
+        lengths = np.fromiter(
+            (len(opcode_ids) for opcode_ids in opcode_ids_per_class), dtype=np.int64, count=len(opcode_ids_per_class)
+        )
+        all_opcode_ids = np.concatenate([np.zeros(0, dtype=np.int64), *opcode_ids_per_class]).astype(np.int64)
+        all_opcode_hashes = self._opcode_hashes_array[all_opcode_ids]
+        class_ends = np.cumsum(lengths)
+        shingle_hashes = self._calculate_shingle_hashes(all_opcode_ids, all_opcode_hashes, lengths, class_ends)
+        shingles_counts = np.maximum(lengths - self.SHINGLE_WINDOW + 1, 0)
+        return list(zip(
+            calculate_simhashes_of_hashes(np.split(all_opcode_hashes, class_ends[:-1])),
+            calculate_simhashes_of_hashes(np.split(shingle_hashes, np.cumsum(shingles_counts)[:-1])),
+        ))
+
+    def _calculate_shingle_hashes(
+            self,
+            all_opcode_ids: np.ndarray,
+            all_opcode_hashes: np.ndarray,
+            lengths: np.ndarray,
+            class_ends: np.ndarray,
+    ) -> np.ndarray:
+        """
+        :return: the hashes of the shingles of all of the classes, in the order of the classes.
+        The shingles do not span the classes.
+        """
+        window = self.SHINGLE_WINDOW
+        shingles_count = max(0, len(all_opcode_ids) - window + 1)
+        shingle_values = np.zeros(shingles_count, dtype=np.uint64)
+        if self.compatible:
+            opcode_ids = all_opcode_ids.astype(np.uint64)
+            for position in range(window):
+                shingle_values <<= np.uint64(OPCODE_ID_BITS)
+                shingle_values |= opcode_ids[position:position + shingles_count]
+        else:
+            for position, multiplier in enumerate(self._shingle_multipliers):
+                shingle_values += all_opcode_hashes[position:position + shingles_count] * np.uint64(multiplier)
+        # Drop the shingles that start in one class and end in the next one
+        class_of_position = np.repeat(np.arange(len(lengths)), lengths)[:shingles_count]
+        shingle_values = shingle_values[np.arange(shingles_count) + window <= class_ends[class_of_position]]
+        if not self.compatible:
+            return _mix_hashes(shingle_values)
+        # Each distinct shingle is hashed once
+        shingle_keys, shingle_indices = np.unique(shingle_values, return_inverse=True)
+        distinct_shingle_hashes = np.array(
+            self._get_compatible_shingle_hashes(shingle_keys.tolist()), dtype=np.uint64
+        )
+        return distinct_shingle_hashes[shingle_indices.reshape(-1)]
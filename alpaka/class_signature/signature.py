@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import astuple, dataclass
+from typing import Tuple
 
 
 @dataclass
@@ -16,3 +17,6 @@ class ClassSignature:
     superclass_hash: int
     string_literals_count: int
     string_literals_simhash: int
+
+    def to_tuple(self) -> Tuple[int, ...]:
+        return astuple(self)
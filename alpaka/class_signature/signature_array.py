@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from dataclasses import fields
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+from alpaka.class_signature.signature import ClassSignature
+
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class SignatureArray:
+
+    """
+    Columnar storage of multiple class signatures - one NumPy array per ClassSignature field.
+
+    Simhash and hash fields are stored as uint64 and count fields as int64,
+    so whole pools can be compared at once without touching the python objects.
+    The columns are available as attributes named after the ClassSignature fields.
+    """
+
+    FIELD_NAMES = tuple(field.name for field in fields(ClassSignature))
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self._columns = columns
+
+    @classmethod
+    def from_signatures(cls, signatures: Sequence[ClassSignature]) -> SignatureArray:
+        return cls({
+            field_name: cls.pack_column([getattr(signature, field_name) for signature in signatures], field_name)
+            for field_name in cls.FIELD_NAMES
+        })
+
+    @classmethod
+    def pack_column(cls, values: Sequence[int], field_name: str) -> np.ndarray:
+        dtype = cls.get_field_dtype(field_name)
+        if dtype is np.uint64:
+            # superclass_hash may be negative, only its equality matters so storing it modulo 2**64 is fine
+            values = [value & HASH_MASK for value in values]
+        return np.array(values, dtype=dtype)
+
+    @staticmethod
+    def get_field_dtype(field_name: str):
+        return np.uint64 if field_name.endswith('hash') else np.int64
+
+    def __len__(self):
+        return len(self._columns[self.FIELD_NAMES[0]])
+
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> SignatureArray:
+        return SignatureArray({
+            field_name: column[index]
+            for field_name, column in self._columns.items()
+        })
+
+    def __getattr__(self, field_name: str) -> np.ndarray:
+        try:
+            return self.__dict__['_columns'][field_name]
+        except KeyError:
+            raise AttributeError(field_name) from None
@@ -0,0 +1,133 @@
+import dataclasses
+import json
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from androguard.core.analysis.analysis import ClassAnalysis
+
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.signature import ClassSignature
+
+
+class SignatureCache:
+
+    """
+    A persistent store of class signatures, kept in an SQLite file and keyed by
+    ClassSignatureCalculator.calculate_content_key, so unchanged classes are not recalculated between runs.
+
+    Lookups and new signatures are kept in memory and written on flush.
+    When the store holds more than `maximum_entries` signatures,
+    the least recently used ones are evicted on flush.
+    """
+
+    MAXIMUM_ENTRIES = 1_000_000
+
+    def __init__(self, path: str, maximum_entries: int = MAXIMUM_ENTRIES):
+        if maximum_entries < 0:
+            raise ValueError(f"Maximum entries must not be negative, got {maximum_entries}")
+        self._maximum_entries = maximum_entries
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS signatures ('
+            'key TEXT PRIMARY KEY, signature TEXT NOT NULL, last_used INTEGER NOT NULL)'
+        )
+        self._used_keys = set()
+        self._new_signatures: Dict[str, ClassSignature] = dict()
+        self.statistics = Counter()
+
+    def get_signature(self, class_analysis: ClassAnalysis, signature_calculator: ClassSignatureCalculator):
+        """
+        Get the signature of the class from the cache, or calculate it on a cache miss.
+        """
+        key = signature_calculator.calculate_content_key(class_analysis)
+        signature = self._load(key)
+        if signature is not None:
+            self.statistics['signature_cache_hits'] += 1
+            self._used_keys.add(key)
+            return signature
+        self.statistics['signature_cache_misses'] += 1
+        signature = signature_calculator.calculate_class_signature(class_analysis)
+        self._new_signatures[key] = signature
+        return signature
+
+    def get_signatures(
+            self,
+            class_analyses: Iterable[ClassAnalysis],
+            signature_calculator: ClassSignatureCalculator,
+    ) -> List[ClassSignature]:
+        """
+        Like get_signature for many classes, calculating the signatures of all of the cache misses at once.
+        """
+        class_analyses = list(class_analyses)
+        keys = [signature_calculator.calculate_content_key(class_analysis) for class_analysis in class_analyses]
+        signatures: List[Optional[ClassSignature]] = [None] * len(keys)
+        # The index of the first class of each missing key, the other classes of the key hit its new signature
+        missing_key_indices: Dict[str, int] = dict()
+        for index, key in enumerate(keys):
+            signature = self._load(key)
+            if signature is None and key not in missing_key_indices:
+                missing_key_indices[key] = index
+                continue
+            self.statistics['signature_cache_hits'] += 1
+            self._used_keys.add(key)
+            signatures[index] = signature
+        self.statistics['signature_cache_misses'] += len(missing_key_indices)
+        calculated_signatures = signature_calculator.calculate_class_signatures(
+            class_analyses[index] for index in missing_key_indices.values()
+        )
+        self._new_signatures.update(zip(missing_key_indices, calculated_signatures))
+        return [
+            self._new_signatures[key] if signature is None else signature
+            for key, signature in zip(keys, signatures)
+        ]
+
+    def _load(self, key: str) -> Optional[ClassSignature]:
+        if key in self._new_signatures:
+            return self._new_signatures[key]
+        row = self._connection.execute('SELECT signature FROM signatures WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return ClassSignature(*json.loads(row[0]))
+
+    def flush(self):
+        """
+        Write the new signatures and the usage of the cached ones to the file, and evict the least recently used signatures.
+        """
+        with self._connection:
+            # Every flush is a new generation of usage
+            last_used = self._connection.execute(
+                'SELECT COALESCE(MAX(last_used), 0) + 1 FROM signatures'
+            ).fetchone()[0]
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO signatures (key, signature, last_used) VALUES (?, ?, ?)',
+                (
+                    (key, json.dumps(dataclasses.astuple(signature)), last_used)
+                    for key, signature in self._new_signatures.items()
+                ),
+            )
+            self._connection.executemany(
+                'UPDATE signatures SET last_used = ? WHERE key = ?',
+                ((last_used, key) for key in self._used_keys),
+            )
+            evicted = self._connection.execute(
+                'DELETE FROM signatures WHERE key IN ('
+                'SELECT key FROM signatures ORDER BY last_used DESC, key LIMIT -1 OFFSET ?)',
+                (self._maximum_entries,),
+            ).rowcount
+        self.statistics['signature_cache_evictions'] += evicted
+        self._new_signatures.clear()
+        self._used_keys.clear()
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM signatures').fetchone()[0] + len(self._new_signatures)
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
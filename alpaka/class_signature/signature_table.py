@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import fields
+from typing import Tuple
+
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.class_signature.signature_array import HASH_MASK, SignatureArray
+
+
+class SignatureView:
+
+    """
+    A lightweight read-only ClassSignature backed by a row of a SignatureTable.
+    Its fields are read like the fields of a ClassSignature.
+    """
+
+    __slots__ = ('_row',)
+
+    def __init__(self, row: int):
+        self._row = row
+
+    def to_tuple(self) -> Tuple[int, ...]:
+        return tuple(getattr(self, field_name) for field_name in SignatureTable.FIELD_NAMES)
+
+    def to_signature(self) -> ClassSignature:
+        return ClassSignature(*self.to_tuple())
+
+    def __eq__(self, other):
+        if isinstance(other, SignatureView):
+            return self.to_tuple() == other.to_tuple()
+        if isinstance(other, ClassSignature):
+            return self.to_signature() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.to_tuple())
+
+    def __repr__(self):
+        return repr(self.to_signature())
+
+    def __reduce__(self):
+        # The table is not pickled along with a single signature
+        return ClassSignature, self.to_tuple()
+
+
+class SignatureTable:
+
+    """
+    Columnar storage of the signatures of a class pool - one typed array per ClassSignature field,
+    instead of a ClassSignature instance of 13 python ints per class.
+
+    A row is added for each class up front and filled lazily, when its signature is first calculated.
+    Rows are read through SignatureViews.
+    """
+
+    FIELD_NAMES = SignatureArray.FIELD_NAMES
+
+    def __init__(self):
+        self._columns = {
+            field_name: array('Q' if field_name.endswith('hash') else 'q')
+            for field_name in self.FIELD_NAMES
+        }
+        self._filled = bytearray()
+        # The view type reads the columns of this table directly, to keep field access fast
+        self._view_type = type('SignatureView', (SignatureView,), {
+            '__slots__': (),
+            **{
+                field_name: property(lambda view, column=column: column[view._row])
+                for field_name, column in self._columns.items()
+            },
+        })
+
+    def add_row(self) -> int:
+        """
+        Add an empty row to the table.
+
+        :return: the index of the row
+        """
+        for column in self._columns.values():
+            column.append(0)
+        self._filled.append(False)
+        return len(self._filled) - 1
+
+    def is_filled(self, row: int) -> bool:
+        return bool(self._filled[row])
+
+    def fill(self, row: int, signature: ClassSignature) -> SignatureView:
+        for field_name, column in self._columns.items():
+            value = getattr(signature, field_name)
+            column[row] = value & HASH_MASK if column.typecode == 'Q' else value
+        self._filled[row] = True
+        return self.view(row)
+
+    def view(self, row: int) -> SignatureView:
+        return self._view_type(row)
+
+    def __len__(self):
+        return len(self._filled)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self._columns.values()) + len(self._filled)
@@ -1,3 +1,4 @@
+from collections import deque
 from typing import Iterable, Generator
 
 # simhash-py package
@@ -6,11 +7,25 @@ import simhash
 
 def calculate_simhash(tokens: Iterable[str]) -> int:
     return simhash.compute((
-        simhash.unsigned_hash(bytes(token, 'utf-8'))
+        hash_token(token)
         for token in tokens
     ))
 
 
+def hash_token(token: str) -> int:
+    """
+    The hash of a single token, as used by calculate_simhash.
+    """
+    return simhash.unsigned_hash(bytes(token, 'utf-8'))
+
+
+def calculate_simhash_of_hashes(token_hashes: Iterable[int]) -> int:
+    """
+    Calculate the simhash of tokens that were already hashed with hash_token.
+    """
+    return simhash.compute(token_hashes)
+
+
 def calculate_distance(simhash1: int, simhash2: int):
     return simhash.num_differing_bits(simhash1, simhash2)
 
@@ -36,18 +51,14 @@ def shingle(tokens: Iterable, window: int = 4) -> Generator[list, None, None]:
     if window <= 0:
         raise ValueError("Window size must be positive")
 
-    # Start with an empty output set.
-    curr_window = []
+    # Start with an empty output set, the oldest token is dropped once the window is full.
+    curr_window = deque(maxlen=window)
 
     # Iterate over the input tokens, once.
     for token in tokens:
         # Add to the window.
         curr_window.append(token)
 
-        # If we've collected too many, remove the oldest item(s) from the collection
-        while len(curr_window) > window:
-            curr_window.pop(0)
-
         # Finally, if the window is full, yield the data set.
         if len(curr_window) == window:
             yield list(curr_window)
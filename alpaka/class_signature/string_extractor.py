@@ -1,6 +1,7 @@
-from typing import Generator
+from typing import Generator, Optional
 
 from androguard.core.analysis.analysis import ClassAnalysis
+from androguard.core.bytecodes.dvm import Instruction
 
 
 class StringLiteralsExtractor:
@@ -20,8 +21,27 @@ class StringLiteralsExtractor:
                 continue
 
             for instruction in method_code.get_bc().get_instructions():
-                op_value = instruction.get_op_value()
+                string_literal = cls.get_string_literal(instruction)
+                if string_literal is not None:
+                    yield string_literal
 
-                # check for string literal instructions: const-string (0x1a), const-string/jumbo (0x1b)
-                if 0x1a <= op_value <= 0x1b:
-                    yield instruction.cm.vm.get_cm_string(instruction.get_ref_kind())
+    @classmethod
+    def get_string_literal(cls, instruction: Instruction) -> Optional[str]:
+        """
+        :return: the string literal loaded by the instruction, or None if it is not a string literal instruction
+        """
+        string_id = cls.get_string_id(instruction)
+        if string_id is not None:
+            return instruction.cm.vm.get_cm_string(string_id)
+        return None
+
+    @staticmethod
+    def get_string_id(instruction: Instruction) -> Optional[int]:
+        """
+        :return: the ID of the string literal loaded by the instruction in the string section of its DEX file,
+        or None if it is not a string literal instruction
+        """
+        # check for string literal instructions: const-string (0x1a), const-string/jumbo (0x1b)
+        if 0x1a <= instruction.get_op_value() <= 0x1b:
+            return instruction.get_ref_kind()
+        return None
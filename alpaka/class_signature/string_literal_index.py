@@ -0,0 +1,135 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from androguard.core.analysis.analysis import ClassAnalysis
+from androguard.core.bytecodes.dvm import DalvikVMFormat
+
+from alpaka.class_signature.simhash_utils import hash_token
+from alpaka.class_signature.string_extractor import StringLiteralsExtractor
+
+
+class DexStringTable:
+
+    """
+    The string section of a DEX file, decoded once.
+
+    androguard decodes the MUTF-8 data of a string on every lookup, so every string is decoded (and hashed)
+    the first time it is looked up, and kept by its string ID from then on.
+    """
+
+    def __init__(self, dalvik_vm_format: DalvikVMFormat):
+        self._dalvik_vm_format = dalvik_vm_format
+        self._strings: Dict[int, str] = dict()
+        self._string_hashes: Dict[int, int] = dict()
+
+    def get_string(self, string_id: int) -> str:
+        string = self._strings.get(string_id)
+        if string is None:
+            string = self._strings[string_id] = self._dalvik_vm_format.get_cm_string(string_id)
+        return string
+
+    def get_string_hash(self, string_id: int) -> int:
+        """
+        :return: the hash_token of the string
+        """
+        string_hash = self._string_hashes.get(string_id)
+        if string_hash is None:
+            string_hash = self._string_hashes[string_id] = hash_token(self.get_string(string_id))
+        return string_hash
+
+    def __len__(self):
+        """
+        :return: the number of strings decoded so far
+        """
+        return len(self._strings)
+
+
+class StringLiteralIndex:
+
+    """
+    An index from each class to the IDs of the string literals its methods load, in the order they are loaded,
+    along with the string tables of the DEX files to resolve the IDs with.
+
+    A class is indexed in a single scan of its bytecode, the first time it is looked up,
+    unless its string IDs were already added by a component that scanned the bytecode anyway.
+    String IDs are only meaningful within the DEX file of the class, compare classes of different DEX files
+    by their string literals or string literal hashes.
+    """
+
+    def __init__(self):
+        # The tables keep their DEX files alive, so the ids of the DEX files are not reused while they are keys
+        self._string_tables: Dict[int, DexStringTable] = dict()
+        self._classes_string_ids: Dict[ClassAnalysis, Tuple[Optional[DexStringTable], List[int]]] = dict()
+
+    def get_string_table(self, dalvik_vm_format: DalvikVMFormat) -> DexStringTable:
+        string_table = self._string_tables.get(id(dalvik_vm_format))
+        if string_table is None:
+            string_table = self._string_tables[id(dalvik_vm_format)] = DexStringTable(dalvik_vm_format)
+        return string_table
+
+    def add_class(self, class_analysis: ClassAnalysis, string_ids: List[int]):
+        """
+        Index the string IDs of a class, as scanned by the caller in the order of the class's bytecode.
+        """
+        self._classes_string_ids[class_analysis] = (self._get_class_string_table(class_analysis), string_ids)
+
+    def index_classes(self, class_analyses: Iterable[ClassAnalysis]):
+        for class_analysis in class_analyses:
+            self._get_class_string_ids(class_analysis)
+
+    def get_string_ids(self, class_analysis: ClassAnalysis) -> List[int]:
+        return self._get_class_string_ids(class_analysis)[1]
+
+    def get_string_literals(self, class_analysis: ClassAnalysis) -> List[str]:
+        """
+        :return: the same strings as StringLiteralsExtractor.extract_strings
+        """
+        string_table, string_ids = self._get_class_string_ids(class_analysis)
+        return [string_table.get_string(string_id) for string_id in string_ids]
+
+    def get_string_literal_hashes(self, class_analysis: ClassAnalysis) -> List[int]:
+        string_table, string_ids = self._get_class_string_ids(class_analysis)
+        return [string_table.get_string_hash(string_id) for string_id in string_ids]
+
+    def clear(self):
+        """
+        Drop the indexed classes and the string tables, which keep the analyses of their apks alive.
+        """
+        self._string_tables.clear()
+        self._classes_string_ids.clear()
+
+    def __contains__(self, class_analysis: ClassAnalysis) -> bool:
+        return class_analysis in self._classes_string_ids
+
+    def __len__(self):
+        return len(self._classes_string_ids)
+
+    def _get_class_string_ids(self, class_analysis: ClassAnalysis) -> Tuple[Optional[DexStringTable], List[int]]:
+        class_string_ids = self._classes_string_ids.get(class_analysis)
+        if class_string_ids is None:
+            self.add_class(class_analysis, self._scan_string_ids(class_analysis))
+            class_string_ids = self._classes_string_ids[class_analysis]
+        return class_string_ids
+
+    def _get_class_string_table(self, class_analysis: ClassAnalysis) -> Optional[DexStringTable]:
+        """
+        :return: the string table of the DEX file of the class, None for external classes
+        """
+        if class_analysis.is_external():
+            return None
+        return self.get_string_table(class_analysis.orig_class.CM.vm)
+
+    @staticmethod
+    def _scan_string_ids(class_analysis: ClassAnalysis) -> List[int]:
+        if class_analysis.is_external():
+            # External classes have no code
+            return []
+        string_ids = []
+        for method in class_analysis.orig_class.get_methods():
+            method_code = method.get_code()
+            if method_code is None:
+                continue
+            for instruction in method_code.get_bc().get_instructions():
+                string_id = StringLiteralsExtractor.get_string_id(instruction)
+                if string_id is not None:
+                    string_ids.append(string_id)
+        return string_ids
@@ -0,0 +1,69 @@
+import numpy as np
+
+from alpaka.class_signature.distance import WeightedSignatureDistanceCalculator
+from alpaka.class_signature.signature_array import SignatureArray
+
+
+def count_differing_bits(hashes1: np.ndarray, hashes2: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of simhash.num_differing_bits (XOR + popcount)
+    """
+    xor = np.bitwise_xor(hashes1, hashes2)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    # NumPy < 2.0 has no popcount ufunc, fall back to a SWAR popcount
+    xor = xor - ((xor >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    xor = (xor & np.uint64(0x3333333333333333)) + ((xor >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    xor = (xor + (xor >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (xor * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+class VectorizedSignatureDistanceCalculator:
+
+    """
+    Computes the distances of WeightedSignatureDistanceCalculator between whole SignatureArrays at once.
+
+    The terms are summed in the same order as WeightedSignatureDistanceCalculator.distance,
+    so the results are identical to the ones of the scalar calculator.
+    """
+
+    def __init__(self, weighted_distance_calculator: WeightedSignatureDistanceCalculator):
+        weights = weighted_distance_calculator
+        self._terms = (
+            (self._count_term, weights.member_count_weight, 'member_count'),
+            (self._count_term, weights.method_count_weight, 'method_count'),
+            (self._count_term, weights.instructions_count_weight, 'instructions_count'),
+            (self._simhash_term, weights.members_simhash_weight, 'members_simhash'),
+            (self._simhash_term, weights.methods_params_simhash_weight, 'methods_params_simhash'),
+            (self._simhash_term, weights.methods_returns_simhash_weight, 'methods_returns_simhash'),
+            (self._simhash_term, weights.instructions_simhash_weight, 'instructions_simhash'),
+            (self._simhash_term, weights.instruction_shingles_simhash_weight, 'instruction_shingles_simhash'),
+            (self._count_term, weights.implemented_interfaces_count_weight, 'implemented_interfaces_count'),
+            (self._simhash_term, weights.implemented_interfaces_simhash_weight, 'implemented_interfaces_simhash'),
+            (self._hash_term, weights.superclass_hash_weight, 'superclass_hash'),
+            (self._count_term, weights.string_literals_count_weight, 'string_literals_count'),
+            (self._simhash_term, weights.string_literals_simhash_weight, 'string_literals_simhash'),
+        )
+
+    def distances(self, signatures1: SignatureArray, signatures2: SignatureArray) -> np.ndarray:
+        """
+        :return: a (len(signatures1), len(signatures2)) matrix of the distances between the signatures
+        """
+        total = np.zeros((len(signatures1), len(signatures2)), dtype=np.float64)
+        for term_function, weight, field_name in self._terms:
+            column1 = getattr(signatures1, field_name)[:, np.newaxis]
+            column2 = getattr(signatures2, field_name)[np.newaxis, :]
+            total += term_function(weight, column1, column2)
+        return total
+
+    @staticmethod
+    def _count_term(weight: float, column1: np.ndarray, column2: np.ndarray) -> np.ndarray:
+        return weight * np.abs(column2 - column1)
+
+    @staticmethod
+    def _simhash_term(weight: float, column1: np.ndarray, column2: np.ndarray) -> np.ndarray:
+        return weight * count_differing_bits(column1, column2)
+
+    @staticmethod
+    def _hash_term(weight: float, column1: np.ndarray, column2: np.ndarray) -> np.ndarray:
+        return np.where(column1 != column2, weight, 0.0)
@@ -17,3 +17,10 @@ def _get_config_dir_path():
 OUTPUT_PATH = "output"
 MAXIMUM_SIGNATURE_MATCHES = 3
 DEFAULT_WEIGHTS = _load_signature_distance_weights()
+# A string literal is rare when at most this many classes of both apks load it
+MAXIMUM_RARE_STRING_LITERAL_CLASSES = 4
+# The number of classes sharing the rarest string literals with a class that its signature is compared to
+MAXIMUM_RARE_STRING_CANDIDATES = 8
+# Classes sharing rare string literals are only matched within this signature distance. With the default weights,
+# about 1% of the pairs of unrelated classes are this close
+MAXIMUM_RARE_STRING_MATCH_DISTANCE = 50.0
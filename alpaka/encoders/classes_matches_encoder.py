@@ -1,8 +1,13 @@
-from typing import Iterable, Mapping
+import json
+from typing import Iterable, Mapping, TextIO, Tuple
 
 from alpaka.apk.class_info import ClassInfo
 from alpaka.matching.base import Match
 
+JSON_LINES_CLASS_NAME_KEY = 'class'
+JSON_LINES_MATCHES_KEY = 'matches'
+JSON_LINES_IDENTICAL_KEY = 'identical'
+
 
 def convert_class_matches_dict_to_output_format(matches_dict: Mapping[str, Iterable[Match[ClassInfo]]]):
     return {
@@ -11,6 +16,40 @@ def convert_class_matches_dict_to_output_format(matches_dict: Mapping[str, Itera
     }
 
 
+def write_class_matches_json_lines(
+        class_matches: Iterable[Tuple[str, Iterable[Match[ClassInfo]]]],
+        output_file: TextIO,
+):
+    """
+    Write a JSON object per class as soon as its matches are available:
+    {"class": <class name>, "matches": {<matching class name>: <distance>, ...}, "identical": <bool>}
+    identical is true when the class is matched to a class with an identical signature.
+    """
+    for class_name, matches in class_matches:
+        matches = list(matches)
+        output_file.write(json.dumps({
+            JSON_LINES_CLASS_NAME_KEY: class_name,
+            JSON_LINES_MATCHES_KEY: _convert_matches_to_output_format(matches),
+            JSON_LINES_IDENTICAL_KEY: any(match.identical for match in matches),
+        }))
+        output_file.write('\n')
+        # Let consumers read the matches while the rest of the classes are matched
+        output_file.flush()
+
+
+def read_class_matches_json_lines(input_file: TextIO):
+    """
+    :return: the matches written by write_class_matches_json_lines, in the format of
+    convert_class_matches_dict_to_output_format
+    """
+    output = dict()
+    for line in input_file:
+        if line.strip():
+            class_matches = json.loads(line)
+            output[class_matches[JSON_LINES_CLASS_NAME_KEY]] = class_matches[JSON_LINES_MATCHES_KEY]
+    return output
+
+
 def _convert_matches_to_output_format(matches: Iterable[Match]):
     return {
         match.item2.analysis.name: match.match_rank
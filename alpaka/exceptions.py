@@ -1,2 +1,6 @@
 class FormatError(Exception):
     pass
+
+
+class ClassFilterError(Exception):
+    pass
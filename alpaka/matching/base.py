@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import heapq
+import math
 from abc import ABCMeta
 from dataclasses import dataclass
-from typing import TypeVar, Generic, Mapping, Tuple, Iterable
+from typing import TypeVar, Generic, Mapping, Tuple, Iterable, List
+
+from alpaka.class_signature.distance import widen_bound
 
 T = TypeVar('T')
 
@@ -18,6 +22,8 @@ class Match(Generic[T]):
     item1: T
     item2: T
     match_rank: float
+    # The signatures of the matched items are identical
+    identical: bool = False
 
 
 @dataclass
@@ -33,3 +39,54 @@ class MatchingResult(Generic[T]):
             self.best_match(key)
             for key in self.matches.keys()
         )
+
+
+class BoundedNearest:
+
+    """
+    The `count` closest (distance, index) pairs offered so far, for the indexes answering exact k-nearest-neighbours
+    queries, which skip the signatures whose lower bound of the distance is beyond get_bound().
+    Ties in distance are broken by index, the same way heapq.nsmallest breaks them.
+    """
+
+    __slots__ = ('_count', '_heap')
+
+    def __init__(self, count: int):
+        if count < 1:
+            raise ValueError(f"Count must be at least 1, got {count}")
+        self._count = count
+        # A max-heap of (-distance, -index), its top is the farthest of the closest pairs
+        self._heap: List[Tuple[float, int]] = []
+
+    def is_full(self) -> bool:
+        return len(self._heap) >= self._count
+
+    @property
+    def farthest_distance(self) -> float:
+        """
+        :return: the distance of the farthest of the closest pairs, or math.inf while there are less than `count`
+        """
+        return -self._heap[0][0] if self.is_full() else math.inf
+
+    def offer(self, distance: float, index: int):
+        item = (-distance, -index)
+        if len(self._heap) < self._count:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def get_bound(self) -> float:
+        """
+        :return: the lower bound beyond which signatures can not be closer than the farthest of the closest pairs.
+        Signatures at exactly the farthest distance may still win by index, so they are within the bound.
+        """
+        return widen_bound(self.farthest_distance)
+
+    def is_beyond(self, lower_bound: float) -> bool:
+        return lower_bound > self.get_bound()
+
+    def to_list(self) -> List[Tuple[float, int]]:
+        """
+        :return: the closest (distance, index) pairs, ordered by distance and then by index
+        """
+        return sorted((-negative_distance, -negative_index) for negative_distance, negative_index in self._heap)
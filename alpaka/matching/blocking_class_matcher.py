@@ -0,0 +1,162 @@
+import math
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import simhash
+
+from alpaka.class_signature.distance import WeightedSignatureDistanceCalculator
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.matching.base import BoundedNearest, Match
+from alpaka.matching.class_matcher import ClassMatcher
+
+# (superclass hash, implemented interfaces count, implemented interfaces simhash)
+BlockKey = Tuple[int, int, int]
+
+
+class SignatureBlocks:
+
+    """
+    Partitions signatures to blocks of equal superclass hash and implemented interfaces,
+    the terms that WeightedSignatureDistanceCalculator weights the most.
+    Obfuscated superclass and interface names are already left out of the signatures, so they do not split blocks.
+
+    All of the signatures of a block have the same superclass and interfaces terms of the distance to a query,
+    so the sum of these terms is a lower bound of the distance to every signature of the block.
+    A query visits the blocks in ascending lower bound, starting from the block of the query,
+    and only widens to the next block while its lower bound is within the farthest of the closest signatures
+    found so far, so the result is exact.
+    """
+
+    def __init__(self, signatures: Sequence[ClassSignature], distance_calculator: WeightedSignatureDistanceCalculator):
+        self._signatures = signatures
+        self._distance_calculator = distance_calculator
+        # The indices of the signatures of each block, grouped by identical signatures
+        blocks: Dict[BlockKey, Dict[tuple, List[int]]] = dict()
+        for index, signature in enumerate(signatures):
+            blocks.setdefault(self.get_block_key(signature), dict()).setdefault(signature.to_tuple(), []).append(index)
+        self._block_keys = list(blocks)
+        self._blocks = [list(signature_groups.values()) for signature_groups in blocks.values()]
+        self._block_sizes = [
+            sum(len(signature_group) for signature_group in signature_groups) for signature_groups in self._blocks
+        ]
+        # The blocks in the order a query visits them, by the block key of the query
+        self._visiting_orders: Dict[BlockKey, List[Tuple[float, int]]] = dict()
+        self.distance_evaluations = 0
+        self.skipped_signatures = 0
+
+    @staticmethod
+    def get_block_key(signature: ClassSignature) -> BlockKey:
+        return (
+            signature.superclass_hash,
+            signature.implemented_interfaces_count,
+            signature.implemented_interfaces_simhash,
+        )
+
+    @property
+    def block_sizes(self) -> List[int]:
+        return list(self._block_sizes)
+
+    def query(self, signature: ClassSignature, count: int) -> List[Tuple[float, int]]:
+        """
+        Find the closest signatures to the given signature.
+
+        :return: the (distance, index) pairs of the `count` closest signatures, see BoundedNearest.to_list
+        """
+        if count <= 0:
+            return []
+        closest = BoundedNearest(count)
+        visiting_order = self._get_visiting_order(signature)
+        for visited_blocks_count, (lower_bound, block_index) in enumerate(visiting_order):
+            if closest.is_beyond(lower_bound):
+                # The blocks are visited in ascending lower bound, so all of the remaining blocks are beyond too
+                self.skipped_signatures += sum(
+                    self._block_sizes[skipped_block_index]
+                    for _, skipped_block_index in visiting_order[visited_blocks_count:]
+                )
+                break
+            self._search_block(self._blocks[block_index], signature, closest)
+        return closest.to_list()
+
+    def _get_visiting_order(self, signature: ClassSignature) -> List[Tuple[float, int]]:
+        """
+        :return: the (lower bound, block index) pairs of all of the blocks, in ascending lower bound
+        """
+        block_key = self.get_block_key(signature)
+        visiting_order = self._visiting_orders.get(block_key)
+        if visiting_order is None:
+            visiting_order = self._visiting_orders[block_key] = sorted(
+                (self._calc_lower_bound(block_key, other_block_key), block_index)
+                for block_index, other_block_key in enumerate(self._block_keys)
+            )
+        return visiting_order
+
+    def _calc_lower_bound(self, block_key: BlockKey, other_block_key: BlockKey) -> float:
+        """
+        :return: the superclass and interfaces terms of the distance between signatures of the two blocks
+        """
+        superclass_hash, interfaces_count, interfaces_simhash = block_key
+        other_superclass_hash, other_interfaces_count, other_interfaces_simhash = other_block_key
+        distance_calculator = self._distance_calculator
+        return (
+            distance_calculator.implemented_interfaces_count_weight * abs(other_interfaces_count - interfaces_count)
+            + distance_calculator.implemented_interfaces_simhash_weight
+            * simhash.num_differing_bits(interfaces_simhash, other_interfaces_simhash)
+            + (distance_calculator.superclass_hash_weight if other_superclass_hash != superclass_hash else 0)
+        )
+
+    def _search_block(
+            self,
+            signature_groups: List[List[int]],
+            signature: ClassSignature,
+            closest: BoundedNearest,
+    ):
+        for signature_group in signature_groups:
+            group_signature = self._signatures[signature_group[0]]
+            self.distance_evaluations += 1
+            if not closest.is_full():
+                distance = self._distance_calculator.distance(signature, group_signature)
+            else:
+                distance = self._distance_calculator.bounded_distance(
+                    signature, group_signature, closest.farthest_distance
+                )
+                if distance == math.inf:
+                    continue
+            for index in signature_group:
+                closest.offer(distance, index)
+
+
+class BlockingClassMatcher(ClassMatcher):
+    """
+    A ClassMatcher that partitions pool2 to SignatureBlocks by superclass and implemented interfaces,
+    and searches the block of each class first, widening to other blocks only while they may hold closer classes.
+    The matches are identical to the ones ClassMatcher finds.
+    """
+
+    def _match_by_signature(self, pool1, pool2):
+        """
+        For each class in pool1 query the blocks of pool2 for the closest classes.
+        """
+        class_matches = dict()
+        classes2 = list(pool2.values())
+        blocks = SignatureBlocks([class_info.signature for class_info in classes2], self._signature_distance_calculator)
+        self.statistics.update(self._get_block_size_distribution(blocks.block_sizes))
+        for class_name, class_info in pool1.items():
+            class_matches[class_name] = [
+                Match(class_info, classes2[index], distance)
+                for distance, index in blocks.query(class_info.signature, self.maximum_matches_per_class)
+            ]
+        self.statistics['blocking_distance_evaluations'] += blocks.distance_evaluations
+        self.statistics['blocking_skipped_pairs'] += blocks.skipped_signatures
+        self.statistics['blocking_brute_force_distance_evaluations'] += len(pool1) * len(classes2)
+        return class_matches
+
+    @staticmethod
+    def _get_block_size_distribution(block_sizes: List[int]) -> Counter:
+        """
+        :return: the number of blocks, and the number of blocks in each power of 2 range of sizes
+        """
+        block_size_distribution = Counter(blocking_blocks=len(block_sizes))
+        for block_size in block_sizes:
+            range_start = 1 << (block_size.bit_length() - 1)
+            block_size_distribution[f'blocking_blocks_of_{range_start}_to_{2 * range_start - 1}_classes'] += 1
+        return block_size_distribution
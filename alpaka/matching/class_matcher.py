@@ -1,5 +1,7 @@
 import heapq
-from typing import Dict
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
 
 from alpaka.apk.class_info import ClassInfo
 from alpaka.apk.class_pool import ClassPool
@@ -7,6 +9,9 @@ from alpaka.class_signature.distance import SignatureDistanceCalculator
 from alpaka.config import MAXIMUM_SIGNATURE_MATCHES
 from alpaka.matching.base import Matcher, MatchingResult, Match
 
+# The (index, class) pairs of candidates with identical signatures
+CandidateGroup = List[Tuple[int, ClassInfo]]
+
 
 class ClassMatcher(Matcher[ClassInfo]):
     """
@@ -19,22 +24,45 @@ class ClassMatcher(Matcher[ClassInfo]):
             self,
             signature_distance_calculator: SignatureDistanceCalculator,
             maximum_matches_per_class=MAXIMUM_SIGNATURE_MATCHES,
+            match_identical_signatures: bool = False,
     ):
+        """
+        :param match_identical_signatures: before searching for the closest signatures, match every class whose
+        signature appears exactly once in each pool to the class with the identical signature
+        """
         self.maximum_matches_per_class = maximum_matches_per_class
+        self.match_identical_signatures = match_identical_signatures
         self._signature_distance_calculator = signature_distance_calculator
+        self.statistics = Counter()
 
     def match(self, pool1: ClassPool, pool2: ClassPool, match_by_name: bool = True) -> MatchingResult[ClassInfo]:
         """
         Iterates through all classes and tries to find matches by name
+        Then, if enabled, match the classes that have a unique identical signature in the other pool
         Then try to find matches on all the remaining classes pool by signatures distance
         """
         pool1 = dict(pool1)
         pool2 = dict(pool2)
+        class_matches = self.prematch(pool1, pool2, match_by_name)
+        class_matches.update(self._match_by_signature(pool1, pool2))
+        return MatchingResult(class_matches, (dict(), dict()))
+
+    def prematch(
+            self,
+            pool1: Dict[str, ClassInfo],
+            pool2: Dict[str, ClassInfo],
+            match_by_name: bool,
+    ) -> Dict[str, List[Match[ClassInfo]]]:
+        """
+        Match the classes by name if match_by_name, and then by a unique identical signature if enabled,
+        and remove the matched classes from both pools, leaving the rest to the search by signature distance.
+        """
         class_matches = dict()
         if match_by_name:
             class_matches.update(self._match_by_name(pool1, pool2))
-        class_matches.update(self._match_by_signature(pool1, pool2))
-        return MatchingResult(class_matches, (dict(), dict()))
+        if self.match_identical_signatures:
+            class_matches.update(self._match_by_identical_signature(pool1, pool2))
+        return class_matches
 
     def _match_by_name(self, pool1: Dict[str, ClassInfo], pool2: Dict[str, ClassInfo]):
         class_matches = dict()
@@ -46,30 +74,129 @@ class ClassMatcher(Matcher[ClassInfo]):
             if matching_class is None or matching_class.is_obfuscated_name:
                 continue
             distance = self._signature_distance_calculator.distance(class_info.signature, matching_class.signature)
-            class_matches[class_key] = [(Match(class_info, matching_class, distance))]
+            identical = class_info.signature == matching_class.signature
+            class_matches[class_key] = [(Match(class_info, matching_class, distance, identical))]
             del pool1[class_key]
             del pool2[class_key]
         return class_matches
 
+    def _match_by_identical_signature(self, pool1: Dict[str, ClassInfo], pool2: Dict[str, ClassInfo]):
+        """
+        Match every class whose signature appears exactly once in pool1 and exactly once in pool2,
+        and remove the matched classes from both pools.
+        Classes sharing their signature with other classes are left to the search by signature distance.
+        """
+        class_names_per_signature1 = self._group_by_signature(pool1)
+        class_names_per_signature2 = self._group_by_signature(pool2)
+        class_matches = dict()
+        for signature_key, class_names1 in class_names_per_signature1.items():
+            class_names2 = class_names_per_signature2.get(signature_key)
+            if len(class_names1) != 1 or class_names2 is None or len(class_names2) != 1:
+                continue
+            class_info = pool1.pop(class_names1[0])
+            matching_class = pool2.pop(class_names2[0])
+            distance = self._signature_distance_calculator.distance(class_info.signature, matching_class.signature)
+            class_matches[class_names1[0]] = [Match(class_info, matching_class, distance, identical=True)]
+        self.statistics['identical_signature_matches'] += len(class_matches)
+        return class_matches
+
+    @staticmethod
+    def _group_by_signature(pool: Dict[str, ClassInfo]) -> Dict[tuple, List[str]]:
+        class_names_per_signature = defaultdict(list)
+        for class_name, class_info in pool.items():
+            class_names_per_signature[class_info.signature.to_tuple()].append(class_name)
+        return class_names_per_signature
+
     def _match_by_signature(self, pool1, pool2):
         """
         For each class in old_classes_pool find the closest classes in the new_classes_pool.
+        The classes of new_classes_pool are grouped by their signature, so the distance to a signature
+        shared by many classes is computed once.
         """
         class_matches = dict()
+        candidate_groups = self._group_candidates(pool2.values())
         for class_name, class_info in pool1.items():
-            distances_per_class = {
-                possible_match:
-                    self._signature_distance_calculator.distance(class_info.signature, possible_match.signature)
-                for possible_match in pool2.values()
-            }
-            closest_distances_per_class = heapq.nsmallest(
-                self.maximum_matches_per_class,
-                distances_per_class.items(),
-                key=lambda distance_per_class: distance_per_class[1]
-            )
-
-            class_matches[class_name] = [
-                Match(class_info, matching_class, distance)
-                for matching_class, distance in closest_distances_per_class
-            ]
+            class_matches[class_name] = self._find_closest_in_groups(class_info, candidate_groups)
         return class_matches
+
+    def _find_closest_classes(self, class_info: ClassInfo, candidates: Iterable[ClassInfo]) -> List[Match[ClassInfo]]:
+        """
+        Find the closest classes to class_info out of the given candidates.
+        """
+        return self._find_closest_in_groups(
+            class_info,
+            [[(candidate_index, candidate)] for candidate_index, candidate in enumerate(candidates)],
+        )
+
+    @staticmethod
+    def _group_candidates(candidates: Iterable[ClassInfo]) -> List[CandidateGroup]:
+        """
+        Group the candidates by their signature, keeping the index of each candidate.
+        """
+        candidate_groups = dict()
+        for candidate_index, candidate in enumerate(candidates):
+            candidate_groups.setdefault(candidate.signature.to_tuple(), []).append((candidate_index, candidate))
+        return list(candidate_groups.values())
+
+    def _find_closest_in_groups(
+            self,
+            class_info: ClassInfo,
+            candidate_groups: List[CandidateGroup],
+    ) -> List[Match[ClassInfo]]:
+        """
+        Find the closest classes to class_info out of the given groups of candidates with identical signatures.
+
+        Keeps the closest groups found so far in a bounded heap, and skips the groups farther than all of them.
+        Ties are broken by the order of the candidates, the same way heapq.nsmallest does.
+        """
+        if self.maximum_matches_per_class <= 0:
+            return []
+        signature = class_info.signature
+        # A max-heap of (-distance, group index), its top is the farthest of the closest groups
+        closest_groups = []
+        closest_candidates_count = 0
+        closest_candidates_per_distance = Counter()
+        compared_pairs = 0
+        deduplicated_pairs = 0
+        pruned_pairs = 0
+        for group_index, candidate_group in enumerate(candidate_groups):
+            compared_pairs += len(candidate_group)
+            deduplicated_pairs += len(candidate_group) - 1
+            candidate_signature = candidate_group[0][1].signature
+            if closest_candidates_count < self.maximum_matches_per_class:
+                distance = self._signature_distance_calculator.distance(signature, candidate_signature)
+            else:
+                farthest_distance = -closest_groups[0][0]
+                distance = self._signature_distance_calculator.bounded_distance(
+                    signature, candidate_signature, farthest_distance
+                )
+                if distance == math.inf:
+                    pruned_pairs += len(candidate_group)
+                    continue
+                # A candidate at the same distance may still come before one of the kept candidates
+                if distance > farthest_distance:
+                    continue
+            heapq.heappush(closest_groups, (-distance, group_index))
+            closest_candidates_count += len(candidate_group)
+            closest_candidates_per_distance[distance] += len(candidate_group)
+            # Drop the farthest groups while the closer ones hold enough candidates.
+            # Groups at the same distance are dropped together, since their candidates are interleaved.
+            farthest_distance = -closest_groups[0][0]
+            while closest_candidates_count - closest_candidates_per_distance[farthest_distance] \
+                    >= self.maximum_matches_per_class:
+                closest_candidates_count -= closest_candidates_per_distance.pop(farthest_distance)
+                while -closest_groups[0][0] == farthest_distance:
+                    heapq.heappop(closest_groups)
+                farthest_distance = -closest_groups[0][0]
+        self.statistics['compared_pairs'] += compared_pairs
+        self.statistics['deduplicated_pairs'] += deduplicated_pairs
+        self.statistics['pruned_pairs'] += pruned_pairs
+        closest = sorted(
+            (-negative_distance, candidate_index, candidate)
+            for negative_distance, group_index in closest_groups
+            for candidate_index, candidate in candidate_groups[group_index]
+        )
+        return [
+            Match(class_info, matching_class, distance)
+            for distance, _, matching_class in closest[:self.maximum_matches_per_class]
+        ]
@@ -0,0 +1,154 @@
+import bisect
+import math
+from itertools import accumulate
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from alpaka.class_signature.distance import WeightedSignatureDistanceCalculator
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.matching.base import BoundedNearest, Match
+from alpaka.matching.class_matcher import ClassMatcher
+
+
+class SortedCountsIndex:
+
+    """
+    Keeps signatures sorted by their instructions count, along with their other count fields.
+
+    The count terms of WeightedSignatureDistanceCalculator are `weight * |count1 - count2|`, so their sum is a lower
+    bound of the distance, and the instructions count term alone is a lower bound that grows the farther a signature
+    is from the query in the sorted order.
+    A query scans outward from the position of its instructions count, skips the signatures whose count terms
+    are beyond the farthest of the closest signatures found so far, and stops once the instructions count term is,
+    so the result is exact.
+    """
+
+    COUNT_FIELDS = (
+        'instructions_count',
+        'member_count',
+        'method_count',
+        'implemented_interfaces_count',
+        'string_literals_count',
+    )
+
+    def __init__(self, signatures: Sequence[ClassSignature], distance_calculator: WeightedSignatureDistanceCalculator):
+        self._signatures = signatures
+        self._distance_calculator = distance_calculator
+        self._instructions_count_weight = distance_calculator.instructions_count_weight
+        self._count_weights = np.array(
+            [getattr(distance_calculator, f'{count_field}_weight') for count_field in self.COUNT_FIELDS],
+            dtype=np.float64,
+        )
+        # The indices of the signatures grouped by identical signatures, sorted by the instructions count
+        signature_groups: Dict[tuple, List[int]] = dict()
+        for index, signature in enumerate(signatures):
+            signature_groups.setdefault(signature.to_tuple(), []).append(index)
+        self._signature_groups = sorted(
+            signature_groups.values(), key=lambda signature_group: signatures[signature_group[0]].instructions_count
+        )
+        self._instructions_counts = [
+            signatures[signature_group[0]].instructions_count for signature_group in self._signature_groups
+        ]
+        # The count fields of the groups, a row per group in the sorted order
+        self._counts = np.array(
+            [self._get_counts(signatures[signature_group[0]]) for signature_group in self._signature_groups],
+            dtype=np.int64,
+        ).reshape(len(self._signature_groups), len(self.COUNT_FIELDS))
+        # The number of signatures before each position, to count the signatures a query skips at once
+        self._signatures_before = [0] + list(accumulate(map(len, self._signature_groups)))
+        self.distance_evaluations = 0
+        self.skipped_signatures = 0
+
+    def _get_counts(self, signature: ClassSignature) -> Tuple[int, ...]:
+        return tuple(getattr(signature, count_field) for count_field in self.COUNT_FIELDS)
+
+    def query(self, signature: ClassSignature, count: int) -> List[Tuple[float, int]]:
+        """
+        Find the closest signatures to the given signature.
+
+        :return: the (distance, index) pairs of the `count` closest signatures, see BoundedNearest.to_list
+        """
+        if count <= 0:
+            return []
+        closest = BoundedNearest(count)
+        # The sum of the count terms of the distance to each group, computed for all of the groups at once
+        lower_bounds = (
+            np.abs(self._counts - np.array(self._get_counts(signature), dtype=np.int64)) @ self._count_weights
+        ).tolist()
+        instructions_count = signature.instructions_count
+        instructions_counts = self._instructions_counts
+        instructions_count_weight = self._instructions_count_weight
+        signature_groups = self._signature_groups
+        groups_count = len(signature_groups)
+        lower_position = bisect.bisect_left(instructions_counts, instructions_count) - 1
+        upper_position = lower_position + 1
+        bound = math.inf
+        distance_evaluations = 0
+        skipped_signatures = 0
+        while lower_position >= 0 or upper_position < groups_count:
+            lower_difference = instructions_count - instructions_counts[lower_position] \
+                if lower_position >= 0 else math.inf
+            upper_difference = instructions_counts[upper_position] - instructions_count \
+                if upper_position < groups_count else math.inf
+            if lower_difference <= upper_difference:
+                position = lower_position
+                instructions_count_term = instructions_count_weight * lower_difference
+            else:
+                position = upper_position
+                instructions_count_term = instructions_count_weight * upper_difference
+            if instructions_count_term > bound:
+                # The next signatures on both sides differ by at least as many instructions
+                skipped_signatures += self._signatures_before[lower_position + 1] \
+                    + self._signatures_before[groups_count] - self._signatures_before[upper_position]
+                break
+            if position == lower_position:
+                lower_position -= 1
+            else:
+                upper_position += 1
+            signature_group = signature_groups[position]
+            if lower_bounds[position] > bound:
+                skipped_signatures += len(signature_group)
+                continue
+            distance_evaluations += 1
+            group_signature = self._signatures[signature_group[0]]
+            if bound == math.inf:
+                distance = self._distance_calculator.distance(signature, group_signature)
+            else:
+                distance = self._distance_calculator.bounded_distance(
+                    signature, group_signature, closest.farthest_distance
+                )
+                if distance == math.inf:
+                    continue
+            for index in signature_group:
+                closest.offer(distance, index)
+            # Until there are `count` closest signatures, the bound is math.inf
+            bound = closest.get_bound()
+        self.distance_evaluations += distance_evaluations
+        self.skipped_signatures += skipped_signatures
+        return closest.to_list()
+
+
+class CountRangeClassMatcher(ClassMatcher):
+    """
+    A ClassMatcher that indexes pool2 in a SortedCountsIndex, and finds the closest classes scanning outward
+    from the instructions count of each class, skipping the classes whose counts are too far.
+    The matches are identical to the ones ClassMatcher finds.
+    """
+
+    def _match_by_signature(self, pool1, pool2):
+        """
+        For each class in pool1 query the sorted counts of pool2 for the closest classes.
+        """
+        class_matches = dict()
+        classes2 = list(pool2.values())
+        index = SortedCountsIndex([class_info.signature for class_info in classes2], self._signature_distance_calculator)
+        for class_name, class_info in pool1.items():
+            class_matches[class_name] = [
+                Match(class_info, classes2[class_index], distance)
+                for distance, class_index in index.query(class_info.signature, self.maximum_matches_per_class)
+            ]
+        self.statistics['count_range_distance_evaluations'] += index.distance_evaluations
+        self.statistics['count_range_skipped_pairs'] += index.skipped_signatures
+        self.statistics['count_range_brute_force_distance_evaluations'] += len(pool1) * len(classes2)
+        return class_matches
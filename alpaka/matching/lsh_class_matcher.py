@@ -0,0 +1,129 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from alpaka.class_signature.distance import SignatureDistanceCalculator
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.config import MAXIMUM_SIGNATURE_MATCHES
+from alpaka.matching.class_matcher import ClassMatcher
+
+SIMHASH_BITS = 64
+
+
+class SimhashLshIndex:
+
+    """
+    A locality-sensitive index over the simhash fields of class signatures.
+
+    Every simhash is split into `bands_count` bit bands and each band is kept in its own table,
+    so two simhashes that differ in less than `bands_count` bits are guaranteed to share a band.
+    Buckets holding more than `maximum_bucket_size` signatures (e.g. the empty simhash 0) are ignored on lookup,
+    since they do not narrow down the search.
+    """
+
+    def __init__(
+            self,
+            signatures: Sequence[ClassSignature],
+            simhash_fields: Iterable[str],
+            bands_count: int,
+            maximum_bucket_size: int,
+    ):
+        if not 0 < bands_count <= SIMHASH_BITS:
+            raise ValueError(f"Bands count must be between 1 and {SIMHASH_BITS}")
+        self._simhash_fields = tuple(simhash_fields)
+        self._bands = self._calc_bands(bands_count)
+        self._maximum_bucket_size = maximum_bucket_size
+        self._tables: Dict[Tuple[str, int], Dict[int, List[int]]] = dict()
+        for index, signature in enumerate(signatures):
+            for table_key, band_value in self._iterate_bands(signature):
+                self._tables.setdefault(table_key, dict()).setdefault(band_value, []).append(index)
+
+    @staticmethod
+    def _calc_bands(bands_count: int) -> List[Tuple[int, int]]:
+        """
+        :return: a (shift, mask) pair for each band
+        """
+        band_width, remainder = divmod(SIMHASH_BITS, bands_count)
+        bands = []
+        shift = 0
+        for band in range(bands_count):
+            width = band_width + (1 if band < remainder else 0)
+            bands.append((shift, (1 << width) - 1))
+            shift += width
+        return bands
+
+    def _iterate_bands(self, signature: ClassSignature):
+        for field_name in self._simhash_fields:
+            simhash_value = getattr(signature, field_name)
+            for band, (shift, mask) in enumerate(self._bands):
+                yield (field_name, band), (simhash_value >> shift) & mask
+
+    def query(self, signature: ClassSignature) -> List[int]:
+        """
+        :return: the sorted indices of the indexed signatures sharing at least one band with the given signature
+        """
+        candidates = set()
+        for table_key, band_value in self._iterate_bands(signature):
+            bucket = self._tables.get(table_key, dict()).get(band_value)
+            if bucket is not None and len(bucket) <= self._maximum_bucket_size:
+                candidates.update(bucket)
+        return sorted(candidates)
+
+
+class LshClassMatcher(ClassMatcher):
+    """
+    A ClassMatcher that computes signature distances only against the candidates found by a SimhashLshIndex,
+    instead of against every class of the other pool.
+    Classes with no candidates fall back to a comparison against the whole pool.
+
+    Much faster than ClassMatcher on large pools, but the matches are approximate:
+    a close class that shares no simhash band with the matched class can be missed.
+    """
+
+    SIMHASH_FIELDS = (
+        'instructions_simhash',
+        'instruction_shingles_simhash',
+        'methods_params_simhash',
+        'methods_returns_simhash',
+        'string_literals_simhash',
+    )
+    BANDS_COUNT = 4
+    MAXIMUM_BUCKET_SIZE = 500
+
+    def __init__(
+            self,
+            signature_distance_calculator: SignatureDistanceCalculator,
+            maximum_matches_per_class=MAXIMUM_SIGNATURE_MATCHES,
+            simhash_fields: Iterable[str] = SIMHASH_FIELDS,
+            bands_count: int = BANDS_COUNT,
+            maximum_bucket_size: int = MAXIMUM_BUCKET_SIZE,
+            match_identical_signatures: bool = False,
+    ):
+        super(LshClassMatcher, self).__init__(
+            signature_distance_calculator, maximum_matches_per_class, match_identical_signatures
+        )
+        self._simhash_fields = tuple(simhash_fields)
+        self._bands_count = bands_count
+        self._maximum_bucket_size = maximum_bucket_size
+
+    def _match_by_signature(self, pool1, pool2):
+        """
+        For each class in pool1 find the closest classes out of its LSH candidates in pool2.
+        """
+        class_matches = dict()
+        classes2 = list(pool2.values())
+        index = SimhashLshIndex(
+            [class_info.signature for class_info in classes2],
+            self._simhash_fields,
+            self._bands_count,
+            self._maximum_bucket_size,
+        )
+        for class_name, class_info in pool1.items():
+            candidate_indices = index.query(class_info.signature)
+            self.statistics['lsh_queries'] += 1
+            self.statistics['lsh_candidates'] += len(candidate_indices)
+            if candidate_indices:
+                candidates = [classes2[candidate_index] for candidate_index in candidate_indices]
+            else:
+                self.statistics['lsh_brute_force_fallbacks'] += 1
+                candidates = classes2
+            class_matches[class_name] = self._find_closest_classes(class_info, candidates)
+        return class_matches
@@ -0,0 +1,142 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from alpaka.apk.class_info import ClassInfo
+from alpaka.apk.class_pool import ClassPool
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.matching.base import Match
+from alpaka.matching.class_matcher import ClassMatcher
+
+PoolPair = Tuple[ClassPool, ClassPool, bool]
+# (pool1, pool2, match_by_name, match_identical_signatures)
+MatchingJob = Tuple[Dict[str, ClassInfo], Dict[str, ClassInfo], bool, bool]
+SignatureRecordPool = Dict[str, 'ClassSignatureRecord']
+NamedMatches = Dict[str, List[Tuple[str, float, bool]]]
+
+
+@dataclass(eq=False)
+class ClassSignatureRecord:
+    """
+    The picklable part of a ClassInfo that the class matchers use, sent to the worker processes
+    instead of the androguard objects.
+    """
+    name: str
+    is_obfuscated_name: bool
+    signature: ClassSignature
+
+
+def _match_signature_records(
+        class_matcher: ClassMatcher,
+        pool1: SignatureRecordPool,
+        pool2: SignatureRecordPool,
+        match_by_name: bool,
+        match_identical_signatures: bool,
+) -> Tuple[NamedMatches, Counter]:
+    """
+    Runs in a worker process. Matches the records, and returns the matches by class names.
+    """
+    class_matcher.statistics = Counter()
+    class_matcher.match_identical_signatures = match_identical_signatures
+    matching_result = class_matcher.match(pool1, pool2, match_by_name)
+    named_matches = {
+        class_name: [(match.item2.name, match.match_rank, match.identical) for match in class_matches]
+        for class_name, class_matches in matching_result.matches.items()
+    }
+    return named_matches, class_matcher.statistics
+
+
+class ParallelClassMatcher:
+    """
+    Runs the matching of a ClassMatcher over multiple pairs of class pools on worker processes.
+
+    Every pool pair is a separate job, and pairs larger than MINIMUM_SPLIT_PAIRS are split to chunks of pool1,
+    each matched against the whole pool2. The results are merged back in the order of the pairs,
+    so the matches are identical (including their order) to the ones of matching the pairs one after another.
+    Matching by name and by identical signatures is done on the whole pair before it is split.
+    """
+
+    MINIMUM_SPLIT_PAIRS = 1_000_000
+    CHUNKS_PER_JOB = 4
+
+    def __init__(self, class_matcher: ClassMatcher, jobs: int, minimum_split_pairs: int = MINIMUM_SPLIT_PAIRS):
+        if jobs < 1:
+            raise ValueError(f"Jobs count must be positive, got {jobs}")
+        self._class_matcher = class_matcher
+        self._jobs = jobs
+        self._minimum_split_pairs = minimum_split_pairs
+
+    def match(self, pool_pairs: Iterable[PoolPair]) -> Dict[str, List[Match[ClassInfo]]]:
+        """
+        Match the classes of every (pool1, pool2, match_by_name) pair.
+        """
+        return dict(self.iter_matches(pool_pairs))
+
+    def iter_matches(self, pool_pairs: Iterable[PoolPair]) -> Iterator[Tuple[str, List[Match[ClassInfo]]]]:
+        """
+        Like match, but yields the (class name, matches) pairs of each part as soon as it and the parts before it
+        are matched.
+        """
+        parts: List[Union[Dict[str, List[Match[ClassInfo]]], MatchingJob]] = []
+        for pool1, pool2, match_by_name in pool_pairs:
+            parts.extend(self._split_pool_pair(dict(pool1), dict(pool2), match_by_name))
+
+        # Chunks of the same pair share their pool2 records
+        records_cache = dict()
+        with ProcessPoolExecutor(max_workers=self._jobs) as executor:
+            futures = [
+                executor.submit(
+                    _match_signature_records,
+                    self._class_matcher,
+                    self._get_records(part[0], records_cache),
+                    self._get_records(part[1], records_cache),
+                    part[2],
+                    part[3],
+                )
+                if isinstance(part, tuple) else None
+                for part in parts
+            ]
+            for part, future in zip(parts, futures):
+                if future is None:
+                    yield from part.items()
+                    continue
+                named_matches, statistics = future.result()
+                self._class_matcher.statistics.update(statistics)
+                yield from self._restore_matches(named_matches, part[0], part[1]).items()
+
+    def _split_pool_pair(self, pool1: Dict[str, ClassInfo], pool2: Dict[str, ClassInfo], match_by_name: bool):
+        if len(pool1) * len(pool2) < self._minimum_split_pairs:
+            return [(pool1, pool2, match_by_name, self._class_matcher.match_identical_signatures)]
+        # Matched up front, so classes matched by name are not matched by signature in other chunks,
+        # and the uniqueness of an identical signature is decided over the whole pair, not over a chunk
+        parts = [self._class_matcher.prematch(pool1, pool2, match_by_name)]
+        pool1_items = list(pool1.items())
+        chunks_count = self._jobs * self.CHUNKS_PER_JOB
+        chunk_size = max(1, -(-len(pool1_items) // chunks_count))
+        for chunk_start in range(0, len(pool1_items), chunk_size):
+            parts.append((dict(pool1_items[chunk_start:chunk_start + chunk_size]), pool2, False, False))
+        return parts
+
+    @staticmethod
+    def _get_records(pool: Dict[str, ClassInfo], records_cache: Dict[int, SignatureRecordPool]) -> SignatureRecordPool:
+        if id(pool) not in records_cache:
+            records_cache[id(pool)] = {
+                class_name: ClassSignatureRecord(class_name, class_info.is_obfuscated_name, class_info.signature)
+                for class_name, class_info in pool.items()
+            }
+        return records_cache[id(pool)]
+
+    @staticmethod
+    def _restore_matches(
+            named_matches: NamedMatches,
+            pool1: Dict[str, ClassInfo],
+            pool2: Dict[str, ClassInfo],
+    ) -> Dict[str, List[Match[ClassInfo]]]:
+        return {
+            class_name: [
+                Match(pool1[class_name], pool2[matching_class_name], distance, identical)
+                for matching_class_name, distance, identical in class_matches
+            ]
+            for class_name, class_matches in named_matches.items()
+        }
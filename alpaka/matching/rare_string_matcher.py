@@ -0,0 +1,171 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from alpaka.apk.class_info import ClassInfo
+from alpaka.apk.class_pool import ClassPool
+from alpaka.class_signature.distance import SignatureDistanceCalculator
+from alpaka.class_signature.string_literal_index import StringLiteralIndex
+from alpaka.config import MAXIMUM_RARE_STRING_CANDIDATES, MAXIMUM_RARE_STRING_LITERAL_CLASSES, \
+    MAXIMUM_RARE_STRING_MATCH_DISTANCE
+from alpaka.matching.base import Match, Matcher, MatchingResult
+
+# (weight, class name) pairs of the candidates of a class
+WeightedCandidates = List[Tuple[float, str]]
+
+
+class RareStringLiteralMatcher(Matcher[ClassInfo]):
+    """
+    Matches the classes sharing rare string literals, like log tags, URLs and error messages,
+    which renamed and obfuscated classes usually keep.
+
+    An inverted index from every string literal to the classes of both pools loading it is built,
+    and the literals loaded by at most maximum_literal_classes classes are weighted by their rarity (IDF).
+    Every class is compared by signature distance only to the classes of the other pool sharing the highest total
+    weight of rare literals with it. Two classes are matched when each one is the closest candidate of the other,
+    and their distance is within maximum_distance, so unrelated classes sharing a literal (like a copied log tag)
+    are not matched. The other classes are left unmatched, for the search over the whole pools.
+
+    Like the matching by name, a matched class has a single match, rather than up to maximum_matches_per_class.
+    """
+
+    def __init__(
+            self,
+            signature_distance_calculator: SignatureDistanceCalculator,
+            string_literal_index: StringLiteralIndex,
+            maximum_literal_classes: int = MAXIMUM_RARE_STRING_LITERAL_CLASSES,
+            maximum_candidates: int = MAXIMUM_RARE_STRING_CANDIDATES,
+            maximum_distance: float = MAXIMUM_RARE_STRING_MATCH_DISTANCE,
+    ):
+        """
+        :param maximum_literal_classes: a literal is rare when at most this many classes of both pools load it
+        :param maximum_candidates: the number of classes sharing rare literals with a class it is compared to
+        :param maximum_distance: the maximum signature distance of matched classes
+        """
+        self._signature_distance_calculator = signature_distance_calculator
+        self._string_literal_index = string_literal_index
+        self.maximum_literal_classes = maximum_literal_classes
+        self.maximum_candidates = maximum_candidates
+        self.maximum_distance = maximum_distance
+        self.statistics = Counter()
+
+    def match(self, pool1: ClassPool, pool2: ClassPool, match_by_name: bool = True) -> MatchingResult[ClassInfo]:
+        """
+        :param match_by_name: leave the classes that would be matched by name to the matching by name
+        :return: the matches, and the classes of the pools that were not matched
+        """
+        # The matched classes are popped from the copies, the signatures are looked up in the original pools
+        unmatched_pool1 = dict(pool1)
+        unmatched_pool2 = dict(pool2)
+        name_matched_class_names = set()
+        if match_by_name:
+            name_matched_class_names = {
+                class_name for class_name, class_info in pool1.items()
+                if not class_info.is_obfuscated_name
+                and class_name in pool2 and not pool2[class_name].is_obfuscated_name
+            }
+        literal_class_names1 = self._index_string_literals(pool1, name_matched_class_names)
+        literal_class_names2 = self._index_string_literals(pool2, name_matched_class_names)
+        candidates1, candidates2 = self._get_weighted_candidates(
+            literal_class_names1, literal_class_names2, len(pool1) + len(pool2) - 2 * len(name_matched_class_names)
+        )
+
+        class_orders1 = {class_name: class_order for class_order, class_name in enumerate(pool1)}
+        class_orders2 = {class_name: class_order for class_order, class_name in enumerate(pool2)}
+        distances = dict()
+
+        def get_distance(class_name1: str, class_name2: str) -> float:
+            distance = distances.get((class_name1, class_name2))
+            if distance is None:
+                distance = distances[(class_name1, class_name2)] = self._signature_distance_calculator.distance(
+                    pool1[class_name1].signature, pool2[class_name2].signature
+                )
+            return distance
+
+        closest_classes2 = {
+            class_name2: self._find_closest_candidate(
+                class_candidates, class_orders1, lambda class_name1: get_distance(class_name1, class_name2)
+            )
+            for class_name2, class_candidates in candidates2.items()
+        }
+        class_matches = dict()
+        distant_pairs_count = 0
+        for class_name1, class_candidates in candidates1.items():
+            class_name2 = self._find_closest_candidate(
+                class_candidates, class_orders2, lambda candidate_name2: get_distance(class_name1, candidate_name2)
+            )
+            if closest_classes2[class_name2] != class_name1:
+                continue
+            distance = get_distance(class_name1, class_name2)
+            if distance > self.maximum_distance:
+                # Left to the search over the whole pools, which may find closer classes
+                distant_pairs_count += 1
+                continue
+            class_info = unmatched_pool1.pop(class_name1)
+            matching_class = unmatched_pool2.pop(class_name2)
+            identical = class_info.signature == matching_class.signature
+            class_matches[class_name1] = [Match(class_info, matching_class, distance, identical)]
+        self.statistics['rare_string_compared_pairs'] += len(distances)
+        self.statistics['rare_string_distant_pairs'] += distant_pairs_count
+        self.statistics['rare_string_matches'] += len(class_matches)
+        return MatchingResult(class_matches, (unmatched_pool1, unmatched_pool2))
+
+    def _index_string_literals(self, pool: ClassPool, skipped_class_names: Set[str]) -> Dict[str, List[str]]:
+        """
+        :return: the names of the classes loading each string literal, in the order of the pool
+        """
+        literal_class_names = defaultdict(list)
+        for class_name, class_info in pool.items():
+            if class_name in skipped_class_names:
+                continue
+            for string_literal in dict.fromkeys(self._string_literal_index.get_string_literals(class_info.analysis)):
+                literal_class_names[string_literal].append(class_name)
+        return literal_class_names
+
+    def _get_weighted_candidates(
+            self,
+            literal_class_names1: Dict[str, List[str]],
+            literal_class_names2: Dict[str, List[str]],
+            classes_count: int,
+    ) -> Tuple[Dict[str, WeightedCandidates], Dict[str, WeightedCandidates]]:
+        """
+        :return: the candidates of the classes of each pool, the classes of the other pool sharing rare literals
+        with them, with the total IDF of the shared rare literals as the weight
+        """
+        pair_weights = defaultdict(float)
+        rare_literals_count = 0
+        for string_literal, class_names1 in literal_class_names1.items():
+            class_names2 = literal_class_names2.get(string_literal)
+            if class_names2 is None:
+                continue
+            literal_classes_count = len(class_names1) + len(class_names2)
+            if literal_classes_count > self.maximum_literal_classes:
+                continue
+            rare_literals_count += 1
+            # Smoothed, so literals loaded by all of the classes of tiny pools are still weighted
+            weight = math.log(classes_count / literal_classes_count) + 1
+            for class_name1 in class_names1:
+                for class_name2 in class_names2:
+                    pair_weights[(class_name1, class_name2)] += weight
+        candidates1 = defaultdict(list)
+        candidates2 = defaultdict(list)
+        for (class_name1, class_name2), weight in pair_weights.items():
+            candidates1[class_name1].append((weight, class_name2))
+            candidates2[class_name2].append((weight, class_name1))
+        self.statistics['rare_string_literals'] += rare_literals_count
+        self.statistics['rare_string_candidate_pairs'] += len(pair_weights)
+        return candidates1, candidates2
+
+    def _find_closest_candidate(self, candidates: WeightedCandidates, class_orders: Dict[str, int], get_distance) -> str:
+        """
+        :return: the closest of the heaviest candidates, ties are broken by the weight and then by the pool order
+        """
+        heaviest_candidates = heapq.nsmallest(
+            self.maximum_candidates, candidates, key=lambda candidate: (-candidate[0], class_orders[candidate[1]])
+        )
+        _distance, _negative_weight, _class_order, closest_class_name = min(
+            (get_distance(class_name), -weight, class_orders[class_name], class_name)
+            for weight, class_name in heaviest_candidates
+        )
+        return closest_class_name
@@ -0,0 +1,67 @@
+import numpy as np
+
+from alpaka.class_signature.distance import WeightedSignatureDistanceCalculator
+from alpaka.class_signature.signature_array import SignatureArray
+from alpaka.class_signature.vectorized_distance import VectorizedSignatureDistanceCalculator
+from alpaka.config import MAXIMUM_SIGNATURE_MATCHES
+from alpaka.matching.base import Match
+from alpaka.matching.class_matcher import ClassMatcher
+
+
+def nsmallest_indices(distances: np.ndarray, count: int) -> np.ndarray:
+    """
+    Find the indices of the `count` smallest distances.
+    Equal distances are ordered by index, the same way heapq.nsmallest orders them.
+    """
+    if count <= 0:
+        return np.empty(0, dtype=np.intp)
+    if count < len(distances):
+        kth_distance = distances[np.argpartition(distances, count - 1)[count - 1]]
+        candidates = np.flatnonzero(distances <= kth_distance)
+    else:
+        candidates = np.arange(len(distances))
+    return candidates[np.argsort(distances[candidates], kind='stable')][:count]
+
+
+class VectorizedClassMatcher(ClassMatcher):
+    """
+    A ClassMatcher that packs the signatures of both pools into SignatureArrays
+    and computes the signature distances of a whole block of classes at once.
+    The matches are identical to the ones ClassMatcher finds.
+    """
+
+    # Maximal number of distances computed at once, bounds the memory used by a block
+    BLOCK_SIZE = 2 ** 20
+
+    def __init__(
+            self,
+            signature_distance_calculator: WeightedSignatureDistanceCalculator,
+            maximum_matches_per_class=MAXIMUM_SIGNATURE_MATCHES,
+            match_identical_signatures: bool = False,
+    ):
+        super(VectorizedClassMatcher, self).__init__(
+            signature_distance_calculator, maximum_matches_per_class, match_identical_signatures
+        )
+        self._vectorized_distance_calculator = VectorizedSignatureDistanceCalculator(signature_distance_calculator)
+
+    def _match_by_signature(self, pool1, pool2):
+        """
+        For each class in pool1 find the closest classes in pool2, one block of pool1 classes at a time.
+        """
+        class_matches = dict()
+        classes1 = list(pool1.items())
+        classes2 = list(pool2.values())
+        signatures1 = SignatureArray.from_signatures([class_info.signature for _, class_info in classes1])
+        signatures2 = SignatureArray.from_signatures([class_info.signature for class_info in classes2])
+        rows_per_block = max(1, self.BLOCK_SIZE // max(1, len(classes2)))
+        for block_start in range(0, len(classes1), rows_per_block):
+            block_end = block_start + rows_per_block
+            block_distances = self._vectorized_distance_calculator.distances(
+                signatures1[block_start:block_end], signatures2
+            )
+            for (class_name, class_info), distances in zip(classes1[block_start:block_end], block_distances):
+                class_matches[class_name] = [
+                    Match(class_info, classes2[index], float(distances[index]))
+                    for index in nsmallest_indices(distances, self.maximum_matches_per_class)
+                ]
+        return class_matches
@@ -1,14 +1,45 @@
 import abc
+from typing import Iterable
 
 
 class ObfuscationDetector(abc.ABC):
 
+    @property
+    def identity(self) -> str:
+        """
+        Identifies the configuration of the detector across processes.
+        Detectors whose verdicts depend on their parameters should include them.
+        """
+        return f'{type(self).__module__}.{type(self).__qualname__}'
+
+    @property
+    def is_name_only(self) -> bool:
+        """
+        Whether the verdicts depend on the names alone, so they hold for the same names in any apk.
+        Detectors whose verdicts depend on the analyzed apks should return False.
+        """
+        return True
+
     def is_class_name_obfuscated(self, class_name: str) -> bool:
         raise NotImplementedError()
 
     def is_package_name_obfuscated(self, package_name: str) -> bool:
         raise NotImplementedError()
 
+    def classify_classes(self, class_names: Iterable[str]) -> bytearray:
+        """
+        Classify many class names at once. Detectors override this when classifying in bulk is faster.
+
+        :return: a bitmap with a byte per class name, 1 if the name is obfuscated
+        """
+        return bytearray(self.is_class_name_obfuscated(class_name) for class_name in class_names)
+
+    def classify_packages(self, package_names: Iterable[str]) -> bytearray:
+        """
+        Like classify_classes, for package names.
+        """
+        return bytearray(self.is_package_name_obfuscated(package_name) for package_name in package_names)
+
 
 class DummyObfuscationDetector(ObfuscationDetector):
     """
@@ -19,6 +50,10 @@ class DummyObfuscationDetector(ObfuscationDetector):
     def __init__(self, is_obfuscated: bool):
         self._is_obfuscated: bool = is_obfuscated
 
+    @property
+    def identity(self) -> str:
+        return f'{super(DummyObfuscationDetector, self).identity}({self._is_obfuscated})'
+
     def is_class_name_obfuscated(self, class_name) -> bool:
         return self._is_obfuscated
 
@@ -0,0 +1,106 @@
+import json
+from typing import Callable, Iterable, List, Optional
+
+import enchant
+
+from alpaka.utils import write_json_atomically
+
+
+class EnglishDictionary:
+
+    """
+    A set of English words, shared by the obfuscation detectors of the process.
+
+    Every word is checked with enchant once, and the verdict is kept in memory,
+    so repeated lookups are set probes instead of calls into the enchant C library.
+    The verdicts can be saved to a file, and loaded by later runs.
+    """
+
+    LANGUAGE = 'en_US'
+    # Bump whenever the verdicts of the saved words may change, to invalidate the saved files
+    VERSION = 1
+
+    _shared_dictionary: Optional['EnglishDictionary'] = None
+
+    def __init__(self, check_word: Optional[Callable[[str], bool]] = None, cache_path: Optional[str] = None):
+        """
+        :param check_word: checks a word that was not looked up yet, enchant's dictionary of LANGUAGE by default
+        :param cache_path: a file of verdicts saved by a previous run, loaded now and overwritten by save
+        """
+        if check_word is None:
+            check_word = enchant.Dict(self.LANGUAGE).check
+        self._check_word = check_word
+        self._cache_path = cache_path
+        self._english_words = set()
+        self._non_english_words = set()
+        self._is_modified = False
+        if cache_path is not None:
+            self._load(cache_path)
+
+    @classmethod
+    def get_shared(cls) -> 'EnglishDictionary':
+        """
+        :return: the dictionary of the process, created on first use
+        """
+        if cls._shared_dictionary is None:
+            cls._shared_dictionary = cls()
+        return cls._shared_dictionary
+
+    @classmethod
+    def set_shared(cls, dictionary: 'EnglishDictionary'):
+        cls._shared_dictionary = dictionary
+
+    def check(self, word: str) -> bool:
+        if word in self._english_words:
+            return True
+        if word in self._non_english_words:
+            return False
+        is_english = bool(self._check_word(word))
+        if is_english:
+            self._english_words.add(word)
+        else:
+            self._non_english_words.add(word)
+        self._is_modified = True
+        return is_english
+
+    def check_many(self, words: Iterable[str]) -> List[bool]:
+        """
+        :return: whether each of the words is English, in the order of the words
+        """
+        english_words = self._english_words
+        non_english_words = self._non_english_words
+        return [
+            True if word in english_words else False if word in non_english_words else self.check(word)
+            for word in words
+        ]
+
+    def __len__(self):
+        return len(self._english_words) + len(self._non_english_words)
+
+    def _load(self, cache_path: str):
+        try:
+            with open(cache_path, 'r') as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            # A missing file is created on save, and a corrupted file is replaced
+            return
+        if not isinstance(cache, dict) or cache.get('version') != self.VERSION \
+                or cache.get('language') != self.LANGUAGE:
+            return
+        self._english_words.update(cache.get('english_words', ()))
+        self._non_english_words.update(cache.get('non_english_words', ()))
+
+    def save(self):
+        """
+        Write the verdicts to the cache file, if any word was looked up since it was loaded.
+        """
+        if self._cache_path is None or not self._is_modified:
+            return
+        cache = {
+            'version': self.VERSION,
+            'language': self.LANGUAGE,
+            'english_words': sorted(self._english_words),
+            'non_english_words': sorted(self._non_english_words),
+        }
+        write_json_atomically(self._cache_path, cache)
+        self._is_modified = False
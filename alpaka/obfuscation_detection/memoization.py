@@ -1,27 +1,164 @@
+import json
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Iterable, Optional
+
 from alpaka.obfuscation_detection.base import ObfuscationDetector
+from alpaka.utils import write_json_atomically
 
 
 class MemoizingObfuscationDetector(ObfuscationDetector):
 
     """
     A memoizing decorator for obfuscation_detection detectors.
+
+    Keeps up to `maximum_entries` class names and `maximum_entries` package names,
+    evicting the least recently used ones. Safe to use from multiple threads.
+
+    The verdicts can be saved to a file and loaded by later runs, under the identity of the inner detector.
+    Only the verdicts of name only detectors are saved, since the identity does not tell apart the apks
+    the verdicts of other detectors depend on.
     """
 
-    def __init__(self, inner_detector: ObfuscationDetector):
+    def __init__(
+            self,
+            inner_detector: ObfuscationDetector,
+            maximum_entries: Optional[int] = None,
+            cache_path: Optional[str] = None,
+    ):
+        """
+        :param maximum_entries: the maximum number of verdicts kept per kind of name, unbounded by default
+        :param cache_path: a file of verdicts saved by a previous run, loaded now and updated by save,
+        only allowed for name only inner detectors
+        """
+        if maximum_entries is not None and maximum_entries < 0:
+            raise ValueError(f"Maximum entries must not be negative, got {maximum_entries}")
+        if cache_path is not None and not inner_detector.is_name_only:
+            raise ValueError(
+                f"The verdicts of {inner_detector.identity} depend on the analyzed apks, so they can not be saved"
+            )
         self._inner_detector = inner_detector
-        self._detected_classes = dict()
-        self._detected_packages = dict()
+        self._maximum_entries = maximum_entries
+        self._cache_path = cache_path
+        self._detected_classes = OrderedDict()
+        self._detected_packages = OrderedDict()
+        self._lock = threading.Lock()
+        self.statistics = Counter()
+        if cache_path is not None:
+            self._load(cache_path)
+
+    @property
+    def identity(self) -> str:
+        return self._inner_detector.identity
+
+    @property
+    def is_name_only(self) -> bool:
+        return self._inner_detector.is_name_only
 
     def is_class_name_obfuscated(self, class_name) -> bool:
-        if class_name in self._detected_classes:
-            return self._detected_classes[class_name]
-        result = self._inner_detector.is_class_name_obfuscated(class_name)
-        self._detected_classes[class_name] = result
-        return result
+        return self._get_verdict(self._detected_classes, class_name, self._inner_detector.is_class_name_obfuscated)
 
     def is_package_name_obfuscated(self, package_name) -> bool:
-        if package_name in self._detected_packages:
-            return self._detected_packages[package_name]
-        result = self._inner_detector.is_package_name_obfuscated(package_name)
-        self._detected_packages[package_name] = result
+        return self._get_verdict(
+            self._detected_packages, package_name, self._inner_detector.is_package_name_obfuscated
+        )
+
+    def classify_classes(self, class_names: Iterable[str]) -> bytearray:
+        return self._classify(self._detected_classes, class_names, self._inner_detector.classify_classes)
+
+    def classify_packages(self, package_names: Iterable[str]) -> bytearray:
+        return self._classify(self._detected_packages, package_names, self._inner_detector.classify_packages)
+
+    def _classify(
+            self,
+            detected_names: OrderedDict,
+            names: Iterable[str],
+            classify: Callable[[Iterable[str]], bytearray],
+    ) -> bytearray:
+        """
+        Classify the names missing from the memo with one bulk call to the inner detector.
+        """
+        names = list(names)
+        verdicts = dict()
+        with self._lock:
+            for name in dict.fromkeys(names):
+                if name in detected_names:
+                    detected_names.move_to_end(name)
+                    verdicts[name] = detected_names[name]
+            self.statistics['memoization_hits'] += len(verdicts)
+            missing_names = [name for name in dict.fromkeys(names) if name not in verdicts]
+            self.statistics['memoization_misses'] += len(missing_names)
+        missing_verdicts = dict(zip(missing_names, map(bool, classify(missing_names))))
+        verdicts.update(missing_verdicts)
+        with self._lock:
+            detected_names.update(missing_verdicts)
+            for name in missing_verdicts:
+                detected_names.move_to_end(name)
+            self._evict(detected_names)
+        return bytearray(verdicts[name] for name in names)
+
+    def _get_verdict(self, detected_names: OrderedDict, name: str, detect: Callable[[str], bool]) -> bool:
+        with self._lock:
+            if name in detected_names:
+                detected_names.move_to_end(name)
+                self.statistics['memoization_hits'] += 1
+                return detected_names[name]
+            self.statistics['memoization_misses'] += 1
+        # Detected outside of the lock, so slow detections do not block the other threads.
+        # Threads missing the same name at once may both detect it.
+        result = detect(name)
+        with self._lock:
+            detected_names[name] = result
+            detected_names.move_to_end(name)
+            self._evict(detected_names)
         return result
+
+    def _evict(self, detected_names: OrderedDict):
+        """
+        Must be called under the lock.
+        """
+        if self._maximum_entries is None:
+            return
+        while len(detected_names) > self._maximum_entries:
+            detected_names.popitem(last=False)
+            self.statistics['memoization_evictions'] += 1
+
+    def __len__(self):
+        return len(self._detected_classes) + len(self._detected_packages)
+
+    def _load(self, cache_path: str):
+        cache = self._read_cache_file(cache_path)
+        verdicts = cache.get(self.identity)
+        if not isinstance(verdicts, dict):
+            return
+        with self._lock:
+            self._detected_classes.update(verdicts.get('classes', dict()))
+            self._detected_packages.update(verdicts.get('packages', dict()))
+            self._evict(self._detected_classes)
+            self._evict(self._detected_packages)
+
+    @staticmethod
+    def _read_cache_file(cache_path: str) -> dict:
+        try:
+            with open(cache_path, 'r') as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            # A missing file is created on save, and a corrupted file is replaced
+            return dict()
+        if not isinstance(cache, dict):
+            return dict()
+        return cache
+
+    def save(self):
+        """
+        Write the verdicts to the cache file, keeping the verdicts saved there by detectors of other identities.
+        """
+        if self._cache_path is None:
+            return
+        cache = self._read_cache_file(self._cache_path)
+        with self._lock:
+            cache[self.identity] = {
+                'classes': dict(self._detected_classes),
+                'packages': dict(self._detected_packages),
+            }
+        write_json_atomically(self._cache_path, cache)
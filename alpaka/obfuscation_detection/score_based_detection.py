@@ -1,16 +1,17 @@
 import abc
 import re
 import string
-from typing import Sized, Sequence, List
-
-import enchant
+from typing import Callable, Iterable, Sized, Sequence, List, Optional
 
 from alpaka.apk.class_info import ClassInfo
 from alpaka.apk.package_info import PackageInfo
 from alpaka.exceptions import FormatError
 from alpaka.obfuscation_detection.base import ObfuscationDetector
+from alpaka.obfuscation_detection.english_dictionary import EnglishDictionary
 from alpaka.utils import calc_average, split_by_separators
 
+UPPER_CAMEL_CASE_WORD_REGEX = re.compile(r'[A-Z][^A-Z]*')
+
 
 class ScoreSystem(abc.ABC):
     MAXIMUM_SCORE = 1.0
@@ -91,9 +92,14 @@ class GrowthScoreSystem(ScoreSystem):
 
 
 class IsWordEnglishScore(ScoreSystem):
+    def __init__(self, dictionary: Optional[EnglishDictionary] = None):
+        super(IsWordEnglishScore, self).__init__()
+        if dictionary is None:
+            dictionary = EnglishDictionary.get_shared()
+        self._dictionary = dictionary
+
     def _calc_score(self, word):
-        english_dict = enchant.Dict("en_US")
-        if english_dict.check(word):
+        if self._dictionary.check(word):
             return self.MAXIMUM_SCORE
         else:
             return self.MINIMUM_SCORE
@@ -141,6 +147,24 @@ class UnderscoreNameGrade(GradeSystem):
         return super(UnderscoreNameGrade, self)._calc_score(underscore_split)
 
 
+def _clamp_score(score: float) -> float:
+    return max(ScoreSystem.MINIMUM_SCORE, min(ScoreSystem.MAXIMUM_SCORE, score))
+
+
+def _compile_length_score(best_length: int, worst_length: int, score_growth: float) -> Callable[[int], float]:
+    """
+    Compile LengthScore(best_length, worst_length, score_growth).calc_score, taking the length instead of the sized.
+    """
+    def calc_length_score(length: int) -> float:
+        if length >= best_length:
+            return ScoreSystem.MAXIMUM_SCORE
+        elif length <= worst_length:
+            return ScoreSystem.MINIMUM_SCORE
+        # Below the best length the score is below the maximum, it is not clamped
+        return length * (score_growth * length)
+    return calc_length_score
+
+
 class PackageNameObfuscationDetector:
     # Word length score
     WORD_BEST_LENGTH = 8
@@ -168,11 +192,14 @@ class PackageNameObfuscationDetector:
 
     PASS_SCORE = 0.6
 
-    def __init__(self):
+    def __init__(self, dictionary: Optional[EnglishDictionary] = None):
+        if dictionary is None:
+            dictionary = EnglishDictionary.get_shared()
+        self._dictionary = dictionary
         length_score_weight = ScoreWeight(
             LengthScore(self.WORD_BEST_LENGTH, self.WORD_WORST_LENGTH, self.WORD_LENGTH_SCORE_GROWTH),
             self.WORD_LENGTH_WEIGHT)
-        is_word_english_score_weight = ScoreWeight(IsWordEnglishScore(), self.IS_WORD_ENGLISH_WEIGHT)
+        is_word_english_score_weight = ScoreWeight(IsWordEnglishScore(dictionary), self.IS_WORD_ENGLISH_WEIGHT)
         average_score_score_weight = ScoreWeight(AverageScore(
             GradeSystem([length_score_weight, is_word_english_score_weight])),
             self.WORD_AVERAGE_WEIGHT)
@@ -187,8 +214,56 @@ class PackageNameObfuscationDetector:
             self.UNDERSCORE_WEIGHT)
         self.grade_system = GradeSystem([underscore_score_weight, characters_score_weight],
                                         self.PASS_SCORE)
+        self._calc_grade = self._compile_grade_system()
+
+    def _compile_grade_system(self) -> Callable[[str], float]:
+        """
+        Compile grade_system.calc_score into a single function.
+        It does the same float operations in the same order, and looks up the same words in the dictionary,
+        but without the calls between the score systems.
+        The clamps that cannot change a score are left out.
+        """
+        calc_word_length_score = _compile_length_score(
+            self.WORD_BEST_LENGTH, self.WORD_WORST_LENGTH, self.WORD_LENGTH_SCORE_GROWTH
+        )
+        calc_words_count_score = _compile_length_score(
+            self.BEST_WORDS_COUNT, self.WORST_WORDS_COUNT, self.WORDS_COUNT_GROWTH
+        )
+        check_word = self._dictionary.check
+        allowed_characters = frozenset(string.ascii_letters + '_')
+        word_length_weight = self.WORD_LENGTH_WEIGHT
+        is_word_english_weight = self.IS_WORD_ENGLISH_WEIGHT
+        word_average_weight = self.WORD_AVERAGE_WEIGHT
+        words_count_weight = self.WORDS_COUNT_WEIGHT
+        underscore_weight = self.UNDERSCORE_WEIGHT
+        characters_weight = self.CHARACTERS_WEIGHT
+
+        def calc_grade(package_name: str) -> float:
+            words = package_name.split('_')
+            words_grades = [
+                _clamp_score(
+                    calc_word_length_score(len(word)) * word_length_weight
+                    + (is_word_english_weight if check_word(word) else ScoreSystem.MINIMUM_SCORE)
+                )
+                for word in words
+            ]
+            underscore_score = _clamp_score(
+                _clamp_score(calc_average(words_grades)) * word_average_weight
+                + calc_words_count_score(len(words)) * words_count_weight
+            )
+            characters_score = characters_weight if allowed_characters.issuperset(package_name) \
+                else ScoreSystem.MINIMUM_SCORE
+            return _clamp_score(underscore_score * underscore_weight + characters_score)
+        return calc_grade
 
     def is_obfuscated(self, package_name_prefix: str):
+        package_name = PackageInfo.get_package_name(package_name_prefix)
+        return not self._calc_grade(package_name) >= self.PASS_SCORE
+
+    def is_obfuscated_by_grade_system(self, package_name_prefix: str):
+        """
+        Like is_obfuscated, evaluating the score systems of grade_system one by one.
+        """
         package_name = PackageInfo.get_package_name(package_name_prefix)
         return not self.grade_system.did_pass(package_name)
 
@@ -221,11 +296,14 @@ class ClassNameObfuscationDetector:
 
     PASS_SCORE = 0.6
 
-    def __init__(self):
+    def __init__(self, dictionary: Optional[EnglishDictionary] = None):
+        if dictionary is None:
+            dictionary = EnglishDictionary.get_shared()
+        self._dictionary = dictionary
         length_score_weight = ScoreWeight(
             LengthScore(self.WORD_BEST_LENGTH, self.WORD_WORST_LENGTH, self.WORD_LENGTH_SCORE_GROWTH),
             self.WORD_LENGTH_WEIGHT)
-        is_word_english_score_weight = ScoreWeight(IsWordEnglishScore(), self.IS_WORD_ENGLISH_WEIGHT)
+        is_word_english_score_weight = ScoreWeight(IsWordEnglishScore(dictionary), self.IS_WORD_ENGLISH_WEIGHT)
         average_score_score_weight = ScoreWeight(AverageScore(
             GradeSystem([length_score_weight, is_word_english_score_weight])),
             self.WORD_AVERAGE_WEIGHT)
@@ -238,8 +316,66 @@ class ClassNameObfuscationDetector:
         upper_camel_case_score_weight = ScoreWeight(
             UpperCamelCaseGrade([average_score_score_weight, word_count_score_weight]), self.UPPER_CAMEL_CASE_WEIGHT)
         self.class_name_grade = GradeSystem([upper_camel_case_score_weight, characters_score_weight], self.PASS_SCORE)
+        self._word_obfuscation_detector = WordObfuscationDetector(dictionary)
+        self._known_obfuscated_patterns = [re.compile(regex) for regex in self.KNOWN_OBFUSCATED_PATTERNS]
+        self._calc_grade = self._compile_class_name_grade()
+
+    def _compile_class_name_grade(self) -> Callable[[str], float]:
+        """
+        Compile class_name_grade.calc_score into a single function, for names starting with an uppercase letter.
+        It does the same float operations in the same order, and looks up the same words in the dictionary,
+        but without the calls between the score systems.
+        The clamps that cannot change a score are left out.
+        """
+        calc_word_length_score = _compile_length_score(
+            self.WORD_BEST_LENGTH, self.WORD_WORST_LENGTH, self.WORD_LENGTH_SCORE_GROWTH
+        )
+        calc_words_count_score = _compile_length_score(
+            self.BEST_WORDS_COUNT, self.WORST_WORDS_COUNT, self.WORDS_COUNT_GROWTH
+        )
+        check_word = self._dictionary.check
+        allowed_characters = frozenset(string.ascii_letters + '$')
+        word_length_weight = self.WORD_LENGTH_WEIGHT
+        is_word_english_weight = self.IS_WORD_ENGLISH_WEIGHT
+        word_average_weight = self.WORD_AVERAGE_WEIGHT
+        words_count_weight = self.WORDS_COUNT_WEIGHT
+        upper_camel_case_weight = self.UPPER_CAMEL_CASE_WEIGHT
+        characters_weight = self.CHARACTERS_WEIGHT
+
+        def calc_grade(class_name: str) -> float:
+            # The same words as split_by_separators(class_name, string.ascii_uppercase), since the name starts with
+            # an uppercase letter
+            words = UPPER_CAMEL_CASE_WORD_REGEX.findall(class_name)
+            words_grades = [
+                _clamp_score(
+                    calc_word_length_score(len(word)) * word_length_weight
+                    + (is_word_english_weight if check_word(word) else ScoreSystem.MINIMUM_SCORE)
+                )
+                for word in words
+            ]
+            upper_camel_case_score = _clamp_score(
+                _clamp_score(calc_average(words_grades)) * word_average_weight
+                + calc_words_count_score(len(words)) * words_count_weight
+            )
+            characters_score = characters_weight if allowed_characters.issuperset(class_name) \
+                else ScoreSystem.MINIMUM_SCORE
+            return _clamp_score(upper_camel_case_score * upper_camel_case_weight + characters_score)
+        return calc_grade
 
     def is_obfuscated(self, class_name_prefix: str):
+        class_name = ClassInfo.get_class_name(class_name_prefix)
+        for known_obfuscated_pattern in self._known_obfuscated_patterns:
+            if known_obfuscated_pattern.search(class_name):
+                return True
+        if class_name[0] not in string.ascii_uppercase:
+            # Not UpperCamelCase, graded as a single word
+            return self._word_obfuscation_detector.is_obfuscated(class_name)
+        return not self._calc_grade(class_name) >= self.PASS_SCORE
+
+    def is_obfuscated_by_grade_system(self, class_name_prefix: str):
+        """
+        Like is_obfuscated, evaluating the score systems of class_name_grade one by one.
+        """
         class_name = ClassInfo.get_class_name(class_name_prefix)
         if self.is_known_obfuscated_pattern(class_name):
             return True
@@ -247,7 +383,7 @@ class ClassNameObfuscationDetector:
             try:
                 return not self.class_name_grade.did_pass(class_name)
             except FormatError:
-                return WordObfuscationDetector().is_obfuscated(class_name)
+                return self._word_obfuscation_detector.is_obfuscated_by_grade_system(class_name)
 
     def is_known_obfuscated_pattern(self, class_name: str) -> bool:
         for regex in self.KNOWN_OBFUSCATED_PATTERNS:
@@ -269,27 +405,78 @@ class WordObfuscationDetector:
 
     PASS_GRADE = 0.5
 
-    def __init__(self):
+    def __init__(self, dictionary: Optional[EnglishDictionary] = None):
+        if dictionary is None:
+            dictionary = EnglishDictionary.get_shared()
+        self._dictionary = dictionary
         length_score_weight = ScoreWeight(
             LengthScore(self.BEST_LENGTH, self.WORST_LENGTH, self.LENGTH_SCORE_GROWTH), self.LENGTH_SCORE_WEIGHT)
-        is_word_english_score_weight = ScoreWeight(IsWordEnglishScore(), self.IS_WORD_ENGLISH_SCORE_WEIGHT)
+        is_word_english_score_weight = ScoreWeight(IsWordEnglishScore(dictionary), self.IS_WORD_ENGLISH_SCORE_WEIGHT)
         word_characters_score_weight = ScoreWeight(CharactersScore(list(string.ascii_letters)),
                                                    self.WORD_CHARACTERS_SCORE_WEIGHT)
         self.word_grade_system = GradeSystem(
             [length_score_weight, is_word_english_score_weight, word_characters_score_weight], self.PASS_GRADE)
+        self._calc_grade = self._compile_word_grade_system()
+
+    def _compile_word_grade_system(self) -> Callable[[str], float]:
+        """
+        Compile word_grade_system.calc_score into a single function, doing the same float operations in the same order.
+        """
+        calc_length_score = _compile_length_score(self.BEST_LENGTH, self.WORST_LENGTH, self.LENGTH_SCORE_GROWTH)
+        check_word = self._dictionary.check
+        allowed_characters = frozenset(string.ascii_letters)
+        length_score_weight = self.LENGTH_SCORE_WEIGHT
+        is_word_english_score_weight = self.IS_WORD_ENGLISH_SCORE_WEIGHT
+        word_characters_score_weight = self.WORD_CHARACTERS_SCORE_WEIGHT
+
+        def calc_grade(word: str) -> float:
+            return _clamp_score(
+                calc_length_score(len(word)) * length_score_weight
+                + (is_word_english_score_weight if check_word(word) else ScoreSystem.MINIMUM_SCORE)
+                + (word_characters_score_weight if allowed_characters.issuperset(word) else ScoreSystem.MINIMUM_SCORE)
+            )
+        return calc_grade
 
     def is_obfuscated(self, word: str):
+        return not self._calc_grade(word) >= self.PASS_GRADE
+
+    def is_obfuscated_by_grade_system(self, word: str):
+        """
+        Like is_obfuscated, evaluating the score systems of word_grade_system one by one.
+        """
         return not self.word_grade_system.did_pass(word)
 
 
 class ScoreBasedObfuscationDetector(ObfuscationDetector):
 
-    def __init__(self):
-        self._class_name_obfuscation_detector = ClassNameObfuscationDetector()
-        self._package_name_obfuscation_detector = PackageNameObfuscationDetector()
+    def __init__(self, dictionary: Optional[EnglishDictionary] = None):
+        self._class_name_obfuscation_detector = ClassNameObfuscationDetector(dictionary)
+        self._package_name_obfuscation_detector = PackageNameObfuscationDetector(dictionary)
 
     def is_class_name_obfuscated(self, class_name) -> bool:
         return self._class_name_obfuscation_detector.is_obfuscated(class_name)
 
     def is_package_name_obfuscated(self, package_name) -> bool:
         return self._package_name_obfuscation_detector.is_obfuscated(package_name)
+
+    def classify_classes(self, class_names: Iterable[str]) -> bytearray:
+        """
+        Grade each distinct class name once.
+        """
+        class_names = list(class_names)
+        verdicts = {
+            class_name: self._class_name_obfuscation_detector.is_obfuscated(class_name)
+            for class_name in dict.fromkeys(class_names)
+        }
+        return bytearray(verdicts[class_name] for class_name in class_names)
+
+    def classify_packages(self, package_names: Iterable[str]) -> bytearray:
+        """
+        Grade each distinct package name once.
+        """
+        package_names = list(package_names)
+        verdicts = {
+            package_name: self._package_name_obfuscation_detector.is_obfuscated(package_name)
+            for package_name in dict.fromkeys(package_names)
+        }
+        return bytearray(verdicts[package_name] for package_name in package_names)
@@ -1,10 +1,10 @@
 import re
-from typing import List
+from typing import Iterable, List, Optional
 
-import enchant
 from androguard.core.analysis.analysis import Analysis
 
 from alpaka.obfuscation_detection.base import ObfuscationDetector
+from alpaka.obfuscation_detection.english_dictionary import EnglishDictionary
 
 
 class SimpleObfuscationDetector(ObfuscationDetector):
@@ -17,42 +17,149 @@ class SimpleObfuscationDetector(ObfuscationDetector):
     """
 
     WORD_REGEX = re.compile(r'(?:[A-Z](?=[^a-z]|$))+|[a-zA-Z][a-z]*')
+    PRIMITIVE_DESCRIPTORS = frozenset('VZBSCIJFD')
 
-    def __init__(self, old_analysis: Analysis, new_analysis: Analysis, dictionary: enchant.Dict = enchant.Dict('en_US')):
-        self._old_analysis = old_analysis
-        self._new_analysis = new_analysis
+    def __init__(
+            self,
+            old_analysis: Analysis,
+            new_analysis: Analysis,
+            dictionary: Optional[EnglishDictionary] = None,
+    ):
+        """
+        :param dictionary: the English words, the dictionary shared by the process by default
+        """
+        new_class_analyses = new_analysis.get_classes()
+        self._set_class_names(
+            [class_analysis.name for class_analysis in old_analysis.get_classes()],
+            [class_analysis.name for class_analysis in new_class_analyses],
+            [class_analysis.name for class_analysis in new_class_analyses if class_analysis.is_external()],
+            dictionary,
+        )
+
+    @classmethod
+    def from_class_names(
+            cls,
+            old_class_names: Iterable[str],
+            new_class_names: Iterable[str],
+            external_class_names: Iterable[str],
+            dictionary: Optional[EnglishDictionary] = None,
+    ) -> 'SimpleObfuscationDetector':
+        """
+        Create a detector from the names of the classes instead of the androguard analyses,
+        for example in worker processes that do not have the analyses.
+
+        :param old_class_names: the classes of the old version, including the external ones
+        :param new_class_names: the classes of the new version, including the external ones
+        :param external_class_names: the external classes of the new version
+        """
+        detector = cls.__new__(cls)
+        detector._set_class_names(old_class_names, new_class_names, external_class_names, dictionary)
+        return detector
+
+    def _set_class_names(
+            self,
+            old_class_names: Iterable[str],
+            new_class_names: Iterable[str],
+            external_class_names: Iterable[str],
+            dictionary: Optional[EnglishDictionary],
+    ):
+        if dictionary is None:
+            dictionary = EnglishDictionary.get_shared()
+        self._both_versions_class_names = frozenset(old_class_names).intersection(new_class_names)
+        # Only the external classes present in both versions are ever looked up
+        self._external_class_names = self._both_versions_class_names.intersection(external_class_names)
         self._dictionary = dictionary
 
+    @property
+    def is_name_only(self) -> bool:
+        # The verdicts depend on the classes of the two versions
+        return False
+
     def is_class_name_obfuscated(self, class_name) -> bool:
         class_name = class_name.lstrip('[')
-        if self._is_primitive(class_name): return False
-        if not self._is_in_both_versions(class_name): return True
-        if self._is_external(class_name): return False
+        verdict = self._classify_without_words(class_name)
+        if verdict is not None:
+            return verdict
         if self._is_all_correct_words(class_name): return False
         return True
 
     def is_package_name_obfuscated(self, package_name) -> bool:
         return not self._is_all_correct_words(package_name)
 
+    def classify_classes(self, class_names: Iterable[str]) -> bytearray:
+        """
+        Classify each distinct class name once, checking the words of all of the names with one dictionary lookup.
+        """
+        class_names = list(class_names)
+        verdicts = dict()
+        word_checked_class_names = []
+        for class_name in dict.fromkeys(class_names):
+            verdict = self._classify_without_words(class_name.lstrip('['))
+            if verdict is None:
+                word_checked_class_names.append(class_name)
+            else:
+                verdicts[class_name] = verdict
+        are_all_correct_words = self._are_all_correct_words(
+            [class_name.lstrip('[') for class_name in word_checked_class_names]
+        )
+        verdicts.update(zip(word_checked_class_names, (not is_correct for is_correct in are_all_correct_words)))
+        return bytearray(verdicts[class_name] for class_name in class_names)
+
+    def classify_packages(self, package_names: Iterable[str]) -> bytearray:
+        package_names = list(package_names)
+        distinct_package_names = list(dict.fromkeys(package_names))
+        verdicts = dict(zip(
+            distinct_package_names,
+            (not is_correct for is_correct in self._are_all_correct_words(distinct_package_names)),
+        ))
+        return bytearray(verdicts[package_name] for package_name in package_names)
+
+    def _classify_without_words(self, class_descriptor: str) -> Optional[bool]:
+        """
+        :return: the verdict of the checks that precede checking the words of the name,
+        None if the words decide it
+        """
+        if self._is_primitive(class_descriptor): return False
+        if not self._is_in_both_versions(class_descriptor): return True
+        if self._is_external(class_descriptor): return False
+        return None
+
     @classmethod
     def _is_primitive(cls, class_descriptor: str) -> bool:
-        return class_descriptor in {'V', 'Z', 'B', 'S', 'C', 'I', 'J', 'F', 'D'}
+        return class_descriptor in cls.PRIMITIVE_DESCRIPTORS
 
     def _is_in_both_versions(self, class_descriptor: str) -> bool:
-        return self._old_analysis.is_class_present(class_descriptor) \
-               and self._new_analysis.is_class_present(class_descriptor)
+        return class_descriptor in self._both_versions_class_names
 
     def _is_external(self, class_descriptor: str) -> bool:
-        if class_descriptor.startswith('Landroid/') or class_descriptor.startswith('Ljava/'):
+        if class_descriptor.startswith(('Landroid/', 'Ljava/')):
             return True
         # todo: need to check if the above is correct (maybe non-external android/ classes can be defined by the developer?)
-        return self._new_analysis.get_class_analysis(class_descriptor).is_external()
+        return class_descriptor in self._external_class_names
 
     def _is_all_correct_words(self, class_descriptor):
-        return all(
-            len(word) >= 2 and self._dictionary.check(word)
-            for word in self._separate_class_descriptor_to_words(class_descriptor)
-        )
+        words = self._separate_class_descriptor_to_words(class_descriptor)
+        if any(len(word) < 2 for word in words):
+            return False
+        return all(self._dictionary.check_many(words))
+
+    def _are_all_correct_words(self, class_descriptors: List[str]) -> List[bool]:
+        """
+        Like _is_all_correct_words for each of the descriptors, looking up the words of all of them at once.
+        """
+        words_per_descriptor = [
+            self._separate_class_descriptor_to_words(class_descriptor)
+            for class_descriptor in class_descriptors
+        ]
+        checked_words = list(dict.fromkeys(
+            word for words in words_per_descriptor for word in words if len(word) >= 2
+        ))
+        correct_words = {
+            word
+            for word, is_correct in zip(checked_words, self._dictionary.check_many(checked_words))
+            if is_correct
+        }
+        return [all(word in correct_words for word in words) for words in words_per_descriptor]
 
     @classmethod
     def _separate_class_descriptor_to_words(cls, class_descriptor: str) -> List[str]:
@@ -0,0 +1,80 @@
+from typing import Dict, Iterable
+
+from alpaka.obfuscation_detection.base import ObfuscationDetector
+
+
+class ObfuscationVerdictTable(ObfuscationDetector):
+
+    """
+    A table of obfuscation verdicts, classified up front in bulk by an inner detector.
+
+    The signature calculator looks up the same type descriptors (Ljava/lang/String;, I, ...) for every field,
+    parameter and return type of every class, so they are classified once and then read from the table.
+    Names outside of the table are classified by the inner detector on their first lookup and added to it.
+    """
+
+    def __init__(
+            self,
+            inner_detector: ObfuscationDetector,
+            class_names: Iterable[str] = (),
+            package_names: Iterable[str] = (),
+    ):
+        self._inner_detector = inner_detector
+        self._class_verdicts: Dict[str, bool] = dict()
+        self._package_verdicts: Dict[str, bool] = dict()
+        self.add_class_names(class_names)
+        self.add_package_names(package_names)
+
+    @property
+    def identity(self) -> str:
+        return self._inner_detector.identity
+
+    @property
+    def is_name_only(self) -> bool:
+        return self._inner_detector.is_name_only
+
+    def add_class_names(self, class_names: Iterable[str]):
+        """
+        Classify the class names missing from the table in bulk.
+        """
+        self._add_names(self._class_verdicts, class_names, self._inner_detector.classify_classes)
+
+    def add_package_names(self, package_names: Iterable[str]):
+        """
+        Classify the package names missing from the table in bulk.
+        """
+        self._add_names(self._package_verdicts, package_names, self._inner_detector.classify_packages)
+
+    @staticmethod
+    def _add_names(verdicts: Dict[str, bool], names: Iterable[str], classify):
+        missing_names = [name for name in dict.fromkeys(names) if name not in verdicts]
+        verdicts.update(zip(missing_names, map(bool, classify(missing_names))))
+
+    def is_class_name_obfuscated(self, class_name: str) -> bool:
+        verdict = self._class_verdicts.get(class_name)
+        if verdict is None:
+            verdict = self._class_verdicts[class_name] = bool(
+                self._inner_detector.is_class_name_obfuscated(class_name)
+            )
+        return verdict
+
+    def is_package_name_obfuscated(self, package_name: str) -> bool:
+        verdict = self._package_verdicts.get(package_name)
+        if verdict is None:
+            verdict = self._package_verdicts[package_name] = bool(
+                self._inner_detector.is_package_name_obfuscated(package_name)
+            )
+        return verdict
+
+    def classify_classes(self, class_names: Iterable[str]) -> bytearray:
+        class_names = list(class_names)
+        self.add_class_names(class_names)
+        return bytearray(self._class_verdicts[class_name] for class_name in class_names)
+
+    def classify_packages(self, package_names: Iterable[str]) -> bytearray:
+        package_names = list(package_names)
+        self.add_package_names(package_names)
+        return bytearray(self._package_verdicts[package_name] for package_name in package_names)
+
+    def __len__(self):
+        return len(self._class_verdicts) + len(self._package_verdicts)
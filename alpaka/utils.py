@@ -1,7 +1,10 @@
+import json
 import os
+import re
 import shutil
 import subprocess
-from typing import List, Dict
+import tempfile
+from typing import Dict, Iterable, List
 
 from alpaka.colors import bcolors
 from alpaka.constants import PACKAGE_NAME_SEPARATOR
@@ -23,6 +26,23 @@ def clean_dir(path):
     os.makedirs(path)
 
 
+def write_json_atomically(path: str, obj):
+    """
+    Write the object as json to a temporary file next to path, and rename it into place,
+    so the file at path is never left partially written, even when several processes write it at once.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as temporary_file:
+            json.dump(obj, temporary_file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
 def _apktool_decode(apk_path, output_path):
     print(f"Running apktool against '{bcolors.OKBLUE}{apk_path}{bcolors.ENDC}' into '{output_path}'")
     subprocess.call(["apktool", "d", "--no-debug-info", "-f", "-o", output_path, apk_path], shell=True)
@@ -44,9 +64,61 @@ class DictFilterMixin(Dict):
     """
 
     def filter(self, filter_function):
-        for key, value in list(self.items()):
-            if not filter_function(key, value):
-                del self[key]
+        for key in [key for key, value in self.items() if not filter_function(key, value)]:
+            del self[key]
+
+
+class PrefixTrie:
+
+    """
+    A set of prefixes, compiled into a trie of the prefixes' characters.
+    The trie is matched as a regex, so checking whether a text starts with any of the prefixes
+    walks the text once in the regex engine, instead of trying each prefix.
+    """
+
+    # Marks the nodes where a prefix ends
+    _END = None
+    # Never matches, the regex of a trie without prefixes
+    _EMPTY_REGEX = '(?!)'
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._root = dict()
+        self._compiled_regex = None
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str):
+        node = self._root
+        for character in prefix:
+            node = node.setdefault(character, dict())
+        node[self._END] = True
+        self._compiled_regex = None
+
+    def to_regex(self) -> str:
+        """
+        :return: a regex matching the start of the texts that start with any of the prefixes
+        """
+        if not self._root:
+            return self._EMPTY_REGEX
+        return self._to_regex(self._root)
+
+    @classmethod
+    def _to_regex(cls, node: dict) -> str:
+        if cls._END in node:
+            # The texts starting with this prefix match, whatever follows it
+            return ''
+        branches = [re.escape(character) + cls._to_regex(child) for character, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        return f'(?:{"|".join(branches)})'
+
+    def matches(self, text: str) -> bool:
+        """
+        :return: whether the text starts with any of the prefixes
+        """
+        if self._compiled_regex is None:
+            self._compiled_regex = re.compile(self.to_regex())
+        return self._compiled_regex.match(text) is not None
 
 
 def calc_average(l: List):
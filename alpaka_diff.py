@@ -9,6 +9,8 @@ from pygments.lexers.diff import DiffLexer
 from pypager.pager import Pager
 from pypager.source import StringSource
 
+from alpaka.encoders.classes_matches_encoder import read_class_matches_json_lines
+
 
 class Mode(Enum):
     SMALI = 'smali'
@@ -20,8 +22,7 @@ class Mode(Enum):
 
 def main():
     matches_file_path, apk1_dir, apk2_dir, mode, jadx_mode = parse_arguments()
-    with open(matches_file_path, 'r') as matches_file:
-        matches = json.load(matches_file)
+    matches = load_matches(matches_file_path)
     diff_finder = AlpakaDiffFinder(apk1_dir, apk2_dir, mode, matches, jadx_mode)
 
     print_help_message(apk1_dir, apk2_dir)
@@ -46,6 +47,13 @@ def main():
         diff_pager.run()
 
 
+def load_matches(matches_file_path):
+    with open(matches_file_path, 'r') as matches_file:
+        if matches_file_path.endswith('.jsonl'):
+            return read_class_matches_json_lines(matches_file)
+        return json.load(matches_file)
+
+
 def print_help_message(apk1_dir, apk2_dir):
     print(
         'Alpaka diff terminal\n'
@@ -62,7 +70,7 @@ def print_help_message(apk1_dir, apk2_dir):
 
 def parse_arguments():
     parser = ArgumentParser()
-    parser.add_argument('matches_file', help='The JSON file containing the class matches, generated by alpaka_match.py')
+    parser.add_argument('matches_file', help='The JSON (or .jsonl) file containing the class matches, generated by alpaka_match.py')
     parser.add_argument('apk1_source_dir', help='The sources directory (java or smali) of the first apk version.')
     parser.add_argument('apk2_source_dir', help='The sources directory (java or smali) of the second apk version.')
     parser.add_argument('mode', type=Mode, choices=list(Mode), help='The compared source type. Either java or smali.')
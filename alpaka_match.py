@@ -3,12 +3,33 @@ import importlib.machinery
 import importlib.util
 from argparse import ArgumentParser
 
+from alpaka.apk.analysis_cache import AnalysisCache
+from alpaka.apk.class_filter import ClassFilterSpec
 from alpaka.apk.analyzed_apk import AnalyzedApk
 from alpaka.apk_differ import ApkDiffer
-from alpaka.encoders.classes_matches_encoder import convert_class_matches_dict_to_output_format
+from alpaka.class_signature.signature_cache import SignatureCache
+from alpaka.encoders.classes_matches_encoder import convert_class_matches_dict_to_output_format, \
+    write_class_matches_json_lines
+from alpaka.matching.blocking_class_matcher import BlockingClassMatcher
+from alpaka.matching.class_matcher import ClassMatcher
+from alpaka.matching.count_range_class_matcher import CountRangeClassMatcher
+from alpaka.matching.lsh_class_matcher import LshClassMatcher
+from alpaka.matching.vectorized_class_matcher import VectorizedClassMatcher
+from alpaka.matching.vp_tree_class_matcher import VantagePointTreeClassMatcher
+from alpaka.obfuscation_detection.english_dictionary import EnglishDictionary
 from alpaka.obfuscation_detection.simple_detection import SimpleObfuscationDetector
 
 
+CLASS_MATCHERS = {
+    'brute-force': ClassMatcher,
+    'vectorized': VectorizedClassMatcher,
+    'lsh': LshClassMatcher,
+    'vp-tree': VantagePointTreeClassMatcher,
+    'blocking': BlockingClassMatcher,
+    'count-range': CountRangeClassMatcher,
+}
+
+
 class ExternalComponentLoadError(RuntimeError):
     """
     Raised when loading a component from an external module failed
@@ -17,24 +38,69 @@ class ExternalComponentLoadError(RuntimeError):
 
 def main():
     args = parse_arguments()
-    apk1 = AnalyzedApk(args.apk_1)
-    apk2 = AnalyzedApk(args.apk_2)
+    analysis_cache = None
+    if args.analysis_cache is not None:
+        analysis_cache = AnalysisCache(args.analysis_cache, args.analysis_cache_size)
+    apk1 = AnalyzedApk(args.apk_1, dex_only=args.dex_only, analysis_cache=analysis_cache)
+    apk2 = AnalyzedApk(args.apk_2, dex_only=args.dex_only, analysis_cache=analysis_cache)
+
+    if args.dictionary_cache is not None:
+        EnglishDictionary.set_shared(EnglishDictionary(cache_path=args.dictionary_cache))
 
-    apk_differ = create_apk_differ(apk1, apk2, args.filter, args.obfuscation_detector, args.weights_file)
+    signature_cache = None
+    if args.signature_cache is not None:
+        signature_cache = SignatureCache(args.signature_cache, args.signature_cache_size)
 
-    class_matches = apk_differ.diff(
-        apk1,
-        apk2,
-        match_packages=args.match_packages,
-        match_by_name=args.match_by_name,
+    apk_differ = create_apk_differ(
+        apk1, apk2, args.filter, args.obfuscation_detector, args.weights_file, CLASS_MATCHERS[args.matcher], args.jobs,
+        signature_cache, args.compact_signatures, args.match_identical_signatures, create_class_filter_spec(args),
+        args.match_rare_string_literals, args.compatible_simhashes,
     )
-    output_matches(args.result_file_path, class_matches)
+
+    try:
+        if args.output_format == 'jsonl':
+            with open(args.result_file_path, 'w') as result_file:
+                write_class_matches_json_lines(
+                    apk_differ.iter_matches(
+                        apk1,
+                        apk2,
+                        match_packages=args.match_packages,
+                        match_by_name=args.match_by_name,
+                    ),
+                    result_file,
+                )
+        else:
+            class_matches = apk_differ.diff(
+                apk1,
+                apk2,
+                match_packages=args.match_packages,
+                match_by_name=args.match_by_name,
+            )
+            output_matches(args.result_file_path, class_matches)
+    finally:
+        if signature_cache is not None:
+            signature_cache.close()
+        if args.dictionary_cache is not None:
+            EnglishDictionary.get_shared().save()
+    if args.print_statistics:
+        statistics = dict(apk_differ.statistics, apk1_load_seconds=apk1.load_time, apk2_load_seconds=apk2.load_time)
+        if analysis_cache is not None:
+            statistics.update(analysis_cache.statistics)
+        if statistics.get('compared_pairs'):
+            statistics['deduplicated_pairs_ratio'] = statistics['deduplicated_pairs'] / statistics['compared_pairs']
+        print_statistics(statistics)
 
 
-def create_apk_differ(apk1, apk2, filter_module_path, obfuscation_detector_module_path, weights_file_path):
+def create_apk_differ(apk1, apk2, filter_module_path, obfuscation_detector_module_path, weights_file_path,
+                      class_matcher_type=ClassMatcher, jobs=1, signature_cache=None, compact_signatures=False,
+                      match_identical_signatures=False, class_filter_spec=None, match_rare_string_literals=False,
+                      compatible_simhashes=True):
     filter_funcs = []
+    if class_filter_spec is not None:
+        # The compiled filter is cheap, so it runs before the external filter
+        filter_funcs.append(class_filter_spec.compile())
     if filter_module_path is not None:
-        filter_funcs = [load_filter(filter_module_path)]
+        filter_funcs.append(load_filter(filter_module_path))
 
     obfuscation_detector_type = SimpleObfuscationDetector
     if obfuscation_detector_module_path is not None:
@@ -45,7 +111,40 @@ def create_apk_differ(apk1, apk2, filter_module_path, obfuscation_detector_modul
         with open(weights_file_path, 'r') as weights_file:
             distance_calculation_weights = json.load(weights_file)
 
-    return ApkDiffer(obfuscation_detector_type(apk1.analysis, apk2.analysis), filter_funcs, distance_calculation_weights)
+    return ApkDiffer(
+        obfuscation_detector_type(apk1.analysis, apk2.analysis),
+        filter_funcs,
+        distance_calculation_weights,
+        class_matcher_type,
+        jobs,
+        signature_cache,
+        compact_signatures,
+        match_identical_signatures,
+        match_rare_string_literals,
+        compatible_simhashes,
+    )
+
+
+def create_class_filter_spec(args):
+    """
+    :return: the spec of the filter spec file, extended by the filter options, None if neither is given
+    """
+    has_filter_options = any((
+        args.include_packages, args.exclude_packages, args.include_regexes, args.exclude_regexes,
+        args.minimum_instructions is not None, args.maximum_instructions is not None,
+    ))
+    if args.filter_spec is None and not has_filter_options:
+        return None
+    class_filter_spec = ClassFilterSpec() if args.filter_spec is None else ClassFilterSpec.load(args.filter_spec)
+    class_filter_spec.include_prefixes.extend(args.include_packages)
+    class_filter_spec.exclude_prefixes.extend(args.exclude_packages)
+    class_filter_spec.include_regexes.extend(args.include_regexes)
+    class_filter_spec.exclude_regexes.extend(args.exclude_regexes)
+    if args.minimum_instructions is not None:
+        class_filter_spec.minimum_instructions = args.minimum_instructions
+    if args.maximum_instructions is not None:
+        class_filter_spec.maximum_instructions = args.maximum_instructions
+    return class_filter_spec
 
 
 def output_matches(result_file_path, class_matches):
@@ -54,6 +153,11 @@ def output_matches(result_file_path, class_matches):
         json.dump(output, result_file, indent=4)
 
 
+def print_statistics(statistics):
+    for name, value in sorted(statistics.items()):
+        print(f'{name}: {value}')
+
+
 def parse_arguments():
     parser = ArgumentParser(description='Find class matches between 2 apk versions')
     parser.add_argument('apk_1')
@@ -66,10 +170,59 @@ def parse_arguments():
                         help='Disables matching the unobfuscated classes by name.')
     parser.add_argument('-f', '--filter', '--class-filter', dest='filter',
                         help='An external module containing a class filter. Read full docs for more info.')
+    parser.add_argument('--filter-spec', dest='filter_spec',
+                        help='A json file containing a declarative class filter. Read full docs for more info.')
+    parser.add_argument('--include-package', dest='include_packages', action='append', default=[],
+                        help='Match only the classes starting with this prefix (smali format). Can be repeated.')
+    parser.add_argument('--exclude-package', dest='exclude_packages', action='append', default=[],
+                        help='Do not match the classes starting with this prefix (smali format). Can be repeated.')
+    parser.add_argument('--include-regex', dest='include_regexes', action='append', default=[],
+                        help='Match only the classes whose names match this regex. Can be repeated.')
+    parser.add_argument('--exclude-regex', dest='exclude_regexes', action='append', default=[],
+                        help='Do not match the classes whose names match this regex. Can be repeated.')
+    parser.add_argument('--min-instructions', dest='minimum_instructions', type=int, default=None,
+                        help='Do not match the classes with fewer instructions.')
+    parser.add_argument('--max-instructions', dest='maximum_instructions', type=int, default=None,
+                        help='Do not match the classes with more instructions.')
     parser.add_argument('-o', '--obfuscation-detector', dest='obfuscation_detector',
                         help='An external module containing an obfuscation detector. Read full docs for more info.')
     parser.add_argument('-w', '--weights-file', dest='weights_file',
                         help='A json file containing alternative weights to use in the distance calculations')
+    parser.add_argument('-m', '--matcher', dest='matcher', choices=list(CLASS_MATCHERS), default='brute-force',
+                        help='The algorithm used to find the closest signatures.'
+                             ' lsh is approximate, the other matchers yield the same matches.')
+    parser.add_argument('-i', '--identical-signatures', dest='match_identical_signatures', action='store_true',
+                        help='Match the classes with a unique identical signature in the other apk'
+                             ' before searching for the closest signatures.')
+    parser.add_argument('--rare-strings', dest='match_rare_string_literals', action='store_true',
+                        help='Match the classes sharing rare string literals with a class of the other apk'
+                             ' before matching the packages.')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=1,
+                        help='Number of worker processes used for matching the classes.')
+    parser.add_argument('--signature-cache', dest='signature_cache', default=None,
+                        help='Path of a file caching the class signatures between runs.')
+    parser.add_argument('--signature-cache-size', dest='signature_cache_size', type=int,
+                        default=SignatureCache.MAXIMUM_ENTRIES,
+                        help='Maximum number of signatures kept in the signature cache file.')
+    parser.add_argument('--compact-signatures', dest='compact_signatures', action='store_true',
+                        help='Store the class signatures in compact tables. Decreases memory usage on large apks.')
+    parser.add_argument('--fast-simhashes', dest='compatible_simhashes', action='store_false',
+                        help='Hash the instruction shingles without their instruction names. Decreases runtime,'
+                             ' but the signatures differ from the ones the default weights were made with.')
+    parser.add_argument('--dex-only', dest='dex_only', action='store_true',
+                        help='Parse only the DEX files of the apks, skipping androguard\'s cross-references.'
+                             ' Decreases loading time, but the signatures differ from the ones of the full analysis.')
+    parser.add_argument('--analysis-cache', dest='analysis_cache', default=None,
+                        help='Path of a directory caching the analyses of the apks by their content.')
+    parser.add_argument('--analysis-cache-size', dest='analysis_cache_size', type=int,
+                        default=AnalysisCache.MAXIMUM_SIZE,
+                        help='Maximum size in bytes of the analysis cache directory.')
+    parser.add_argument('--dictionary-cache', dest='dictionary_cache', default=None,
+                        help='Path of a file caching the English words looked up by the obfuscation detector.')
+    parser.add_argument('--format', dest='output_format', choices=('json', 'jsonl'), default='json',
+                        help='The format of the result file. jsonl writes a line per class as soon as it is matched.')
+    parser.add_argument('-s', '--statistics', dest='print_statistics', action='store_true',
+                        help='Print statistics about the matching process, such as the number of compared candidates.')
     return parser.parse_args()
 
 
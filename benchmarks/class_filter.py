@@ -0,0 +1,76 @@
+"""
+Compares the throughput of a class filter spec compiled into a prefix trie and a combined regex,
+and of the equivalent python callback checking the prefixes and the regexes one by one, in classes per second.
+
+Usage: python -m benchmarks.class_filter [apk_path ...]
+"""
+import re
+import time
+from argparse import ArgumentParser
+
+from alpaka.apk.analyzed_apk import AnalyzedApk
+from alpaka.apk.class_filter import ClassFilterSpec
+
+TOAST_APKS = (
+    'tests/test_files/apks/toastAPK/hello.apk',
+    'tests/test_files/apks/toastAPK/bye.apk',
+)
+# Packages found at https://developer.android.com/reference/packages.html, and common libraries
+EXCLUDED_PREFIXES = [
+    'Landroid/', 'Landroidx/', 'Lcom/android/internal/util', 'Lcom/google/android/', 'Lcom/google/common/',
+    'Ldalvik/', 'Ljava/', 'Ljavax/', 'Ljunit/', 'Lkotlin/', 'Lkotlinx/', 'Lokhttp3/', 'Lokio/', 'Lorg/apache/',
+    'Lorg/json/', 'Lorg/jetbrains/', 'Lorg/w3c/dom/', 'Lorg/xml/sax', 'Lorg/xmlpull/v1/', 'Lretrofit2/',
+]
+EXCLUDED_REGEXES = [r'/R\$\w+;$', r'/R;$', r'/BuildConfig;$', r'\$\d+;$']
+
+
+def python_class_filter(class_name, class_analysis):
+    for excluded_prefix in EXCLUDED_PREFIXES:
+        if class_name.startswith(excluded_prefix):
+            return False
+    for excluded_regex in EXCLUDED_REGEXES:
+        if re.search(excluded_regex, class_name):
+            return False
+    return not class_analysis.is_external()
+
+
+def main(apk_paths, repeat):
+    classes = []
+    for apk_path in apk_paths:
+        classes.extend(AnalyzedApk(apk_path).analysis.classes.items())
+    compiled_class_filter = ClassFilterSpec(
+        exclude_prefixes=EXCLUDED_PREFIXES, exclude_regexes=EXCLUDED_REGEXES, exclude_external=True
+    ).compile()
+
+    python_results = [python_class_filter(class_name, class_analysis) for class_name, class_analysis in classes]
+    compiled_results = [compiled_class_filter(class_name, class_analysis) for class_name, class_analysis in classes]
+    if python_results != compiled_results:
+        raise AssertionError('The compiled filter accepts different classes than the python filter')
+
+    python_time = measure(python_class_filter, classes, repeat)
+    compiled_time = measure(compiled_class_filter, classes, repeat)
+    print(f'{len(classes)} classes, {sum(compiled_results)} accepted')
+    print(f'    python callback: {len(classes) / python_time:,.0f} classes per second')
+    print(f'    compiled spec:   {len(classes) / compiled_time:,.0f} classes per second')
+    print(f'    speedup:         {python_time / compiled_time:.2f}x')
+
+
+def measure(class_filter, classes, repeat) -> float:
+    """
+    :return: the best time of filtering all the classes, out of `repeat` runs
+    """
+    best_time = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for class_name, class_analysis in classes:
+            class_filter(class_name, class_analysis)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='benchmark the compiled class filter specs')
+    parser.add_argument('apk_paths', nargs='*', default=TOAST_APKS)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.apk_paths, args.repeat)
@@ -0,0 +1,66 @@
+"""
+Compares the throughput of the score based obfuscation detection, in names per second,
+with the compiled scoring functions and with the score systems evaluated one by one.
+
+Usage: python -m benchmarks.obfuscation_detection [apk_path ...]
+"""
+import time
+from argparse import ArgumentParser
+
+from alpaka.apk.analyzed_apk import AnalyzedApk
+from alpaka.apk.package_info import PackageInfo
+from alpaka.obfuscation_detection.score_based_detection import ClassNameObfuscationDetector, \
+    PackageNameObfuscationDetector
+
+TOAST_APKS = (
+    'tests/test_files/apks/toastAPK/hello.apk',
+    'tests/test_files/apks/toastAPK/bye.apk',
+)
+
+
+def main(apk_paths, repeat):
+    class_names = []
+    for apk_path in apk_paths:
+        class_names.extend(
+            type_descriptor for type_descriptor in AnalyzedApk(apk_path).get_type_descriptors()
+            if type_descriptor.startswith('L')
+        )
+    package_names = list(dict.fromkeys(map(PackageInfo.get_parent_package_name_prefix, class_names)))
+
+    for detector, names in (
+            (ClassNameObfuscationDetector(), class_names),
+            (PackageNameObfuscationDetector(), package_names),
+    ):
+        # The first pass looks the words up in the dictionary, so the dictionary lookups are not timed
+        compiled_verdicts = [detector.is_obfuscated(name) for name in names]
+        grade_system_verdicts = [detector.is_obfuscated_by_grade_system(name) for name in names]
+        if compiled_verdicts != grade_system_verdicts:
+            raise AssertionError(f'The compiled verdicts of {type(detector).__name__} differ from the grade system')
+
+        grade_system_time = measure(detector.is_obfuscated_by_grade_system, names, repeat)
+        compiled_time = measure(detector.is_obfuscated, names, repeat)
+        print(f'{type(detector).__name__}: {len(names)} names')
+        print(f'    grade system: {len(names) / grade_system_time:,.0f} names per second')
+        print(f'    compiled:     {len(names) / compiled_time:,.0f} names per second')
+        print(f'    speedup:      {grade_system_time / compiled_time:.2f}x')
+
+
+def measure(is_obfuscated, names, repeat) -> float:
+    """
+    :return: the best time of detecting all the names, out of `repeat` runs
+    """
+    best_time = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for name in names:
+            is_obfuscated(name)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='benchmark the score based obfuscation detection')
+    parser.add_argument('apk_paths', nargs='*', default=TOAST_APKS)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.apk_paths, args.repeat)
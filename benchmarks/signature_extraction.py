@@ -0,0 +1,105 @@
+"""
+Compares the time it takes to calculate the class signatures field by field, in a single fused pass,
+and in a fused pass over all of the classes at once, with compatible and with native opcode simhashes.
+Also compares extracting the string literals of the classes from their instructions to reading them from
+a string literal index.
+
+Usage: python -m benchmarks.signature_extraction [apk_path ...]
+"""
+import time
+from argparse import ArgumentParser
+
+from androguard.misc import AnalyzeAPK
+
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.string_extractor import StringLiteralsExtractor
+from alpaka.class_signature.string_literal_index import StringLiteralIndex
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+
+TOAST_APKS = (
+    'tests/test_files/apks/toastAPK/hello.apk',
+    'tests/test_files/apks/toastAPK/bye.apk',
+)
+
+
+def main(apk_paths, repeat):
+    signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False))
+    native_signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False), compatible_simhashes=False)
+    for apk_path in apk_paths:
+        _apk, _dex, analysis = AnalyzeAPK(apk_path)
+        class_analyses = list(analysis.get_internal_classes())
+        # The first pass decodes and caches the bytecode of the methods, so it is not timed
+        per_field_signatures = [
+            signature_calculator.calculate_class_signature_per_field(class_analysis)
+            for class_analysis in class_analyses
+        ]
+        fused_signatures = [
+            signature_calculator.calculate_class_signature(class_analysis)
+            for class_analysis in class_analyses
+        ]
+        if per_field_signatures != fused_signatures:
+            raise AssertionError(f'The fused signatures of {apk_path} differ from the per field signatures')
+        if signature_calculator.calculate_class_signatures(class_analyses) != fused_signatures:
+            raise AssertionError(f'The signatures of all of the classes of {apk_path} differ from the fused signatures')
+
+        per_field_time = measure(signature_calculator.calculate_class_signature_per_field, class_analyses, repeat)
+        fused_time = measure(signature_calculator.calculate_class_signature, class_analyses, repeat)
+        all_classes_time = measure_all_classes(signature_calculator, class_analyses, repeat)
+        native_all_classes_time = measure_all_classes(native_signature_calculator, class_analyses, repeat)
+        print(f'{apk_path}: {len(class_analyses)} classes')
+        print(f'    per field:                   {per_field_time / len(class_analyses) * 1e6:.1f} us per class')
+        print(f'    fused:                       {fused_time / len(class_analyses) * 1e6:.1f} us per class')
+        print(f'    all classes at once:         {all_classes_time / len(class_analyses) * 1e6:.1f} us per class')
+        print(f'    all classes at once, native: {native_all_classes_time / len(class_analyses) * 1e6:.1f} us per class')
+        print(f'    speedup:                     {per_field_time / fused_time:.2f}x fused, '
+              f'{per_field_time / all_classes_time:.2f}x all classes at once')
+
+        string_literal_index = StringLiteralIndex()
+        string_literal_index.index_classes(class_analyses)
+        extracted_string_literals = [
+            list(StringLiteralsExtractor.extract_strings(class_analysis)) for class_analysis in class_analyses
+        ]
+        if [string_literal_index.get_string_literals(class_analysis) for class_analysis in class_analyses] \
+                != extracted_string_literals:
+            raise AssertionError(f'The indexed string literals of {apk_path} differ from the extracted ones')
+        extraction_time = measure(
+            lambda class_analysis: list(StringLiteralsExtractor.extract_strings(class_analysis)),
+            class_analyses,
+            repeat,
+        )
+        index_time = measure(string_literal_index.get_string_literals, class_analyses, repeat)
+        print(f'    string literals extracted:   {extraction_time / len(class_analyses) * 1e6:.1f} us per class')
+        print(f'    string literals indexed:     {index_time / len(class_analyses) * 1e6:.1f} us per class')
+
+
+def measure(calculate_class_signature, class_analyses, repeat) -> float:
+    """
+    :return: the best time of calculating all the signatures, out of `repeat` runs
+    """
+    best_time = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for class_analysis in class_analyses:
+            calculate_class_signature(class_analysis)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time
+
+
+def measure_all_classes(signature_calculator, class_analyses, repeat) -> float:
+    """
+    :return: the best time of calculating all the signatures at once, out of `repeat` runs
+    """
+    best_time = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        signature_calculator.calculate_class_signatures(class_analyses)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='benchmark the class signature calculation')
+    parser.add_argument('apk_paths', nargs='*', default=TOAST_APKS)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.apk_paths, args.repeat)
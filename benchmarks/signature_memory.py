@@ -0,0 +1,51 @@
+"""
+Reports the memory used to hold the class signatures of an apk,
+as a ClassSignature per class and in a compact SignatureTable.
+
+Usage: python -m benchmarks.signature_memory [apk_path]
+"""
+import tracemalloc
+from argparse import ArgumentParser
+
+from alpaka.apk.analyzed_apk import AnalyzedApk
+from alpaka.apk.global_class_pool import GlobalClassPool
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+
+TOAST_APK = 'tests/test_files/apks/toastAPK/hello.apk'
+
+
+def main(apk_path):
+    analyzed_apk = AnalyzedApk(apk_path)
+    obfuscation_detector = DummyObfuscationDetector(False)
+    signature_calculator = ClassSignatureCalculator(obfuscation_detector)
+    # Calculate the signatures once, so the bytecode decoded by androguard is not measured
+    signatures = [
+        class_info.signature
+        for class_info in GlobalClassPool(analyzed_apk, obfuscation_detector, signature_calculator).values()
+    ]
+    print(f'{apk_path}: {len(signatures)} classes')
+
+    for compact_signatures in (False, True):
+        tracemalloc.start()
+        class_pool = GlobalClassPool(
+            analyzed_apk, obfuscation_detector, signature_calculator, compact_signatures=compact_signatures
+        )
+        pool_size, _peak = tracemalloc.get_traced_memory()
+        for class_info in class_pool.values():
+            _signature = class_info.signature
+        total_size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        signatures_size = total_size - pool_size
+        storage_name = 'signature table' if compact_signatures else 'ClassSignature per class'
+        print(f'    {storage_name}:')
+        print(f'        class pool:  {pool_size / 1024:.1f} KiB')
+        print(f'        signatures:  {signatures_size / 1024:.1f} KiB')
+        print(f'        total:       {total_size / 1024:.1f} KiB ({total_size / len(class_pool):.1f} B per class)')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='report the memory used by the class signatures')
+    parser.add_argument('apk_path', nargs='?', default=TOAST_APK)
+    args = parser.parse_args()
+    main(args.apk_path)
@@ -2,10 +2,13 @@ import re
 
 from androguard.core.analysis.analysis import ClassAnalysis
 
+from alpaka.utils import PrefixTrie
+
 # Packages found at https://developer.android.com/reference/packages.html
 ANDROID_PACKAGES = ["Landroid/", "Lcom/android/internal/util", "Ldalvik/", "Ljava/", "Ljavax/", "Lorg/apache/",
                     "Lorg/json/", "Lorg/w3c/dom/", "Lorg/xml/sax", "Lorg/xmlpull/v1/", "Ljunit/"]
 CUSTOM_ANDROID_PACKAGES = ANDROID_PACKAGES + ["Landroidx/", "[Landroidx/"]
+CUSTOM_ANDROID_PACKAGES_TRIE = PrefixTrie(CUSTOM_ANDROID_PACKAGES)
 
 PRIMITIVE_CLASS_REGEX = re.compile(r'^\[*[Z|B|C|D|F|I|J|S]$')
 
@@ -24,9 +27,8 @@ def primitive_class_filter(class_name_prefix: str, _class_analysis: ClassAnalysi
 def android_class_filter(class_name_prefix: str, class_analysis: ClassAnalysis):
     if class_analysis.is_external():
         return False
-    for candidate in CUSTOM_ANDROID_PACKAGES:
-        if class_name_prefix.startswith(candidate):
-            return False
+    if CUSTOM_ANDROID_PACKAGES_TRIE.matches(class_name_prefix):
+        return False
     return primitive_class_filter(class_name_prefix, class_analysis)
 
 
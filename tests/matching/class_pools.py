@@ -0,0 +1,64 @@
+import random
+from typing import Dict
+from unittest.mock import Mock
+
+from alpaka.apk.class_info import ClassInfo
+from alpaka.class_signature.distance import WeightedSignatureDistanceCalculator
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.config import DEFAULT_WEIGHTS
+
+DISTANCE_CALCULATOR = WeightedSignatureDistanceCalculator.from_weights_json(DEFAULT_WEIGHTS)
+
+
+def create_random_signature(rand: random.Random) -> ClassSignature:
+    # Values are drawn from small ranges so the pools contain many equal distances and identical signatures
+    return ClassSignature(
+        member_count=rand.randrange(4),
+        method_count=rand.randrange(6),
+        instructions_count=rand.randrange(30),
+        members_simhash=rand.choice((0, 0xFFFF, 1 << 63)),
+        methods_params_simhash=rand.getrandbits(3),
+        methods_returns_simhash=rand.getrandbits(64),
+        instructions_simhash=rand.getrandbits(64),
+        instruction_shingles_simhash=rand.getrandbits(64),
+        implemented_interfaces_count=rand.randrange(2),
+        implemented_interfaces_simhash=rand.getrandbits(2),
+        superclass_hash=rand.choice((0, -7, 1234567)),
+        string_literals_count=rand.randrange(3),
+        string_literals_simhash=rand.getrandbits(64),
+    )
+
+
+def create_class_info(class_name: str, signature: ClassSignature) -> ClassInfo:
+    class_analysis = Mock()
+    class_analysis.name = class_name
+    class_info = ClassInfo(class_analysis, True, Mock())
+    class_info._signature = signature
+    return class_info
+
+
+def create_random_class_pool(seed: int, size: int, prefix: str = 'Lcom/example/C') -> Dict[str, ClassInfo]:
+    rand = random.Random(seed)
+    signatures = [create_random_signature(rand) for _ in range(size)]
+    # Duplicate some of the signatures
+    for i in range(0, size, 5):
+        signatures[i] = rand.choice(signatures)
+    return {
+        f'{prefix}{i};': create_class_info(f'{prefix}{i};', signature)
+        for i, signature in enumerate(signatures)
+    }
+
+
+def to_comparable_matches(matches):
+    return {
+        class_name: [(match.item1, match.item2, match.match_rank, match.identical) for match in class_matches]
+        for class_name, class_matches in matches.items()
+    }
+
+
+def copy_signatures(source_pool: Dict[str, ClassInfo], target_pool: Dict[str, ClassInfo], step: int):
+    """
+    Give every step-th class of target_pool the signature of a class of source_pool
+    """
+    for source_class_info, target_class_info in zip(list(source_pool.values()), list(target_pool.values())[::step]):
+        target_class_info._signature = source_class_info.signature
@@ -0,0 +1,26 @@
+from alpaka.matching.blocking_class_matcher import BlockingClassMatcher, SignatureBlocks
+from tests.matching.class_pools import DISTANCE_CALCULATOR, copy_signatures, create_random_class_pool
+
+
+def test_blocking_matcher_statistics():
+    pool1 = create_random_class_pool(7, 60)
+    pool2 = create_random_class_pool(8, 150)
+    copy_signatures(pool1, pool2, 4)
+
+    matcher = BlockingClassMatcher(DISTANCE_CALCULATOR, 3)
+    matcher.match(pool1, pool2, False)
+
+    assert matcher.statistics['blocking_brute_force_distance_evaluations'] == len(pool1) * len(pool2)
+    assert matcher.statistics['blocking_blocks'] == sum(
+        count for name, count in matcher.statistics.items() if name.startswith('blocking_blocks_of_')
+    )
+    assert matcher.statistics['blocking_skipped_pairs'] > 0
+
+
+def test_signature_blocks():
+    pool = create_random_class_pool(9, 100)
+    signatures = [class_info.signature for class_info in pool.values()]
+    blocks = SignatureBlocks(signatures, DISTANCE_CALCULATOR)
+
+    assert sum(blocks.block_sizes) == len(signatures)
+    assert len(blocks.block_sizes) == len(set(map(SignatureBlocks.get_block_key, signatures)))
@@ -0,0 +1,89 @@
+import heapq
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from alpaka.matching.class_matcher import ClassMatcher
+from tests.matching.class_pools import DISTANCE_CALCULATOR, copy_signatures, create_random_class_pool, \
+    create_random_signature
+
+
+def test_bounded_distance_within_bound_equals_distance():
+    rand = random.Random(1)
+    for _ in range(200):
+        signature1, signature2 = create_random_signature(rand), create_random_signature(rand)
+        distance = DISTANCE_CALCULATOR.distance(signature1, signature2)
+        assert DISTANCE_CALCULATOR.bounded_distance(signature1, signature2, distance) == distance
+        assert DISTANCE_CALCULATOR.bounded_distance(signature1, signature2, math.inf) == distance
+        if distance > 0.01:
+            assert DISTANCE_CALCULATOR.bounded_distance(signature1, signature2, distance / 2) == math.inf
+
+
+def create_duplicated_class_pool(seed: int, size: int, unique_signatures_count: int):
+    # Interleaved groups of classes with identical signatures
+    pool = create_random_class_pool(seed, size)
+    signatures = [class_info.signature for class_info in list(pool.values())[:unique_signatures_count]]
+    for class_index, class_info in enumerate(pool.values()):
+        class_info._signature = signatures[class_index % unique_signatures_count]
+    return pool
+
+
+@pytest.mark.parametrize('maximum_matches_per_class', (1, 3, 20, 200))
+@pytest.mark.parametrize('pool2', (
+    create_random_class_pool(8, 150),
+    create_duplicated_class_pool(8, 150, 7),
+))
+def test_class_matcher_matches_nsmallest(maximum_matches_per_class, pool2):
+    pool1 = create_random_class_pool(7, 40)
+
+    matcher = ClassMatcher(DISTANCE_CALCULATOR, maximum_matches_per_class)
+    result = matcher.match(pool1, pool2, False)
+
+    for class_name, class_info in pool1.items():
+        expected = heapq.nsmallest(
+            maximum_matches_per_class,
+            (
+                (candidate, DISTANCE_CALCULATOR.distance(class_info.signature, candidate.signature))
+                for candidate in pool2.values()
+            ),
+            key=lambda candidate_and_distance: candidate_and_distance[1],
+        )
+        assert [(match.item2, match.match_rank) for match in result.matches[class_name]] == expected
+    assert matcher.statistics['compared_pairs'] == len(pool1) * len(pool2)
+    unique_signatures_count = len({class_info.signature.to_tuple() for class_info in pool2.values()})
+    assert matcher.statistics['deduplicated_pairs'] == len(pool1) * (len(pool2) - unique_signatures_count)
+    if maximum_matches_per_class < len(pool2):
+        assert matcher.statistics['pruned_pairs'] > 0
+
+
+def test_identical_signatures_are_matched_before_the_search():
+    pool1 = create_random_class_pool(7, 40)
+    pool2 = create_random_class_pool(8, 150)
+    copy_signatures(pool1, pool2, 3)
+    signature_counts1 = Counter(class_info.signature.to_tuple() for class_info in pool1.values())
+    signature_counts2 = Counter(class_info.signature.to_tuple() for class_info in pool2.values())
+
+    matcher = ClassMatcher(DISTANCE_CALCULATOR, match_identical_signatures=True)
+    result = matcher.match(pool1, pool2, False)
+
+    identical_matches = {
+        class_name: class_matches[0]
+        for class_name, class_matches in result.matches.items()
+        if class_matches[0].identical
+    }
+    assert 0 < len(identical_matches) == matcher.statistics['identical_signature_matches']
+    for class_name, match in identical_matches.items():
+        signature_key = match.item1.signature.to_tuple()
+        assert result.matches[class_name] == [match]
+        assert match.item2.signature == match.item1.signature
+        assert match.match_rank == 0
+        assert signature_counts1[signature_key] == signature_counts2[signature_key] == 1
+    # Classes matched by identical signatures are not candidates of the other classes
+    identical_classes2 = {id(match.item2) for match in identical_matches.values()}
+    for class_name, class_matches in result.matches.items():
+        if class_name not in identical_matches:
+            assert signature_counts1[pool1[class_name].signature.to_tuple()] > 1 \
+                or signature_counts2[pool1[class_name].signature.to_tuple()] != 1
+            assert not any(id(match.item2) in identical_classes2 for match in class_matches)
@@ -0,0 +1,14 @@
+from alpaka.matching.count_range_class_matcher import CountRangeClassMatcher
+from tests.matching.class_pools import DISTANCE_CALCULATOR, copy_signatures, create_random_class_pool
+
+
+def test_count_range_matcher_statistics():
+    pool1 = create_random_class_pool(10, 60)
+    pool2 = create_random_class_pool(11, 150)
+    copy_signatures(pool1, pool2, 4)
+
+    matcher = CountRangeClassMatcher(DISTANCE_CALCULATOR, 3)
+    matcher.match(pool1, pool2, False)
+
+    assert matcher.statistics['count_range_brute_force_distance_evaluations'] == len(pool1) * len(pool2)
+    assert matcher.statistics['count_range_skipped_pairs'] > 0
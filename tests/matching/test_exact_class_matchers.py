@@ -0,0 +1,68 @@
+import pytest
+
+from alpaka.matching.base import BoundedNearest
+from alpaka.matching.blocking_class_matcher import BlockingClassMatcher, SignatureBlocks
+from alpaka.matching.class_matcher import ClassMatcher
+from alpaka.matching.count_range_class_matcher import CountRangeClassMatcher, SortedCountsIndex
+from alpaka.matching.vp_tree_class_matcher import VantagePointTree, VantagePointTreeClassMatcher
+from tests.matching.class_pools import DISTANCE_CALCULATOR, copy_signatures, create_random_class_pool, \
+    to_comparable_matches
+
+EXACT_MATCHER_FACTORIES = {
+    'vp_tree_leaf_size_2': lambda maximum_matches_per_class: VantagePointTreeClassMatcher(
+        DISTANCE_CALCULATOR, maximum_matches_per_class, leaf_size=2
+    ),
+    'vp_tree': lambda maximum_matches_per_class: VantagePointTreeClassMatcher(
+        DISTANCE_CALCULATOR, maximum_matches_per_class
+    ),
+    'vp_tree_single_leaf': lambda maximum_matches_per_class: VantagePointTreeClassMatcher(
+        DISTANCE_CALCULATOR, maximum_matches_per_class, leaf_size=1000
+    ),
+    'blocking': lambda maximum_matches_per_class: BlockingClassMatcher(DISTANCE_CALCULATOR, maximum_matches_per_class),
+    'count_range': lambda maximum_matches_per_class: CountRangeClassMatcher(
+        DISTANCE_CALCULATOR, maximum_matches_per_class
+    ),
+}
+EXACT_INDEX_TYPES = (VantagePointTree, SignatureBlocks, SortedCountsIndex)
+
+
+@pytest.mark.parametrize('matcher_name', EXACT_MATCHER_FACTORIES)
+@pytest.mark.parametrize('maximum_matches_per_class', (1, 3, 20, 1000))
+def test_exact_matcher_matches_brute_force(matcher_name, maximum_matches_per_class):
+    pool1 = create_random_class_pool(7, 60)
+    pool2 = create_random_class_pool(8, 150)
+    copy_signatures(pool1, pool2, 4)
+
+    expected = ClassMatcher(DISTANCE_CALCULATOR, maximum_matches_per_class).match(pool1, pool2, False)
+    result = EXACT_MATCHER_FACTORIES[matcher_name](maximum_matches_per_class).match(pool1, pool2, False)
+
+    assert to_comparable_matches(result.matches) == to_comparable_matches(expected.matches)
+
+
+@pytest.mark.parametrize('index_type', EXACT_INDEX_TYPES)
+def test_exact_index_query(index_type):
+    signatures = [class_info.signature for class_info in create_random_class_pool(9, 100).values()]
+    index = index_type(signatures, DISTANCE_CALCULATOR)
+
+    assert index.query(signatures[0], 0) == []
+    assert index.query(signatures[0], 1) == [(0.0, 0)]
+    assert index_type([], DISTANCE_CALCULATOR).query(signatures[0], 3) == []
+
+
+def test_bounded_nearest():
+    closest = BoundedNearest(3)
+    assert closest.get_bound() == float('inf')
+    for distance, index in ((5.0, 0), (1.0, 1), (5.0, 2), (3.0, 3), (5.0, 4)):
+        closest.offer(distance, index)
+
+    assert closest.is_full()
+    assert closest.farthest_distance == 5.0
+    # Ties in distance are broken by index
+    assert closest.to_list() == [(1.0, 1), (3.0, 3), (5.0, 0)]
+    assert not closest.is_beyond(5.0)
+    assert closest.is_beyond(5.1)
+
+
+def test_bounded_nearest_rejects_non_positive_count():
+    with pytest.raises(ValueError):
+        BoundedNearest(0)
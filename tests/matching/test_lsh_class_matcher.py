@@ -0,0 +1,46 @@
+import dataclasses
+
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.matching.lsh_class_matcher import LshClassMatcher, SimhashLshIndex
+from tests.matching.class_pools import DISTANCE_CALCULATOR, create_class_info
+
+EMPTY_SIGNATURE = ClassSignature(*([0] * len(dataclasses.fields(ClassSignature))))
+
+
+def create_signature(instructions_simhash: int) -> ClassSignature:
+    return dataclasses.replace(EMPTY_SIGNATURE, instructions_simhash=instructions_simhash)
+
+
+def test_index_finds_simhashes_with_less_differing_bits_than_bands():
+    indexed_simhash = 0x0123456789ABCDEF
+    index = SimhashLshIndex(
+        [create_signature(indexed_simhash), create_signature(~indexed_simhash & 0xFFFFFFFFFFFFFFFF)],
+        ['instructions_simhash'],
+        bands_count=4,
+        maximum_bucket_size=10,
+    )
+    # 3 differing bits, one in each of the 3 lowest bands
+    assert index.query(create_signature(indexed_simhash ^ (1 | 1 << 16 | 1 << 32))) == [0]
+    assert index.query(create_signature(indexed_simhash)) == [0]
+    assert index.query(create_signature(0)) == []
+
+
+def test_index_ignores_large_buckets():
+    index = SimhashLshIndex([create_signature(0)] * 3, ['instructions_simhash'], 4, maximum_bucket_size=2)
+    assert index.query(create_signature(0)) == []
+
+
+def test_classes_without_candidates_fall_back_to_brute_force():
+    # Lc is the closest class to La, but they differ in every band
+    pool1 = {'La;': create_class_info('La;', create_signature(0x1111222233334444))}
+    pool2 = {
+        'Lb;': create_class_info('Lb;', create_signature(0x5555666677778888)),
+        'Lc;': create_class_info('Lc;', create_signature(0x1112222333344445)),
+    }
+    matcher = LshClassMatcher(DISTANCE_CALCULATOR, simhash_fields=['instructions_simhash'])
+
+    matches = matcher.match(pool1, pool2, False).matches
+
+    assert [match.item2 for match in matches['La;']] == [pool2['Lc;'], pool2['Lb;']]
+    assert matcher.statistics['lsh_brute_force_fallbacks'] == 1
+    assert matcher.statistics['lsh_candidates'] == 0
@@ -0,0 +1,52 @@
+import pytest
+
+from alpaka.apk_differ import ApkDiffer
+from alpaka.matching.class_matcher import ClassMatcher
+from alpaka.matching.parallel import ParallelClassMatcher
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+from tests.matching.class_pools import DISTANCE_CALCULATOR, copy_signatures, create_random_class_pool, \
+    to_comparable_matches
+
+
+def create_pool_pairs(match_by_name):
+    pool1 = create_random_class_pool(7, 40)
+    pool2 = create_random_class_pool(8, 60)
+    # Classes from a different package, that can only be matched by signature
+    pool3 = create_random_class_pool(9, 30, 'Lorg/example/D')
+    pool4 = create_random_class_pool(10, 20, 'Lorg/example/E')
+    copy_signatures(pool1, pool2, 3)
+    for class_info in list(pool1.values())[::3]:
+        class_info.is_obfuscated_name = False
+    for class_info in list(pool2.values())[::2]:
+        class_info.is_obfuscated_name = False
+    return [(pool1, pool2, match_by_name), (pool3, pool4, False)]
+
+
+@pytest.mark.parametrize('match_by_name', (True, False))
+@pytest.mark.parametrize('minimum_split_pairs', (1, 1_000_000))
+@pytest.mark.parametrize('match_identical_signatures', (True, False))
+def test_parallel_matching_matches_sequential_matching(match_by_name, minimum_split_pairs, match_identical_signatures):
+    pool_pairs = create_pool_pairs(match_by_name)
+    class_matcher = ClassMatcher(DISTANCE_CALCULATOR, match_identical_signatures=match_identical_signatures)
+    expected = dict()
+    for pool1, pool2, pair_match_by_name in pool_pairs:
+        expected.update(class_matcher.match(pool1, pool2, pair_match_by_name).matches)
+
+    parallel_class_matcher = ClassMatcher(DISTANCE_CALCULATOR, match_identical_signatures=match_identical_signatures)
+    result = ParallelClassMatcher(parallel_class_matcher, 2, minimum_split_pairs).match(pool_pairs)
+
+    assert list(result) == list(expected)
+    assert to_comparable_matches(result) == to_comparable_matches(expected)
+    assert parallel_class_matcher.statistics['identical_signature_matches'] \
+        == class_matcher.statistics['identical_signature_matches']
+
+
+def test_parallel_matcher_rejects_non_positive_jobs():
+    with pytest.raises(ValueError):
+        ParallelClassMatcher(ClassMatcher(DISTANCE_CALCULATOR), 0)
+
+
+@pytest.mark.parametrize('jobs', (0, -3))
+def test_apk_differ_rejects_non_positive_jobs(jobs):
+    with pytest.raises(ValueError):
+        ApkDiffer(DummyObfuscationDetector(False), jobs=jobs)
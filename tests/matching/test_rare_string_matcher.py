@@ -0,0 +1,123 @@
+import dataclasses
+import random
+from unittest.mock import Mock
+
+from alpaka.apk.analyzed_apk import AnalyzedApk
+from alpaka.apk_differ import ApkDiffer
+from alpaka.matching.rare_string_matcher import RareStringLiteralMatcher
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+from tests.apks_config.bye_apk_config import TOAST_BYE_APK_CONFIG
+from tests.apks_config.hello_apk_config import TOAST_HELLO_APK_CONFIG
+from tests.matching.class_pools import DISTANCE_CALCULATOR, create_class_info, create_random_signature
+
+
+def create_string_literal_index(string_literals_per_class):
+    string_literal_index = Mock()
+    string_literal_index.get_string_literals.side_effect = \
+        lambda class_analysis: string_literals_per_class.get(class_analysis.name, [])
+    return string_literal_index
+
+
+def create_class_pool(class_names, rand: random.Random):
+    return {class_name: create_class_info(class_name, create_random_signature(rand)) for class_name in class_names}
+
+
+def create_similar_signature(signature):
+    return dataclasses.replace(signature, instructions_count=signature.instructions_count + 1)
+
+
+def test_rare_string_literal_matcher():
+    rand = random.Random(23)
+    pool1 = create_class_pool(['La;', 'Lb;', 'Lc;', 'Ld;', 'Le;'], rand)
+    pool2 = create_class_pool(['Lx;', 'Ly;', 'Lz;', 'Lw;', 'Le;'], rand)
+    # The classes sharing rare literals are similar
+    pool2['Lx;']._signature = create_similar_signature(pool1['La;'].signature)
+    pool2['Le;']._signature = create_similar_signature(pool1['Le;'].signature)
+    string_literals_per_class = {
+        # Shared with a single class of the other pool
+        'La;': ['common', 'tag-a'],
+        'Lx;': ['tag-a', 'common'],
+        # Loaded by too many classes to be rare
+        'Lb;': ['common'],
+        'Ly;': ['common'],
+        'Lc;': ['common'],
+        # Not loaded by the other pool
+        'Ld;': ['tag-d'],
+        # Left to the matching by name
+        'Le;': ['tag-e'],
+    }
+    rare_string_matcher = RareStringLiteralMatcher(
+        DISTANCE_CALCULATOR, create_string_literal_index(string_literals_per_class), maximum_literal_classes=4,
+    )
+    for class_info in list(pool1.values()) + list(pool2.values()):
+        class_info.is_obfuscated_name = False
+
+    matching_result = rare_string_matcher.match(pool1, pool2)
+
+    assert list(matching_result.matches) == ['La;']
+    (match,) = matching_result.matches['La;']
+    assert (match.item1, match.item2) == (pool1['La;'], pool2['Lx;'])
+    assert match.match_rank == DISTANCE_CALCULATOR.distance(pool1['La;'].signature, pool2['Lx;'].signature)
+    assert list(matching_result.unmatched[0]) == ['Lb;', 'Lc;', 'Ld;', 'Le;']
+    assert list(matching_result.unmatched[1]) == ['Ly;', 'Lz;', 'Lw;', 'Le;']
+    assert rare_string_matcher.statistics['rare_string_literals'] == 1
+    assert rare_string_matcher.statistics['rare_string_matches'] == 1
+
+    # Without the matching by name, the classes sharing tag-e are matched too
+    rare_string_matcher = RareStringLiteralMatcher(
+        DISTANCE_CALCULATOR, create_string_literal_index(string_literals_per_class), maximum_literal_classes=4,
+    )
+    assert list(rare_string_matcher.match(pool1, pool2, match_by_name=False).matches) == ['La;', 'Le;']
+
+
+def test_rare_string_literal_matcher_matches_closest_candidates():
+    rand = random.Random(29)
+    pool1 = create_class_pool(['La;', 'Lb;'], rand)
+    pool2 = create_class_pool(['Lx;', 'Ly;'], rand)
+    # All of the classes share the same rare literal, each class is matched to its closest candidate
+    pool2['Ly;']._signature = pool1['La;'].signature
+    string_literals_per_class = {class_name: ['tag'] for class_name in ['La;', 'Lb;', 'Lx;', 'Ly;']}
+    rare_string_matcher = RareStringLiteralMatcher(
+        DISTANCE_CALCULATOR, create_string_literal_index(string_literals_per_class), maximum_literal_classes=4,
+    )
+
+    matching_result = rare_string_matcher.match(pool1, pool2)
+
+    (match,) = matching_result.matches['La;']
+    assert match.item2 is pool2['Ly;']
+    assert match.identical
+
+
+def test_rare_string_literal_matcher_skips_distant_classes():
+    rand = random.Random(31)
+    pool1 = create_class_pool(['La;', 'Lb;'], rand)
+    pool2 = create_class_pool(['Lx;', 'Ly;'], rand)
+    pool2['Ly;']._signature = create_similar_signature(pool1['Lb;'].signature)
+    # Unrelated classes sharing a copied log tag, and related classes sharing a rare literal
+    string_literals_per_class = {'La;': ['log-tag'], 'Lx;': ['log-tag'], 'Lb;': ['url'], 'Ly;': ['url']}
+    distance = DISTANCE_CALCULATOR.distance(pool1['La;'].signature, pool2['Lx;'].signature)
+    rare_string_matcher = RareStringLiteralMatcher(
+        DISTANCE_CALCULATOR, create_string_literal_index(string_literals_per_class), maximum_distance=distance / 2,
+    )
+
+    matching_result = rare_string_matcher.match(pool1, pool2, match_by_name=False)
+
+    assert list(matching_result.matches) == ['Lb;']
+    assert list(matching_result.unmatched[0]) == ['La;']
+    assert list(matching_result.unmatched[1]) == ['Lx;']
+    assert rare_string_matcher.statistics['rare_string_distant_pairs'] == 1
+
+
+def test_apk_differ_rare_string_literals():
+    old_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, session_path=TOAST_HELLO_APK_CONFIG.session_path)
+    new_apk = AnalyzedApk(TOAST_BYE_APK_CONFIG.apk_path, session_path=TOAST_BYE_APK_CONFIG.session_path)
+    apk_differ = ApkDiffer(DummyObfuscationDetector(False), match_rare_string_literals=True)
+
+    matches = apk_differ.diff(old_apk, new_apk, match_by_name=False)
+
+    assert apk_differ.statistics['rare_string_matches'] > 0
+    assert len(matches) == len(list(old_apk.analysis.get_internal_classes()))
+    # The classes of the toast apks are not renamed, so every class sharing rare literals matches its own name
+    rare_string_matched_class_names = list(matches)[:apk_differ.statistics['rare_string_matches']]
+    for class_name in rare_string_matched_class_names:
+        assert matches[class_name][0].item2.analysis.name == class_name
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from alpaka.class_signature.signature_array import SignatureArray
+from alpaka.class_signature.vectorized_distance import VectorizedSignatureDistanceCalculator
+from alpaka.matching.class_matcher import ClassMatcher
+from alpaka.matching.vectorized_class_matcher import VectorizedClassMatcher, nsmallest_indices
+from tests.matching.class_pools import DISTANCE_CALCULATOR, create_random_class_pool, to_comparable_matches
+
+
+def test_vectorized_distances_equal_scalar_distances():
+    pool1 = list(create_random_class_pool(1, 30).values())
+    pool2 = list(create_random_class_pool(2, 40).values())
+    distances = VectorizedSignatureDistanceCalculator(DISTANCE_CALCULATOR).distances(
+        SignatureArray.from_signatures([class_info.signature for class_info in pool1]),
+        SignatureArray.from_signatures([class_info.signature for class_info in pool2]),
+    )
+    for i, class_info1 in enumerate(pool1):
+        for j, class_info2 in enumerate(pool2):
+            assert distances[i, j] == DISTANCE_CALCULATOR.distance(class_info1.signature, class_info2.signature)
+
+
+@pytest.mark.parametrize(('distances', 'count', 'expected_indices'), (
+    ([3.0, 1.0, 2.0], 2, [1, 2]),
+    ([1.0, 0.0, 1.0, 1.0], 3, [1, 0, 2]),
+    ([2.0, 2.0, 2.0, 2.0], 2, [0, 1]),
+    ([5.0], 3, [0]),
+    ([], 3, []),
+))
+def test_nsmallest_indices(distances, count, expected_indices):
+    assert list(nsmallest_indices(np.array(distances), count)) == expected_indices
+
+
+@pytest.mark.parametrize('block_size', (1, 7, VectorizedClassMatcher.BLOCK_SIZE))
+def test_vectorized_matcher_matches_brute_force(block_size, monkeypatch):
+    monkeypatch.setattr(VectorizedClassMatcher, 'BLOCK_SIZE', block_size)
+    pool1 = create_random_class_pool(3, 60)
+    pool2 = create_random_class_pool(4, 80)
+
+    expected = ClassMatcher(DISTANCE_CALCULATOR).match(pool1, pool2, False)
+    result = VectorizedClassMatcher(DISTANCE_CALCULATOR).match(pool1, pool2, False)
+
+    assert to_comparable_matches(result.matches) == to_comparable_matches(expected.matches)
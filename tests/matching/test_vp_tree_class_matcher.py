@@ -0,0 +1,20 @@
+import pytest
+
+from alpaka.matching.vp_tree_class_matcher import VantagePointTree, VantagePointTreeClassMatcher
+from tests.matching.class_pools import DISTANCE_CALCULATOR, create_random_class_pool
+
+
+def test_vp_tree_matcher_statistics():
+    pool1 = create_random_class_pool(5, 50)
+    pool2 = create_random_class_pool(6, 120)
+
+    matcher = VantagePointTreeClassMatcher(DISTANCE_CALCULATOR, 3)
+    matcher.match(pool1, pool2, False)
+
+    assert matcher.statistics['vp_tree_brute_force_distance_evaluations'] == len(pool1) * len(pool2)
+    assert 0 < matcher.statistics['vp_tree_query_distance_evaluations'] < len(pool1) * len(pool2)
+
+
+def test_vp_tree_rejects_small_leaves():
+    with pytest.raises(ValueError):
+        VantagePointTree([], DISTANCE_CALCULATOR, leaf_size=1)
@@ -0,0 +1,50 @@
+from unittest.mock import Mock
+
+from alpaka.obfuscation_detection.english_dictionary import EnglishDictionary
+
+
+def create_check_word():
+    return Mock(side_effect=lambda word: word in {'hello', 'world'})
+
+
+def test_each_word_is_checked_once():
+    check_word = create_check_word()
+    dictionary = EnglishDictionary(check_word)
+
+    assert dictionary.check_many(['hello', 'asdf', 'world', 'hello', 'asdf']) == [True, False, True, True, False]
+    assert dictionary.check('hello')
+    assert not dictionary.check('asdf')
+    assert check_word.call_count == 3
+    assert len(dictionary) == 3
+
+
+def test_verdicts_are_saved_between_runs(tmp_path):
+    cache_path = str(tmp_path / 'dictionary.json')
+    dictionary = EnglishDictionary(create_check_word(), cache_path)
+    dictionary.check_many(['hello', 'asdf'])
+    dictionary.save()
+
+    check_word = create_check_word()
+    loaded_dictionary = EnglishDictionary(check_word, cache_path)
+    assert loaded_dictionary.check_many(['hello', 'asdf', 'world']) == [True, False, True]
+    check_word.assert_called_once_with('world')
+
+
+def test_corrupted_cache_file_is_replaced(tmp_path):
+    cache_path = tmp_path / 'dictionary.json'
+    cache_path.write_text('{"version": ')
+    dictionary = EnglishDictionary(create_check_word(), str(cache_path))
+    assert len(dictionary) == 0
+    dictionary.check('hello')
+    dictionary.save()
+
+    assert len(EnglishDictionary(create_check_word(), str(cache_path))) == 1
+
+
+def test_shared_dictionary():
+    dictionary = EnglishDictionary(create_check_word())
+    EnglishDictionary.set_shared(dictionary)
+    try:
+        assert EnglishDictionary.get_shared() is dictionary
+    finally:
+        EnglishDictionary.set_shared(None)
@@ -1,6 +1,11 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
+import pytest
+
 from alpaka.obfuscation_detection.memoization import MemoizingObfuscationDetector
+from alpaka.obfuscation_detection.verdict_table import ObfuscationVerdictTable
 
 
 def test_decorated_detector_called_one_time_per_identifier():
@@ -48,3 +53,88 @@ def test_return_value_matches_decorated_detector():
     assert memoizing_detector.is_class_name_obfuscated('SomethingElse') == 'SomethingElse'
     assert memoizing_detector.is_class_name_obfuscated('Lcom/foo/bar/Baz;') == 'Lcom/foo/bar/Baz;'
     assert memoizing_detector.is_class_name_obfuscated('Lanother/class/Identifier;') == 'Lanother/class/Identifier;'
+
+
+def test_least_recently_used_verdicts_are_evicted():
+    decorated_detector = Mock()
+    decorated_detector.is_class_name_obfuscated.side_effect = lambda identifier: identifier.startswith('La/')
+    memoizing_detector = MemoizingObfuscationDetector(decorated_detector, maximum_entries=2)
+
+    memoizing_detector.is_class_name_obfuscated('La/A;')
+    memoizing_detector.is_class_name_obfuscated('Lb/B;')
+    memoizing_detector.is_class_name_obfuscated('La/A;')
+    memoizing_detector.is_class_name_obfuscated('Lc/C;')
+    assert len(memoizing_detector) == 2
+    assert memoizing_detector.statistics == {'memoization_hits': 1, 'memoization_misses': 3, 'memoization_evictions': 1}
+
+    # Lb/B; was the least recently used
+    memoizing_detector.is_class_name_obfuscated('La/A;')
+    assert decorated_detector.is_class_name_obfuscated.call_count == 3
+    memoizing_detector.is_class_name_obfuscated('Lb/B;')
+    assert decorated_detector.is_class_name_obfuscated.call_count == 4
+
+
+def test_concurrent_detection():
+    decorated_detector = Mock()
+    decorated_detector.is_class_name_obfuscated.side_effect = lambda identifier: len(identifier) % 2 == 0
+    memoizing_detector = MemoizingObfuscationDetector(decorated_detector, maximum_entries=50)
+    class_names = [f'Lcom/foo/C{i % 80};' for i in range(4000)]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(memoizing_detector.is_class_name_obfuscated, class_names))
+
+    assert results == [len(class_name) % 2 == 0 for class_name in class_names]
+    assert len(memoizing_detector) == 50
+    statistics = memoizing_detector.statistics
+    assert statistics['memoization_hits'] + statistics['memoization_misses'] == len(class_names)
+    # Threads missing the same name at once both detect it
+    assert statistics['memoization_misses'] - statistics['memoization_evictions'] >= 50
+
+
+def test_verdicts_are_saved_by_detector_identity(tmp_path):
+    cache_path = str(tmp_path / 'verdicts.json')
+    decorated_detector = Mock(identity='detector')
+    decorated_detector.is_class_name_obfuscated.return_value = True
+    decorated_detector.is_package_name_obfuscated.return_value = False
+    memoizing_detector = MemoizingObfuscationDetector(decorated_detector, cache_path=cache_path)
+    memoizing_detector.is_class_name_obfuscated('La/A;')
+    memoizing_detector.is_package_name_obfuscated('La/')
+    memoizing_detector.save()
+    MemoizingObfuscationDetector(Mock(identity='other detector'), cache_path=cache_path).save()
+
+    loaded_decorated_detector = Mock(identity='detector')
+    loaded_detector = MemoizingObfuscationDetector(loaded_decorated_detector, cache_path=cache_path)
+    assert loaded_detector.is_class_name_obfuscated('La/A;') is True
+    assert loaded_detector.is_package_name_obfuscated('La/') is False
+    loaded_decorated_detector.is_class_name_obfuscated.assert_not_called()
+    loaded_decorated_detector.is_package_name_obfuscated.assert_not_called()
+
+    assert len(MemoizingObfuscationDetector(Mock(identity='other detector'), cache_path=cache_path)) == 0
+
+
+def test_verdicts_of_apk_dependent_detectors_are_not_saved(tmp_path):
+    cache_path = str(tmp_path / 'verdicts.json')
+    detector = Mock(identity='detector', is_name_only=False)
+    detector.classify_classes.return_value = detector.classify_packages.return_value = bytearray()
+
+    with pytest.raises(ValueError):
+        MemoizingObfuscationDetector(detector, cache_path=cache_path)
+    with pytest.raises(ValueError):
+        MemoizingObfuscationDetector(ObfuscationVerdictTable(detector), cache_path=cache_path)
+    MemoizingObfuscationDetector(detector).save()
+    assert not os.path.exists(cache_path)
+
+
+def test_bulk_classification_classifies_missing_names_once():
+    decorated_detector = Mock()
+    decorated_detector.classify_classes.side_effect = lambda class_names: bytearray(
+        class_name.startswith('La/') for class_name in class_names
+    )
+    decorated_detector.is_class_name_obfuscated.return_value = True
+    memoizing_detector = MemoizingObfuscationDetector(decorated_detector)
+    memoizing_detector.is_class_name_obfuscated('La/A;')
+
+    assert memoizing_detector.classify_classes(['La/A;', 'Lb/B;', 'La/C;', 'Lb/B;']) == bytearray((1, 0, 1, 0))
+    decorated_detector.classify_classes.assert_called_once_with(['Lb/B;', 'La/C;'])
+    assert memoizing_detector.is_class_name_obfuscated('La/C;')
+    assert decorated_detector.is_class_name_obfuscated.call_count == 1
@@ -1,3 +1,9 @@
+import random
+import string
+
+import pytest
+
+from alpaka.obfuscation_detection.english_dictionary import EnglishDictionary
 from alpaka.obfuscation_detection.score_based_detection import WordObfuscationDetector, ClassNameObfuscationDetector, \
     PackageNameObfuscationDetector
 
@@ -35,3 +41,52 @@ def test_package_name_obfuscation_detector():
     assert is_obfuscated_func("asdsgd")
     assert is_obfuscated_func("asd123")
     assert is_obfuscated_func("dfhgdifhsdvn")
+
+
+NAME_CHARACTERS = string.ascii_letters + string.digits + '$_'
+NAME_PREFIXES = ('', 'Anonymous', 'AnonymousClass', 'Lcom/example/', 'I', '$', '_')
+
+
+def generate_names(random_generator: random.Random, count: int):
+    names = [
+        '', '$', '_', '1', 'A', 'a', 'AB', 'Ab', 'ABC', 'AnonymousClass1', 'A_B', 'Lcom/Hello;',
+        'hello', 'hello_friend', 'NativePeer', 'ResultReceiver', 'IResultReceiver', 'Result$Receiver',
+    ]
+    for _ in range(count):
+        prefix = random_generator.choice(NAME_PREFIXES)
+        length = random_generator.randint(0, 16)
+        names.append(prefix + ''.join(random_generator.choice(NAME_CHARACTERS) for _ in range(length)))
+    return names
+
+
+def get_verdict(is_obfuscated, name):
+    """
+    :return: the verdict, or the type of the raised exception
+    """
+    try:
+        return is_obfuscated(name)
+    except Exception as exception:
+        return type(exception)
+
+
+def is_fake_english_word(word: str):
+    return word.isalpha() and len(word) % 3 != 0
+
+
+@pytest.mark.parametrize('dictionary', [
+    pytest.param(lambda: EnglishDictionary(check_word=is_fake_english_word), id='fake'),
+    pytest.param(lambda: None, id='shared'),
+])
+def test_compiled_verdicts_match_grade_system(dictionary):
+    dictionary = dictionary()
+    names = generate_names(random.Random(17), 3000)
+    detectors = [
+        WordObfuscationDetector(dictionary),
+        ClassNameObfuscationDetector(dictionary),
+        PackageNameObfuscationDetector(dictionary),
+    ]
+    for detector in detectors:
+        compiled_verdicts = [get_verdict(detector.is_obfuscated, name) for name in names]
+        grade_system_verdicts = [get_verdict(detector.is_obfuscated_by_grade_system, name) for name in names]
+        assert compiled_verdicts == grade_system_verdicts
+        assert True in compiled_verdicts and False in compiled_verdicts
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, Mock
 
+from alpaka.obfuscation_detection.memoization import MemoizingObfuscationDetector
 from alpaka.obfuscation_detection.simple_detection import SimpleObfuscationDetector
 import pytest
 
@@ -12,7 +13,7 @@ import pytest
     ('something_else', True),
 ))
 def test_is_obfuscated(value, expected_result):
-    detector = SimpleObfuscationDetector(Mock(), Mock(), Mock())
+    detector = SimpleObfuscationDetector.from_class_names((), (), (), Mock())
     detector._is_primitive = Mock(side_effect=lambda x: x == 'primitive')
     detector._is_in_both_versions = Mock(side_effect=lambda x: x != 'not_both_versions')
     detector._is_external = Mock(side_effect=lambda x: x == 'external')
@@ -23,18 +24,22 @@ def test_is_obfuscated(value, expected_result):
 
 def test_is_all_correct_words():
     dictionary = MagicMock()
-    detector = SimpleObfuscationDetector(Mock(), Mock(), dictionary)
+    detector = SimpleObfuscationDetector.from_class_names((), (), (), dictionary)
     detector._separate_class_descriptor_to_words = Mock(return_value=['Foo', 'Bar', 'Baz'])
 
-    dictionary.check.return_value = True
+    dictionary.check_many.side_effect = lambda words: [True for _ in words]
     assert detector._is_all_correct_words('')
 
-    dictionary.check.return_value = False
+    dictionary.check_many.side_effect = lambda words: [False for _ in words]
     assert not detector._is_all_correct_words('')
 
-    dictionary.check.side_effect = lambda word: word == 'Foo'
+    dictionary.check_many.side_effect = lambda words: [word == 'Foo' for word in words]
     assert not detector._is_all_correct_words('')
-    dictionary.check.side_effect = lambda word: word != 'Baz'
+    dictionary.check_many.side_effect = lambda words: [word != 'Baz' for word in words]
+    assert not detector._is_all_correct_words('')
+
+    detector._separate_class_descriptor_to_words = Mock(return_value=['Foo', 'B'])
+    dictionary.check_many.side_effect = lambda words: [True for _ in words]
     assert not detector._is_all_correct_words('')
 
 
@@ -50,3 +55,64 @@ def test_is_all_correct_words():
 ))
 def test_separate_class_descriptor_to_words(string, expected_words):
     assert SimpleObfuscationDetector._separate_class_descriptor_to_words(string) == expected_words
+
+
+def test_bulk_classification_matches_per_name_classification():
+    class_names = ['LFooBar;', 'LFooBaz;', 'LFooB;']
+    dictionary = MagicMock()
+    dictionary.check_many.side_effect = lambda words: [word.lower() in {'foo', 'bar'} for word in words]
+    detector = SimpleObfuscationDetector.from_class_names(class_names, class_names, (), dictionary)
+    class_names = ['LFooBar;', 'LFooBaz;', 'I', '[LFooBar;', 'LMissingFoo;', 'Ljava/lang/Object;', 'LFooB;', 'LFooBar;']
+    package_names = ['Lfoo/bar/', 'Lfoo/baz/', 'Lfoo/bar/']
+
+    assert detector.classify_classes(class_names) \
+        == bytearray(detector.is_class_name_obfuscated(class_name) for class_name in class_names)
+    assert detector.classify_packages(package_names) \
+        == bytearray(detector.is_package_name_obfuscated(package_name) for package_name in package_names)
+
+
+def create_class_analysis(class_name, is_external=False):
+    class_analysis = Mock()
+    class_analysis.name = class_name
+    class_analysis.is_external.return_value = is_external
+    return class_analysis
+
+
+def test_class_names_of_analyses():
+    old_analysis = Mock()
+    old_analysis.get_classes.return_value = [
+        create_class_analysis('LFooBar;'), create_class_analysis('LOnlyOld;'),
+        create_class_analysis('Lcom/example/External;', is_external=True),
+    ]
+    new_analysis = Mock()
+    new_analysis.get_classes.return_value = [
+        create_class_analysis('LFooBar;'), create_class_analysis('LOnlyNew;'),
+        create_class_analysis('Lcom/example/External;', is_external=True),
+    ]
+    detector = SimpleObfuscationDetector(old_analysis, new_analysis, MagicMock())
+    detector_from_class_names = SimpleObfuscationDetector.from_class_names(
+        ['LFooBar;', 'LOnlyOld;', 'Lcom/example/External;'],
+        ['LFooBar;', 'LOnlyNew;', 'Lcom/example/External;'],
+        ['Lcom/example/External;'],
+        MagicMock(),
+    )
+
+    for tested_detector in (detector, detector_from_class_names):
+        assert tested_detector._is_in_both_versions('LFooBar;')
+        assert tested_detector._is_in_both_versions('Lcom/example/External;')
+        assert not tested_detector._is_in_both_versions('LOnlyOld;')
+        assert not tested_detector._is_in_both_versions('LOnlyNew;')
+        assert tested_detector._is_external('Lcom/example/External;')
+        assert tested_detector._is_external('Ljava/lang/Object;')
+        assert not tested_detector._is_external('LFooBar;')
+        assert tested_detector.is_class_name_obfuscated('LOnlyNew;')
+        assert not tested_detector.is_class_name_obfuscated('Lcom/example/External;')
+
+
+def test_verdicts_are_not_saved(tmp_path):
+    # The verdicts depend on the classes of the two versions, so they must not be replayed for other apks
+    detector = SimpleObfuscationDetector.from_class_names(['La/A;'], ['La/A;'], (), Mock())
+
+    assert not detector.is_name_only
+    with pytest.raises(ValueError):
+        MemoizingObfuscationDetector(detector, cache_path=str(tmp_path / 'verdicts.json'))
@@ -0,0 +1,46 @@
+from unittest.mock import Mock
+
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector, ObfuscationDetector
+from alpaka.obfuscation_detection.verdict_table import ObfuscationVerdictTable
+
+
+class NameLengthObfuscationDetector(ObfuscationDetector):
+
+    def is_class_name_obfuscated(self, class_name: str) -> bool:
+        return len(class_name) < 5
+
+    def is_package_name_obfuscated(self, package_name: str) -> bool:
+        return len(package_name) < 4
+
+
+def test_default_classification_is_per_name():
+    detector = NameLengthObfuscationDetector()
+    assert detector.classify_classes(['La/b;', 'La;', 'I']) == bytearray((0, 1, 1))
+    assert detector.classify_packages(['La/', 'Lcom/']) == bytearray((1, 0))
+    assert DummyObfuscationDetector(True).classify_classes([]) == bytearray()
+
+
+def test_table_classifies_distinct_names_in_bulk():
+    inner_detector = Mock(wraps=NameLengthObfuscationDetector())
+    verdict_table = ObfuscationVerdictTable(inner_detector, ['La/b;', 'La;', 'La/b;', 'I'], ['La/', 'Lcom/'])
+
+    inner_detector.classify_classes.assert_called_once_with(['La/b;', 'La;', 'I'])
+    inner_detector.classify_packages.assert_called_once_with(['La/', 'Lcom/'])
+    assert not verdict_table.is_class_name_obfuscated('La/b;')
+    assert verdict_table.is_class_name_obfuscated('I')
+    assert verdict_table.is_package_name_obfuscated('La/')
+    assert verdict_table.classify_classes(['I', 'La;', 'La/b;']) == bytearray((1, 1, 0))
+    inner_detector.is_class_name_obfuscated.assert_not_called()
+    inner_detector.is_package_name_obfuscated.assert_not_called()
+    assert len(verdict_table) == 5
+
+
+def test_table_classifies_missing_names_with_the_inner_detector():
+    inner_detector = Mock(wraps=NameLengthObfuscationDetector())
+    verdict_table = ObfuscationVerdictTable(inner_detector)
+
+    assert verdict_table.is_class_name_obfuscated('Lb;')
+    assert verdict_table.is_class_name_obfuscated('Lb;')
+    inner_detector.is_class_name_obfuscated.assert_called_once_with('Lb;')
+    assert verdict_table.classify_classes(['Lb;', 'Lcom/c;']) == bytearray((1, 0))
+    inner_detector.classify_classes.assert_called_with(['Lcom/c;'])
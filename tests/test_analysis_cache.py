@@ -0,0 +1,137 @@
+import gzip
+import os
+import pickle
+import shutil
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+from alpaka.apk.analysis_cache import AnalysisCache
+from alpaka.apk.analyzed_apk import AnalyzedApk
+from tests.apks_config.hello_apk_config import TOAST_HELLO_APK_CONFIG, MAIN_ACTIVIY
+
+
+def create_apk(path, content: bytes) -> str:
+    with open(path, 'wb') as apk_file:
+        apk_file.write(content)
+    return str(path)
+
+
+def test_moved_apk_hits_the_cache(tmp_path):
+    analysis_cache = AnalysisCache(str(tmp_path / 'cache'))
+    apk_path = create_apk(tmp_path / 'a.apk', b'apk content')
+    analyze = Mock(return_value=('apk', ['dex'], 'analysis'))
+
+    assert analysis_cache.get_analysis(apk_path, 'full', analyze) == ('apk', ['dex'], 'analysis')
+    moved_apk_path = str(tmp_path / 'moved.apk')
+    shutil.move(apk_path, moved_apk_path)
+    assert analysis_cache.get_analysis(moved_apk_path, 'full', analyze) == ('apk', ['dex'], 'analysis')
+
+    assert analyze.call_count == 1
+    assert analysis_cache.statistics['analysis_cache_hits'] == 1
+    assert analysis_cache.statistics['analysis_cache_misses'] == 1
+
+
+def test_different_content_or_mode_misses_the_cache(tmp_path):
+    analysis_cache = AnalysisCache(str(tmp_path / 'cache'))
+    apk_path = create_apk(tmp_path / 'a.apk', b'apk content')
+    analysis_cache.get_analysis(apk_path, 'full', Mock(return_value=('full',)))
+
+    assert analysis_cache.get_analysis(apk_path, 'dex-only', Mock(return_value=('dex-only',))) == ('dex-only',)
+    create_apk(apk_path, b'other apk content')
+    assert analysis_cache.get_analysis(apk_path, 'full', Mock(return_value=('other',))) == ('other',)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    analysis_cache = AnalysisCache(str(tmp_path / 'cache'), maximum_size=3000)
+    apk_paths = [create_apk(tmp_path / f'{i}.apk', bytes([i])) for i in range(3)]
+    # Incompressible results, about 1000 bytes per entry
+    results = [(os.urandom(1000),) for _ in apk_paths]
+
+    analysis_cache.get_analysis(apk_paths[0], 'full', Mock(return_value=results[0]))
+    analysis_cache.get_analysis(apk_paths[1], 'full', Mock(return_value=results[1]))
+    entry_path = os.path.join(str(tmp_path / 'cache'), AnalysisCache.calculate_key(apk_paths[1], 'full'))
+    os.utime(entry_path + AnalysisCache.ENTRY_SUFFIX, (0, 0))
+    analysis_cache.get_analysis(apk_paths[2], 'full', Mock(return_value=results[2]))
+
+    assert analysis_cache.statistics['analysis_cache_evictions'] == 1
+    assert analysis_cache.get_analysis(apk_paths[0], 'full', Mock()) == results[0]
+    assert analysis_cache.get_analysis(apk_paths[1], 'full', Mock(return_value=('analyzed',))) == ('analyzed',)
+
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    cache_path = tmp_path / 'cache'
+    analysis_cache = AnalysisCache(str(cache_path))
+    apk_path = create_apk(tmp_path / 'a.apk', b'apk content')
+    analysis_cache.get_analysis(apk_path, 'full', Mock(return_value=('analysis',)))
+    entry_path = cache_path / (AnalysisCache.calculate_key(apk_path, 'full') + AnalysisCache.ENTRY_SUFFIX)
+    entry_path.write_bytes(b'corrupted')
+
+    assert analysis_cache.get_analysis(apk_path, 'full', Mock(return_value=('reanalyzed',))) == ('reanalyzed',)
+    assert analysis_cache.get_analysis(apk_path, 'full', Mock()) == ('reanalyzed',)
+
+
+@pytest.mark.parametrize('entry_pickle', (
+    # Truncated
+    b'(I1\nI2\n',
+    # A class that was removed since, raises AttributeError
+    b'calpaka.apk.analysis_cache\nRemovedClass\n.',
+    # A module that was removed since, raises ImportError
+    b'calpaka.removed_module\nRemovedClass\n.',
+    # Raises ValueError
+    b'I1x\n.',
+    # A constructor whose arguments changed since, raises TypeError
+    b"cbuiltins\nint\n(S'1'\nI2\nI3\ntR.",
+))
+def test_stale_entry_is_a_miss(tmp_path, entry_pickle):
+    cache_path = tmp_path / 'cache'
+    analysis_cache = AnalysisCache(str(cache_path))
+    apk_path = create_apk(tmp_path / 'a.apk', b'apk content')
+    entry_path = cache_path / (AnalysisCache.calculate_key(apk_path, 'full') + AnalysisCache.ENTRY_SUFFIX)
+    entry_path.write_bytes(gzip.compress(entry_pickle))
+
+    assert analysis_cache._load(AnalysisCache.calculate_key(apk_path, 'full')) is None
+    assert not entry_path.exists()
+    assert analysis_cache.get_analysis(apk_path, 'full', Mock(return_value=('reanalyzed',))) == ('reanalyzed',)
+    assert analysis_cache.get_analysis(apk_path, 'full', Mock()) == ('reanalyzed',)
+    assert analysis_cache.statistics['analysis_cache_corrupted_entries'] == 1
+
+
+def test_replaced_corrupted_entry_is_kept(tmp_path):
+    cache_path = tmp_path / 'cache'
+    analysis_cache = AnalysisCache(str(cache_path))
+    apk_path = create_apk(tmp_path / 'a.apk', b'apk content')
+    key = AnalysisCache.calculate_key(apk_path, 'full')
+    entry_path = cache_path / (key + AnalysisCache.ENTRY_SUFFIX)
+    entry_path.write_bytes(b'corrupted')
+    corrupted_entry_stat = os.stat(entry_path)
+    # Another process stores the results meanwhile
+    analysis_cache._store(key, ('stored',))
+
+    analysis_cache._remove_entry(str(entry_path), corrupted_entry_stat)
+
+    assert analysis_cache.get_analysis(apk_path, 'full', Mock()) == ('stored',)
+
+
+def test_recursion_limit_is_restored(tmp_path):
+    recursion_limit = sys.getrecursionlimit()
+    analysis_cache = AnalysisCache(str(tmp_path / 'cache'))
+    apk_path = create_apk(tmp_path / 'a.apk', b'apk content')
+
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        # Local functions can not be pickled
+        analysis_cache.get_analysis(apk_path, 'full', Mock(return_value=(lambda: None,)))
+
+    assert sys.getrecursionlimit() == recursion_limit
+
+
+def test_analyzed_apk_is_loaded_from_the_cache(tmp_path):
+    analysis_cache = AnalysisCache(str(tmp_path / 'cache'))
+    analyzed_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, dex_only=True, analysis_cache=analysis_cache)
+    cached_analyzed_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, dex_only=True, analysis_cache=analysis_cache)
+
+    assert analysis_cache.statistics['analysis_cache_hits'] == 1
+    assert cached_analyzed_apk.analysis.classes.keys() == analyzed_apk.analysis.classes.keys()
+    assert cached_analyzed_apk.analysis.classes[MAIN_ACTIVIY].get_nb_methods() \
+        == analyzed_apk.analysis.classes[MAIN_ACTIVIY].get_nb_methods()
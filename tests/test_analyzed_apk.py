@@ -0,0 +1,57 @@
+import pytest
+
+from alpaka.apk.analyzed_apk import AnalyzedApk
+# noinspection PyUnresolvedReferences
+from tests.apks_config.hello_apk_config import TOAST_HELLO_APK_CONFIG, MAIN_ACTIVIY, hello_analyzed_apk_fixture
+
+
+@pytest.fixture(scope='module')
+def hello_dex_only_apk_fixture() -> AnalyzedApk:
+    return AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, dex_only=True)
+
+
+def test_dex_only_analysis_has_the_internal_classes(hello_dex_only_apk_fixture, hello_analyzed_apk_fixture):
+    def get_internal_class_names(analyzed_apk):
+        return {
+            class_name for class_name, class_analysis in analyzed_apk.analysis.classes.items()
+            if not class_analysis.is_external()
+        }
+
+    assert hello_dex_only_apk_fixture.apk is None
+    assert get_internal_class_names(hello_dex_only_apk_fixture) == get_internal_class_names(hello_analyzed_apk_fixture)
+
+
+def test_dex_only_class_methods_are_the_defined_methods(hello_dex_only_apk_fixture):
+    # The DEX-only mode fills androguard's private ClassAnalysis._methods, androguard is pinned in requirements.txt.
+    # This fails when an androguard upgrade changes how ClassAnalysis keeps its methods.
+    for class_analysis in hello_dex_only_apk_fixture.analysis.classes.values():
+        if class_analysis.is_external():
+            continue
+        defined_methods = list(class_analysis.get_vm_class().get_methods())
+        assert [method.get_method() for method in class_analysis.get_methods()] == defined_methods
+        assert class_analysis.get_nb_methods() == len(defined_methods)
+        for method in defined_methods:
+            assert class_analysis.get_method_analysis(method).get_method() is method
+    main_activity = hello_dex_only_apk_fixture.analysis.classes[MAIN_ACTIVIY]
+    assert (
+        [method.descriptor for method in main_activity.get_methods()]
+        == [method.get_descriptor() for method in main_activity.get_vm_class().get_methods()]
+    )
+
+
+def test_dex_only_analysis_has_the_referred_external_classes(hello_dex_only_apk_fixture):
+    assert hello_dex_only_apk_fixture.analysis.classes['Landroid/os/Bundle;'].is_external()
+    assert not hello_dex_only_apk_fixture.analysis.is_class_present('I')
+
+
+def test_dex_only_does_not_support_sessions():
+    with pytest.raises(ValueError):
+        AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, TOAST_HELLO_APK_CONFIG.session_path, dex_only=True)
+
+
+def test_type_descriptors_include_the_classes_and_primitives(hello_dex_only_apk_fixture, hello_analyzed_apk_fixture):
+    type_descriptors = hello_analyzed_apk_fixture.get_type_descriptors()
+
+    assert len(type_descriptors) == len(set(type_descriptors))
+    assert {MAIN_ACTIVIY, 'Landroid/os/Bundle;', 'V'} <= set(type_descriptors)
+    assert type_descriptors == hello_dex_only_apk_fixture.get_type_descriptors()
@@ -0,0 +1,89 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from alpaka.apk.class_filter import ClassFilterSpec
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from tests.apks_config.hello_apk_config import hello_analyzed_apk_fixture, MAIN_ACTIVIY
+from tests.class_filters import android_class_filter, CUSTOM_ANDROID_PACKAGES
+
+
+def create_class_analysis(is_external=False):
+    class_analysis = Mock()
+    class_analysis.is_external.return_value = is_external
+    return class_analysis
+
+
+@pytest.mark.parametrize(('class_filter_spec', 'class_name', 'is_external', 'expected_result'), (
+    (ClassFilterSpec(), 'Lcom/example/Foo;', False, True),
+    (ClassFilterSpec(include_prefixes=['Lcom/example/']), 'Lcom/example/Foo;', False, True),
+    (ClassFilterSpec(include_prefixes=['Lcom/example/']), 'Lcom/other/Foo;', False, False),
+    (ClassFilterSpec(include_prefixes=['Lcom/example/'], include_regexes=['Other']), 'Lcom/other/Other;', False, True),
+    (ClassFilterSpec(include_regexes=['^Lcom/', 'Bar;$']), 'Lorg/Bar;', False, True),
+    (ClassFilterSpec(include_regexes=['^Lcom/', 'Bar;$']), 'Lorg/Foo;', False, False),
+    (ClassFilterSpec(exclude_prefixes=['Landroid/', 'Ljava/']), 'Landroid/app/Activity;', False, False),
+    (ClassFilterSpec(exclude_prefixes=['Landroid/', 'Ljava/']), 'Lcom/example/Foo;', False, True),
+    (ClassFilterSpec(include_prefixes=['Lcom/'], exclude_prefixes=['Lcom/example/']), 'Lcom/example/Foo;', False,
+     False),
+    (ClassFilterSpec(exclude_regexes=[r'\$\d+;$']), 'Lcom/example/Foo$1;', False, False),
+    (ClassFilterSpec(exclude_regexes=[r'\$\d+;$']), 'Lcom/example/Foo$Bar;', False, True),
+    (ClassFilterSpec(exclude_primitives=True), '[[I', False, False),
+    (ClassFilterSpec(exclude_primitives=True), 'Lcom/example/I;', False, True),
+    (ClassFilterSpec(exclude_external=True), 'Lcom/example/Foo;', True, False),
+    (ClassFilterSpec(exclude_external=False), 'Lcom/example/Foo;', True, True),
+    # The groups of regexes searched with others keep their numbers
+    (ClassFilterSpec(include_regexes=[r'(x)\1', r'/(\w)\1;']), 'Lcom/aa;', False, True),
+    (ClassFilterSpec(include_regexes=[r'(x)\1', r'/(\w)\1;']), 'Lcom/ab;', False, False),
+    (ClassFilterSpec(include_regexes=['^Lorg/', '(?i)/foo;$']), 'Lcom/FOO;', False, True),
+    (ClassFilterSpec(exclude_regexes=['^Lorg/', '(?i)/foo;$']), 'Lcom/FOO;', False, False),
+))
+def test_compiled_class_filter(class_filter_spec, class_name, is_external, expected_result):
+    assert class_filter_spec.compile()(class_name, create_class_analysis(is_external)) == expected_result
+
+
+def test_instructions_bounds(hello_analyzed_apk_fixture):
+    class_analysis = hello_analyzed_apk_fixture.analysis.classes[MAIN_ACTIVIY]
+    instructions_count = ClassSignatureCalculator.get_instructions_count(class_analysis)
+    assert instructions_count > 0
+
+    assert ClassFilterSpec(minimum_instructions=instructions_count).compile()(MAIN_ACTIVIY, class_analysis)
+    assert not ClassFilterSpec(minimum_instructions=instructions_count + 1).compile()(MAIN_ACTIVIY, class_analysis)
+    assert ClassFilterSpec(maximum_instructions=instructions_count).compile()(MAIN_ACTIVIY, class_analysis)
+    assert not ClassFilterSpec(maximum_instructions=instructions_count - 1).compile()(MAIN_ACTIVIY, class_analysis)
+
+
+def test_compiled_filter_matches_python_filter(hello_analyzed_apk_fixture):
+    compiled_filter = ClassFilterSpec(
+        exclude_prefixes=CUSTOM_ANDROID_PACKAGES, exclude_external=True, exclude_primitives=True
+    ).compile()
+    for class_name, class_analysis in hello_analyzed_apk_fixture.analysis.classes.items():
+        assert compiled_filter(class_name, class_analysis) == android_class_filter(class_name, class_analysis)
+
+
+def test_load(tmp_path):
+    spec_file_path = tmp_path / 'filter.json'
+    spec_file_path.write_text(json.dumps({'include_prefixes': ['Lcom/example/'], 'minimum_instructions': 10}))
+    assert ClassFilterSpec.load(str(spec_file_path)) \
+        == ClassFilterSpec(include_prefixes=['Lcom/example/'], minimum_instructions=10)
+
+    spec_file_path.write_text(json.dumps({'include_packages': ['Lcom/example/']}))
+    with pytest.raises(ValueError):
+        ClassFilterSpec.load(str(spec_file_path))
+
+
+@pytest.mark.parametrize('spec_dict', (
+    {'include_prefixes': 'Lcom/'},
+    {'exclude_regexes': [1]},
+    {'exclude_external': 'true'},
+    {'minimum_instructions': '10'},
+    {'maximum_instructions': True},
+))
+def test_invalid_value_types(spec_dict):
+    with pytest.raises(ValueError, match=next(iter(spec_dict))):
+        ClassFilterSpec.from_dict(spec_dict)
+
+
+def test_invalid_regex():
+    with pytest.raises(ValueError, match=r"'\(unclosed'"):
+        ClassFilterSpec(include_regexes=['^Lcom/', '(unclosed']).compile()
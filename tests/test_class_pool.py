@@ -1,6 +1,10 @@
+import pytest
+
 from alpaka.apk.analyzed_apk import AnalyzedApk
 from alpaka.apk.global_class_pool import GlobalClassPool
 from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.signature_cache import SignatureCache
+from alpaka.exceptions import ClassFilterError
 from alpaka.obfuscation_detection.base import DummyObfuscationDetector
 from tests.apks_config.hello_apk_config import TOAST_HELLO_APK_CONFIG, MAIN_APPLICATION_PACKAGE, \
     MAIN_ACTIVIY
@@ -10,7 +14,75 @@ from tests.class_filters import android_class_filter
 def test_global_class_pool():
     signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False))
     apk = GlobalClassPool(AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, session_path=TOAST_HELLO_APK_CONFIG.session_path),
-                          DummyObfuscationDetector(False), signature_calculator)
-    apk.filter(android_class_filter)
-    # todo: fix this test: all of the classes are external so the class pool is empty
-    #assert apk.split_by_package()[MAIN_APPLICATION_PACKAGE][MAIN_ACTIVIY]
+                          DummyObfuscationDetector(False), signature_calculator, filters=[android_class_filter])
+    assert apk.split_by_package()[MAIN_APPLICATION_PACKAGE][MAIN_ACTIVIY]
+
+
+class RecordingObfuscationDetector(DummyObfuscationDetector):
+
+    def __init__(self):
+        super(RecordingObfuscationDetector, self).__init__(False)
+        self.classified_class_names = []
+
+    def is_class_name_obfuscated(self, class_name) -> bool:
+        self.classified_class_names.append(class_name)
+        return super(RecordingObfuscationDetector, self).is_class_name_obfuscated(class_name)
+
+
+def test_filters_are_applied_before_classification():
+    analyzed_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, session_path=TOAST_HELLO_APK_CONFIG.session_path)
+    obfuscation_detector = RecordingObfuscationDetector()
+    signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False))
+    unfiltered_pool = GlobalClassPool(analyzed_apk, DummyObfuscationDetector(False), signature_calculator)
+    filtered_pool = GlobalClassPool(
+        analyzed_apk, obfuscation_detector, signature_calculator, filters=[android_class_filter]
+    )
+
+    assert set(filtered_pool) == {
+        class_name for class_name, class_info in unfiltered_pool.items()
+        if android_class_filter(class_name, class_info.analysis)
+    }
+    assert filtered_pool.excluded_class_names == set(unfiltered_pool) - set(filtered_pool)
+    assert sorted(obfuscation_detector.classified_class_names) == sorted(filtered_pool)
+
+
+def test_class_info_filter_fails_naming_the_filter_contract():
+    analyzed_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, session_path=TOAST_HELLO_APK_CONFIG.session_path)
+    signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False))
+
+    def class_info_filter(_class_name, class_info):
+        return not class_info.is_obfuscated_name
+
+    with pytest.raises(ClassFilterError, match='ClassAnalysis'):
+        GlobalClassPool(
+            analyzed_apk, DummyObfuscationDetector(False), signature_calculator, filters=[class_info_filter]
+        )
+
+
+@pytest.mark.parametrize(('use_signature_cache', 'compact_signatures'), (
+    (False, False),
+    (True, False),
+    (False, True),
+    (True, True),
+))
+def test_calculate_signatures(tmp_path, use_signature_cache, compact_signatures, monkeypatch):
+    analyzed_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, session_path=TOAST_HELLO_APK_CONFIG.session_path)
+    signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False))
+    signature_cache = SignatureCache(str(tmp_path / 'signatures.sqlite')) if use_signature_cache else None
+    class_pool = GlobalClassPool(
+        analyzed_apk, DummyObfuscationDetector(False), signature_calculator, signature_cache, compact_signatures,
+    )
+    # A batch per few classes, so the pool is calculated in several batches
+    monkeypatch.setattr(GlobalClassPool, 'SIGNATURE_BATCH_CLASSES', 100)
+
+    class_pool.calculate_signatures()
+
+    assert all(class_info.has_signature for class_info in class_pool.values())
+    for class_info in class_pool.values():
+        assert class_info.signature == signature_calculator.calculate_class_signature(class_info.analysis)
+    if compact_signatures:
+        assert all(class_pool.signature_table.is_filled(row) for row in range(len(class_pool.signature_table)))
+    if use_signature_cache:
+        statistics = signature_cache.statistics
+        assert statistics['signature_cache_hits'] + statistics['signature_cache_misses'] == len(class_pool)
+        signature_cache.close()
@@ -1,7 +1,9 @@
+import pytest
 from androguard.core.bytecodes.dvm import Instruction
 
 from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
 from alpaka.class_signature.simhash_utils import calculate_distance
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
 # noinspection PyUnresolvedReferences
 from tests.apks_config.hello_apk_config import main_activity_class_fixture, hello_apk_classes_fixture, \
     hello_analyzed_apk_fixture
@@ -47,4 +49,18 @@ def test_calc_instructions_simhash(main_activity_class_fixture, monkeypatch):
 
 
 def test_get_instructions_count(main_activity_class_fixture):
-    assert ClassSignatureCalculator._get_instructions_count(main_activity_class_fixture) == 13
+    assert ClassSignatureCalculator.get_instructions_count(main_activity_class_fixture) == 13
+
+
+@pytest.mark.parametrize('compatible_simhashes', (True, False))
+def test_calculate_class_signatures(hello_analyzed_apk_fixture, compatible_simhashes):
+    signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(False), compatible_simhashes)
+    class_analyses = list(hello_analyzed_apk_fixture.analysis.get_internal_classes())
+    signatures = [signature_calculator.calculate_class_signature(class_analysis) for class_analysis in class_analyses]
+
+    assert signature_calculator.calculate_class_signatures(class_analyses) == signatures
+    if compatible_simhashes:
+        assert signatures == [
+            signature_calculator.calculate_class_signature_per_field(class_analysis)
+            for class_analysis in class_analyses
+        ]
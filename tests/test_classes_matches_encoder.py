@@ -0,0 +1,50 @@
+import io
+import json
+
+from alpaka.apk_differ import ApkDiffer
+from alpaka.encoders.classes_matches_encoder import convert_class_matches_dict_to_output_format, \
+    read_class_matches_json_lines, write_class_matches_json_lines
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+# noinspection PyUnresolvedReferences
+from tests.apks_config.hello_apk_config import hello_analyzed_apk_fixture
+
+
+def test_json_lines_are_read_like_the_json_output(hello_analyzed_apk_fixture):
+    apk_differ = ApkDiffer(DummyObfuscationDetector(False))
+    class_matches = list(apk_differ.iter_matches(hello_analyzed_apk_fixture, hello_analyzed_apk_fixture))
+    output_file = io.StringIO()
+
+    write_class_matches_json_lines(class_matches, output_file)
+    output_file.seek(0)
+
+    assert len(output_file.getvalue().splitlines()) == len(class_matches)
+    assert read_class_matches_json_lines(output_file) \
+        == convert_class_matches_dict_to_output_format(dict(class_matches))
+
+
+def test_iter_matches_yields_the_diff_matches(hello_analyzed_apk_fixture):
+    apk_differ = ApkDiffer(DummyObfuscationDetector(False))
+    class_matches = apk_differ.diff(hello_analyzed_apk_fixture, hello_analyzed_apk_fixture)
+    diff_statistics = apk_differ.statistics.copy()
+    apk_differ.statistics.clear()
+
+    iterated_class_matches = dict(apk_differ.iter_matches(hello_analyzed_apk_fixture, hello_analyzed_apk_fixture))
+    assert list(iterated_class_matches) == list(class_matches)
+    assert convert_class_matches_dict_to_output_format(iterated_class_matches) \
+        == convert_class_matches_dict_to_output_format(class_matches)
+    assert apk_differ.statistics == diff_statistics
+
+
+def test_json_lines_flag_identical_classes(hello_analyzed_apk_fixture):
+    apk_differ = ApkDiffer(DummyObfuscationDetector(True), match_identical_signatures=True)
+    class_matches = list(apk_differ.iter_matches(hello_analyzed_apk_fixture, hello_analyzed_apk_fixture))
+    output_file = io.StringIO()
+
+    write_class_matches_json_lines(class_matches, output_file)
+
+    records = [json.loads(line) for line in output_file.getvalue().splitlines()]
+    identical_class_names = {record['class'] for record in records if record['identical']}
+    assert len(identical_class_names) == apk_differ.statistics['identical_signature_matches'] > 0
+    for record in records:
+        if record['class'] in identical_class_names:
+            assert record['matches'] == {record['class']: 0}
@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+import simhash
+
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.opcode_simhash import OpcodeSimhashCalculator, calculate_simhashes_of_hashes
+from alpaka.class_signature.simhash_utils import calculate_shingle_simhash, calculate_simhash
+# noinspection PyUnresolvedReferences
+from tests.apks_config.hello_apk_config import hello_analyzed_apk_fixture
+
+
+@pytest.fixture(scope='module')
+def hello_instructions_fixture(hello_analyzed_apk_fixture):
+    return [
+        list(ClassSignatureCalculator.iterate_class_instruction(class_analysis))
+        for class_analysis in hello_analyzed_apk_fixture.analysis.get_internal_classes()
+    ]
+
+
+def test_calculate_simhashes_of_hashes():
+    random_generator = random.Random(21)
+    hashes_per_item = [
+        np.array([random_generator.getrandbits(64) for _ in range(hashes_count)], dtype=np.uint64)
+        for hashes_count in [random_generator.choice((0, 1, 2, 3, 4, 7, 100)) for _ in range(300)]
+    ]
+    # Ties of the votes
+    hashes_per_item.append(np.array([0, 2 ** 64 - 1], dtype=np.uint64))
+    hashes_per_item.append(np.array([2 ** 63, 2 ** 63, 1, 1], dtype=np.uint64))
+
+    assert calculate_simhashes_of_hashes(hashes_per_item) \
+        == [simhash.compute(hashes.tolist()) for hashes in hashes_per_item]
+    assert calculate_simhashes_of_hashes([]) == []
+
+
+def test_compatible_simhashes(hello_instructions_fixture):
+    opcode_simhash_calculator = OpcodeSimhashCalculator(compatible=True)
+    opcode_ids_per_class = [
+        [opcode_simhash_calculator.get_opcode_id(instruction) for instruction in instructions]
+        for instructions in hello_instructions_fixture
+    ]
+    expected_simhashes = [
+        (
+            calculate_simhash(instruction.get_name() for instruction in instructions),
+            calculate_shingle_simhash(instruction.get_name() for instruction in instructions),
+        )
+        for instructions in hello_instructions_fixture
+    ]
+
+    assert [
+        opcode_simhash_calculator.calculate_simhashes(opcode_ids) for opcode_ids in opcode_ids_per_class
+    ] == expected_simhashes
+    assert opcode_simhash_calculator.calculate_many_simhashes(
+        [np.array(opcode_ids) for opcode_ids in opcode_ids_per_class]
+    ) == expected_simhashes
+
+
+def test_native_simhashes(hello_instructions_fixture):
+    compatible_calculator = OpcodeSimhashCalculator(compatible=True)
+    native_calculator = OpcodeSimhashCalculator(compatible=False)
+    opcode_ids_per_class = [
+        [native_calculator.get_opcode_id(instruction) for instruction in instructions]
+        for instructions in hello_instructions_fixture
+    ]
+    native_simhashes = [
+        native_calculator.calculate_simhashes(opcode_ids) for opcode_ids in opcode_ids_per_class
+    ]
+
+    assert native_calculator.calculate_many_simhashes(
+        [np.array(opcode_ids) for opcode_ids in opcode_ids_per_class]
+    ) == native_simhashes
+    for instructions, (instructions_simhash, instruction_shingles_simhash) in zip(
+            hello_instructions_fixture, native_simhashes):
+        opcode_ids = [compatible_calculator.get_opcode_id(instruction) for instruction in instructions]
+        compatible_simhashes = compatible_calculator.calculate_simhashes(opcode_ids)
+        # Only the shingles are hashed differently
+        assert instructions_simhash == compatible_simhashes[0]
+        if len(set(zip(opcode_ids, opcode_ids[1:], opcode_ids[2:], opcode_ids[3:]))) > 2:
+            assert instruction_shingles_simhash != compatible_simhashes[1]
+
+
+def test_shingles_do_not_span_classes():
+    opcode_simhash_calculator = OpcodeSimhashCalculator(compatible=False)
+    opcode_ids_per_class = [np.array([1, 2, 3]), np.array([4, 5, 6, 7, 8]), np.array([], dtype=np.int64)]
+
+    assert opcode_simhash_calculator.calculate_many_simhashes(opcode_ids_per_class) == [
+        opcode_simhash_calculator.calculate_simhashes(opcode_ids.tolist()) for opcode_ids in opcode_ids_per_class
+    ]
+    assert opcode_simhash_calculator.calculate_many_simhashes(opcode_ids_per_class)[0][1] == 0
@@ -0,0 +1,66 @@
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.signature_cache import SignatureCache
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+# noinspection PyUnresolvedReferences
+from tests.apks_config.hello_apk_config import main_activity_class_fixture, hello_apk_classes_fixture, \
+    hello_analyzed_apk_fixture
+
+SIGNATURE_CALCULATOR = ClassSignatureCalculator(DummyObfuscationDetector(False))
+
+
+def test_signatures_are_cached_between_instances(main_activity_class_fixture, tmp_path):
+    cache_path = str(tmp_path / 'signatures.sqlite')
+    expected_signature = SIGNATURE_CALCULATOR.calculate_class_signature(main_activity_class_fixture)
+
+    with SignatureCache(cache_path) as signature_cache:
+        assert signature_cache.get_signature(main_activity_class_fixture, SIGNATURE_CALCULATOR) == expected_signature
+        assert signature_cache.statistics['signature_cache_misses'] == 1
+
+    with SignatureCache(cache_path) as signature_cache:
+        assert signature_cache.get_signature(main_activity_class_fixture, SIGNATURE_CALCULATOR) == expected_signature
+        assert signature_cache.statistics['signature_cache_hits'] == 1
+        assert signature_cache.statistics['signature_cache_misses'] == 0
+
+
+def test_content_key_depends_on_obfuscation_detector(main_activity_class_fixture):
+    obfuscated_signature_calculator = ClassSignatureCalculator(DummyObfuscationDetector(True))
+    assert (
+        SIGNATURE_CALCULATOR.calculate_content_key(main_activity_class_fixture)
+        != obfuscated_signature_calculator.calculate_content_key(main_activity_class_fixture)
+    )
+
+
+def test_least_recently_used_signatures_are_evicted(hello_apk_classes_fixture, tmp_path):
+    class_analyses = [class_analysis for class_analysis in hello_apk_classes_fixture.values()
+                      if not class_analysis.is_external()][:3]
+    with SignatureCache(str(tmp_path / 'signatures.sqlite'), maximum_entries=2) as signature_cache:
+        signature_cache.get_signature(class_analyses[0], SIGNATURE_CALCULATOR)
+        signature_cache.flush()
+        signature_cache.get_signature(class_analyses[1], SIGNATURE_CALCULATOR)
+        signature_cache.flush()
+        signature_cache.get_signature(class_analyses[0], SIGNATURE_CALCULATOR)
+        signature_cache.get_signature(class_analyses[2], SIGNATURE_CALCULATOR)
+        signature_cache.flush()
+
+        assert len(signature_cache) == 2
+        assert signature_cache.statistics['signature_cache_evictions'] == 1
+        signature_cache.get_signature(class_analyses[1], SIGNATURE_CALCULATOR)
+        assert signature_cache.statistics['signature_cache_misses'] == 4
+
+
+def test_get_signatures_calculates_the_misses_at_once(hello_apk_classes_fixture, tmp_path):
+    class_analyses = [class_analysis for class_analysis in hello_apk_classes_fixture.values()
+                      if not class_analysis.is_external()][:4]
+    expected_signatures = [
+        SIGNATURE_CALCULATOR.calculate_class_signature(class_analysis) for class_analysis in class_analyses
+    ]
+    with SignatureCache(str(tmp_path / 'signatures.sqlite')) as signature_cache:
+        signature_cache.get_signature(class_analyses[0], SIGNATURE_CALCULATOR)
+        signature_cache.flush()
+
+        assert signature_cache.get_signatures(class_analyses + class_analyses[1:2], SIGNATURE_CALCULATOR) \
+            == expected_signatures + expected_signatures[1:2]
+        assert signature_cache.statistics['signature_cache_hits'] == 2
+        assert signature_cache.statistics['signature_cache_misses'] == 4
+        assert signature_cache.get_signatures(class_analyses, SIGNATURE_CALCULATOR) == expected_signatures
+        assert signature_cache.statistics['signature_cache_misses'] == 4
@@ -0,0 +1,60 @@
+import pickle
+import random
+from unittest.mock import Mock
+
+from alpaka.apk.class_info import ClassInfo
+from alpaka.class_signature.signature import ClassSignature
+from alpaka.class_signature.signature_table import SignatureTable
+from tests.matching.class_pools import DISTANCE_CALCULATOR, create_random_signature
+
+
+def create_signatures(count):
+    rand = random.Random(3)
+    signatures = [create_random_signature(rand) for _ in range(count)]
+    for signature in signatures:
+        # Only unsigned hashes are stored as is
+        signature.superclass_hash &= 0xFFFFFFFFFFFFFFFF
+    return signatures
+
+
+def test_views_read_the_filled_signatures():
+    signatures = create_signatures(10)
+    signature_table = SignatureTable()
+    rows = [signature_table.add_row() for _ in signatures]
+    views = [signature_table.fill(row, signature) for row, signature in zip(rows, signatures)]
+
+    assert len(signature_table) == len(signatures)
+    assert views == signatures
+    assert [signature_table.view(row).to_signature() for row in rows] == signatures
+    assert DISTANCE_CALCULATOR.distance(views[0], views[1]) == DISTANCE_CALCULATOR.distance(*signatures[:2])
+
+
+def test_rows_are_filled_lazily():
+    signature_table = SignatureTable()
+    row = signature_table.add_row()
+    assert not signature_table.is_filled(row)
+    signature_table.fill(row, create_signatures(1)[0])
+    assert signature_table.is_filled(row)
+
+
+def test_views_are_pickled_as_signatures():
+    signature = create_signatures(1)[0]
+    signature_table = SignatureTable()
+    view = signature_table.fill(signature_table.add_row(), signature)
+
+    unpickled_signature = pickle.loads(pickle.dumps(view))
+
+    assert type(unpickled_signature) is ClassSignature
+    assert unpickled_signature == signature
+
+
+def test_class_info_stores_its_signature_in_the_table():
+    signature = create_signatures(1)[0]
+    signature_calculator = Mock(calculate_class_signature=Mock(return_value=signature))
+    signature_table = SignatureTable()
+    signature_table.add_row()
+
+    class_info = ClassInfo(None, False, signature_calculator, signature_table=signature_table)
+
+    assert class_info.signature == signature
+    assert signature_table.view(1) == signature
@@ -0,0 +1,69 @@
+import gc
+import weakref
+
+from alpaka.apk.analyzed_apk import AnalyzedApk
+from alpaka.apk_differ import ApkDiffer
+from alpaka.class_signature.class_signature_calculator import ClassSignatureCalculator
+from alpaka.class_signature.simhash_utils import hash_token
+from alpaka.class_signature.string_extractor import StringLiteralsExtractor
+from alpaka.class_signature.string_literal_index import StringLiteralIndex
+from alpaka.obfuscation_detection.base import DummyObfuscationDetector
+from tests.apks_config.bye_apk_config import TOAST_BYE_APK_CONFIG
+# noinspection PyUnresolvedReferences
+from tests.apks_config.hello_apk_config import hello_analyzed_apk_fixture, TOAST_HELLO_APK_CONFIG
+
+
+def test_string_literal_index(hello_analyzed_apk_fixture):
+    string_literal_index = StringLiteralIndex()
+    for class_analysis in hello_analyzed_apk_fixture.analysis.classes.values():
+        string_literals = [] if class_analysis.is_external() \
+            else list(StringLiteralsExtractor.extract_strings(class_analysis))
+        assert string_literal_index.get_string_literals(class_analysis) == string_literals
+        assert string_literal_index.get_string_literal_hashes(class_analysis) == list(map(hash_token, string_literals))
+        assert len(string_literal_index.get_string_ids(class_analysis)) == len(string_literals)
+    assert len(string_literal_index) == len(hello_analyzed_apk_fixture.analysis.classes)
+
+
+def test_string_table_decodes_once(hello_analyzed_apk_fixture):
+    string_literal_index = StringLiteralIndex()
+    string_table = string_literal_index.get_string_table(hello_analyzed_apk_fixture.analysis.vms[0])
+    assert string_literal_index.get_string_table(hello_analyzed_apk_fixture.analysis.vms[0]) is string_table
+    string_literal_index.index_classes(hello_analyzed_apk_fixture.analysis.get_internal_classes())
+    string_ids = {
+        string_id
+        for class_analysis in hello_analyzed_apk_fixture.analysis.get_internal_classes()
+        for string_id in string_literal_index.get_string_ids(class_analysis)
+    }
+    assert string_ids
+    for class_analysis in hello_analyzed_apk_fixture.analysis.get_internal_classes():
+        string_literal_index.get_string_literals(class_analysis)
+    assert len(string_table) == len(string_ids)
+
+
+def test_signature_calculator_indexes_scanned_classes(hello_analyzed_apk_fixture):
+    string_literal_index = StringLiteralIndex()
+    signature_calculator = ClassSignatureCalculator(
+        DummyObfuscationDetector(False), string_literal_index=string_literal_index
+    )
+    class_analyses = list(hello_analyzed_apk_fixture.analysis.get_internal_classes())
+    signatures = signature_calculator.calculate_class_signatures(class_analyses)
+    assert all(class_analysis in string_literal_index for class_analysis in class_analyses)
+    assert [signature.string_literals_count for signature in signatures] \
+        == [len(string_literal_index.get_string_literals(class_analysis)) for class_analysis in class_analyses]
+
+
+def test_apk_differ_keeps_the_index_for_a_single_diff():
+    apk_differ = ApkDiffer(DummyObfuscationDetector(False), match_rare_string_literals=True)
+    string_literal_index = apk_differ._signature_calculator.string_literal_index
+    new_apk = AnalyzedApk(TOAST_BYE_APK_CONFIG.apk_path, session_path=TOAST_BYE_APK_CONFIG.session_path)
+    old_apk = AnalyzedApk(TOAST_HELLO_APK_CONFIG.apk_path, session_path=TOAST_HELLO_APK_CONFIG.session_path)
+    old_analysis = weakref.ref(old_apk.analysis)
+
+    apk_differ.diff(old_apk, new_apk)
+    assert len(string_literal_index) == 0
+    del old_apk
+    gc.collect()
+    assert old_analysis() is None
+
+    apk_differ.diff(new_apk, new_apk)
+    assert len(string_literal_index) == 0
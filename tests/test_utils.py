@@ -1,8 +1,39 @@
+import json
+import os
 import string
+from unittest.mock import patch
 
-from alpaka.utils import split_by_separators
+import pytest
+
+from alpaka.utils import PrefixTrie, split_by_separators, write_json_atomically
 
 
 def test_split_by_separators():
     assert split_by_separators("SignUp", list(string.ascii_uppercase)) == ['Sign', 'Up']
     assert split_by_separators("helloFriend", list(string.ascii_uppercase)) == ["hello", "Friend"]
+
+
+def test_prefix_trie():
+    prefix_trie = PrefixTrie(['Landroid/', 'Landroidx/', 'Ljava/', '[L'])
+    assert prefix_trie.matches('Landroid/app/Activity;')
+    assert prefix_trie.matches('Landroidx/core/View;')
+    assert prefix_trie.matches('Ljava/')
+    assert prefix_trie.matches('[Lcom/example/Foo;')
+    assert not prefix_trie.matches('Landroid')
+    assert not prefix_trie.matches('Lcom/example/Foo;')
+    assert not prefix_trie.matches('')
+
+    assert not PrefixTrie().matches('Lcom/example/Foo;')
+    assert PrefixTrie(['']).matches('Lcom/example/Foo;')
+
+
+def test_write_json_atomically(tmp_path):
+    path = str(tmp_path / 'file.json')
+    write_json_atomically(path, {'a': 1})
+    with patch('json.dump', side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            write_json_atomically(path, {'a': 2})
+
+    with open(path) as json_file:
+        assert json.load(json_file) == {'a': 1}
+    assert os.listdir(tmp_path) == ['file.json']